@@ -0,0 +1,305 @@
+# ----------------------------------------
+# Shared aggregation engine.
+# Dimensions are encoded once per dataset as small integer codes. Every
+# aggregation the dashboard needs in a rerun ("dims -> sum / count / mean"
+# of the purchase amount) is then answered with np.bincount over combined
+# codes instead of one string-hashing groupby per chart.
+#
+# AggregationEngine.run() takes all requests of a rerun at once:
+#   - requests covered by the aggregate cube (cube.py) share one filter
+#     slice and one rollup per cuboid,
+#   - the rest share one pass over the selected rows.
+# Each request is then a cheap rollup of that shared result.
+
+import copy
+import math
+
+import numpy as np
+import pandas as pd
+
+
+MEASURE = "Purchase Amount (USD)"
+
+MAX_DENSE_GROUPS = 1 << 20      # Bu sayının üstündeki gruplamalarda bincount yerine hash kullan
+DENSE_GROUPS_PER_ROW = 4        # Satır başına bundan çok olası grup varsa gruplama seyrek sayılır
+MIN_DENSE_GROUPS = 1 << 12      # Bu kadar gruba kadar her zaman bincount
+
+
+# ----------------------------------------
+# Grouped sums over integer codes.
+# Codes of several dimensions are combined into one integer key; small key
+# spaces are summed with np.bincount, large ones are factorized first. A
+# key space much larger than the number of rows (a sparse cuboid) is also
+# factorized: np.bincount would allocate every possible group per measure.
+
+def group_sums(code_arrays, cardinalities, weights):
+    n_groups = math.prod(cardinalities) if cardinalities else 1
+    if n_groups == 0:
+        return tuple(np.empty(0, dtype=np.int64) for _ in code_arrays), {name: np.empty(0) for name in weights}
+    if code_arrays:
+        key = np.ravel_multi_index(code_arrays, cardinalities) if n_groups > 1 else np.zeros(len(code_arrays[0]), dtype=np.int64)
+    else:
+        key = np.zeros(len(next(iter(weights.values()))), dtype=np.int64)
+
+    dense_limit = min(MAX_DENSE_GROUPS, max(MIN_DENSE_GROUPS, DENSE_GROUPS_PER_ROW * len(key)))
+    if n_groups <= dense_limit:
+        sums = {name: np.bincount(key, weights=w, minlength=n_groups) for name, w in weights.items()}
+        present = np.flatnonzero(sums["count"])
+        group_codes = np.unravel_index(present, cardinalities) if code_arrays else ()
+        return group_codes, {name: s[present] for name, s in sums.items()}
+
+    inverse, uniques = pd.factorize(key)
+    sums = {name: np.bincount(inverse, weights=w, minlength=len(uniques)) for name, w in weights.items()}
+    return np.unravel_index(uniques, cardinalities), sums
+
+
+# ----------------------------------------
+# One encoded dimension: per-row codes plus the label of every code.
+# Bucketed dimensions also keep the smallest / largest value seen in each
+# bucket, which is what decides whether a slider covers it fully.
+
+class Dimension:
+
+    def __init__(self, name, values, bucket_width=None, sorted_index=None):
+        self.name = name
+        self.bucket_width = bucket_width
+        self.missing_code = None   # Eksik değerler için ayrılan kod (varsa)
+
+        if bucket_width is None:
+            codes, labels = pd.factorize(values, sort=True)
+            self.labels = np.asarray(labels, dtype=object)
+            self.codes = self._with_missing_code(codes, None)
+            return
+
+        values = np.asarray(values, dtype="float64")
+        if sorted_index is None:
+            sorted_index = sort_index(values)
+
+        # Buckets start at multiples of the width, where sliders tend to stop
+        origin = math.floor(np.nanmin(values) / bucket_width) * bucket_width if len(values) else 0
+        n_buckets = int((np.nanmax(values) - origin) // bucket_width) + 1 if len(values) else 1
+        self.origin = origin
+        self.labels = origin + bucket_width * np.arange(n_buckets)
+        codes = np.where(np.isnan(values), -1, (values - origin) // bucket_width)
+        self.codes = self._with_missing_code(codes, np.nan)
+        self._index_buckets(sorted_index)
+
+    # Row slices of each bucket in sorted order, and the value span inside it
+    def _index_buckets(self, sorted_index):
+        sorted_values, order = sorted_index
+        self.sorted_values = np.asarray(sorted_values, dtype="float64")
+        self.order = order
+        n_buckets = len(self.labels) - (self.missing_code is not None)
+        edges = self.origin + self.bucket_width * np.arange(n_buckets + 1)
+        self.starts = np.searchsorted(self.sorted_values, edges[:-1], side="left")
+        self.stops = np.searchsorted(self.sorted_values, edges[1:], side="left")
+        non_empty = self.stops > self.starts
+        last = max(len(self.sorted_values) - 1, 0)
+        self.bucket_min = np.where(non_empty, self.sorted_values[np.minimum(self.starts, last)], np.inf)
+        self.bucket_max = np.where(non_empty, self.sorted_values[np.maximum(self.stops - 1, 0)], -np.inf)
+
+    # Missing values get their own code (like groupby's dropna, they never
+    # show up in a chart, but the row still counts for the other dimensions)
+    def _with_missing_code(self, codes, missing_label):
+        codes = np.asarray(codes)
+        if (codes < 0).any():
+            self.missing_code = len(self.labels)
+            self.labels = np.append(self.labels, np.array([missing_label], dtype=self.labels.dtype))
+            codes = np.where(codes < 0, self.missing_code, codes)
+        return codes.astype(code_dtype(len(self.labels)))
+
+    @property
+    def cardinality(self):
+        return len(self.labels)
+
+    # The same dimension with rows appended, keeping every existing code.
+    # Returns None when the new rows need a new label (unseen category,
+    # value outside the buckets, first missing value); the caller then
+    # re-encodes from scratch.
+    def appended(self, values, sorted_index=None):
+        n_known = len(self.labels) - (self.missing_code is not None)
+        if self.bucket_width is None:
+            missing = pd.isna(values)
+            codes = pd.Index(self.labels[:n_known]).get_indexer(values)
+            if (codes[~missing] < 0).any():
+                return None
+        else:
+            values = np.asarray(values, dtype="float64")
+            missing = np.isnan(values)
+            codes = np.where(missing, -1, (values - self.origin) // self.bucket_width)
+            if ((codes[~missing] < 0) | (codes[~missing] >= n_known)).any():
+                return None
+        if missing.any():
+            if self.missing_code is None:
+                return None
+            codes = np.where(missing, self.missing_code, codes)
+
+        new = copy.copy(self)
+        new.codes = np.concatenate([self.codes, codes.astype(self.codes.dtype)])
+        if self.bucket_width is not None:
+            if sorted_index is None:
+                sorted_index = merge_sorted((self.sorted_values, self.order), values, len(self.codes))
+            new._index_buckets(sorted_index)
+        return new
+
+    # Allowed-code lookup table for a set of wanted labels
+    def allowed(self, wanted):
+        table = np.isin(self.labels, np.asarray(wanted, dtype=object))
+        if self.missing_code is not None:
+            table[self.missing_code] = False
+        return table
+
+    # Splits the buckets into fully covered / partially covered for a slider
+    def classify(self, bounds):
+        lo, hi = bounds
+        full = (self.bucket_min >= lo) & (self.bucket_max <= hi)
+        touched = (self.bucket_max >= lo) & (self.bucket_min <= hi)
+        if self.missing_code is not None:
+            full = np.append(full, False)
+            touched = np.append(touched, False)
+        return full, touched & ~full
+
+    def rows_in_buckets(self, buckets):
+        return np.concatenate(
+            [self.order[self.starts[b]:self.stops[b]] for b in np.flatnonzero(buckets)]
+            or [np.empty(0, dtype=np.int64)]
+        )
+
+
+# Values sorted once (stable) and the row position of each
+def sort_index(values):
+    order = np.argsort(values, kind="stable")
+    return values[order], order
+
+# Sorted index of existing rows merged with appended ones (rows first_row..).
+# Equal values keep row order, the same result as a stable sort of all rows.
+def merge_sorted(sorted_index, values, first_row):
+    sorted_values, order = sorted_index
+    new_values, new_order = sort_index(np.asarray(values))
+    at = np.searchsorted(sorted_values, new_values, side="right")
+    dtype = order.dtype if first_row + len(values) < np.iinfo(order.dtype).max else np.int64
+    return (
+        np.insert(sorted_values, at, new_values.astype(sorted_values.dtype, copy=False)),
+        np.insert(order.astype(dtype, copy=False), at, (new_order + first_row).astype(dtype)),
+    )
+
+def code_dtype(cardinality):
+    if cardinality < 2**7:
+        return np.int8
+    if cardinality < 2**15:
+        return np.int16
+    return np.int32
+
+
+# ----------------------------------------
+# Cuboid: the non-empty cells of a group-by over some of the dimensions,
+# stored as parallel arrays (one code array per dimension + measures).
+
+class Cuboid:
+
+    def __init__(self, dims, codes, measures):
+        self.dims = tuple(dims)
+        self.codes = codes             # dimension -> cell codes
+        self.measures = measures       # "sum" / "count" / "sum_sq" -> cell values
+
+    @property
+    def n_cells(self):
+        return len(self.measures["count"])
+
+    def rollup(self, dims, cardinalities, mask=None):
+        code_arrays = [self.codes[d] if mask is None else self.codes[d][mask] for d in dims]
+        weights = {m: v if mask is None else v[mask] for m, v in self.measures.items()}
+        group_codes, sums = group_sums(code_arrays, [cardinalities[d] for d in dims], weights)
+        return Cuboid(dims, dict(zip(dims, group_codes)), sums)
+
+
+# ----------------------------------------
+# Conversion of a cuboid to a labelled DataFrame (sum, count, sum_sq, mean).
+# Groups whose label is missing are left out, the same way groupby drops
+# NaN keys.
+
+def to_frame(cuboid, dimensions):
+    frame = pd.DataFrame({
+        d: dimensions[d].labels[cuboid.codes[d]] for d in cuboid.dims
+    })
+    for m, values in cuboid.measures.items():
+        frame[m] = values
+    frame["count"] = frame["count"].astype("int64")
+    frame["mean"] = frame["sum"] / frame["count"]
+    keep = frame["count"] > 0
+    for d in cuboid.dims:
+        missing = dimensions[d].missing_code
+        if missing is not None:
+            keep &= cuboid.codes[d] != missing
+    return frame[keep].reset_index(drop=True)
+
+def merge_cuboids(a, b, dims, cardinalities):
+    codes = {d: np.concatenate([a.codes[d], b.codes[d]]) for d in dims}
+    measures = {m: np.concatenate([a.measures[m], b.measures[m]]) for m in a.measures}
+    return Cuboid(dims, codes, measures).rollup(dims, cardinalities)
+
+def row_cuboid(dims, codes, values):
+    return Cuboid(dims, codes, {"sum": values, "count": np.ones(len(values)), "sum_sq": values ** 2})
+
+# Union of the requested dimensions, in a stable order
+def union_dims(dim_lists):
+    union = []
+    for dims in dim_lists:
+        union.extend(d for d in dims if d not in union)
+    return tuple(union)
+
+
+class AggregationEngine:
+
+    def __init__(self, df, cube=None, sketches=None):
+        self.df = df
+        self.cube = cube
+        self.sketches = sketches   # sketches.SketchIndex (büyük veri) veya None
+        self.values = cube.row_values if cube is not None else df[MEASURE].to_numpy(dtype="float64")
+        self.dimensions = dict(cube.dimensions) if cube is not None else {}
+
+    # Columns outside the cube are encoded the first time they are requested
+    def dimension(self, name):
+        if name not in self.dimensions:
+            self.dimensions[name] = Dimension(name, self.df[name])
+        return self.dimensions[name]
+
+    def cardinalities(self, dims):
+        return {d: self.dimension(d).cardinality for d in dims}
+
+    # ----------------------------------------
+    # requests: {name: [dimension, ...]}, state: FilterState,
+    # selection: row positions from the filter engine (needed only for
+    # requests that the cube cannot answer). Returns {name: DataFrame}.
+
+    def run(self, requests, state, selection=None):
+        requests = {name: tuple(dims) for name, dims in requests.items()}
+        on_cube = {}
+        on_rows = {}
+        for name, dims in requests.items():
+            if self.cube is not None and all(d in self.cube.dimensions for d in dims):
+                on_cube[name] = dims
+            else:
+                on_rows[name] = dims
+
+        results = self.cube.query_many(on_cube, state) if on_cube else {}
+        if on_rows:
+            if selection is None:
+                raise ValueError("selection is required for dimensions outside the cube: "
+                                 + ", ".join(sorted({d for dims in on_rows.values() for d in dims})))
+            results.update(self._run_on_rows(on_rows, selection))
+        return {name: results[name] for name in requests}
+
+    # One pass over the selected rows for the union of the requested dimensions
+    def _run_on_rows(self, requests, selection):
+        dims = union_dims(requests.values())
+        cards = self.cardinalities(dims)
+        shared = row_cuboid(
+            dims,
+            {d: self.dimension(d).codes[selection] for d in dims},
+            self.values[selection]
+        ).rollup(dims, cards)
+        return {
+            name: to_frame(shared.rollup(req_dims, cards), self.dimensions)
+            for name, req_dims in requests.items()
+        }
@@ -0,0 +1,351 @@
+# ----------------------------------------
+# Local aggregation API for other tools.
+# Serves the numbers behind the dashboard's summary charts over HTTP, with
+# the sidebar's filter parameters, from the same prepared dataset, filter
+# engine and aggregate cube the app builds (pipeline.py):
+#
+#   python aggregation_api.py Shopping_behavior.csv --port 8601
+#
+#   GET /options                                   filter choices and bounds
+#   GET /aggregates/category_totals?season=Winter&genders=Female
+#   GET /aggregates/state_totals                   (also state_category_means,
+#                                                   season_category_totals, item_totals)
+#   GET /flows?stages=Category,Payment Method,Shipping Type
+#   GET /stats                                     cache and batching counters
+#
+# Filters: season, categories, genders (comma-separated labels; omitted =
+# all, an empty gender list selects nothing as in the sidebar), age_min /
+# age_max and price_min / price_max. format=arrow returns an Arrow IPC
+# stream instead of JSON (needs pyarrow).
+#
+# Requests are handled on an asyncio loop (Starlette + uvicorn, both
+# installed with Streamlit) and the aggregations run on a thread pool.
+# Concurrent identical requests share one computation, and finished
+# responses are kept in an LRU (lru_cache.py, sized by body length,
+# DASHBOARD_API_CACHE_MB) keyed by the dataset fingerprint, so a changed
+# data file, reloaded on the next request, never serves old numbers.
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+try:                                   # pyarrow is only needed for format=arrow
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from data_loader import file_extension, file_fingerprint, resolve_data_path
+from filter_engine import FilterState
+from flow_graph import build_flow_graph
+from incremental import INCREMENTAL, LiveDataset
+from lru_cache import LRUCache
+from memory_accounting import freeze
+from pipeline import build_aggregation_engine, build_filter_engine, filter_options, load_prepared
+from sections import CHART_AGGREGATES, SANKEY_STAGE_OPTIONS, default_options
+
+
+API_HOST = os.environ.get("DASHBOARD_API_HOST", "127.0.0.1")           # Yalnızca yerel erişim
+API_PORT = int(os.environ.get("DASHBOARD_API_PORT", 8601))
+API_CACHE_MB = float(os.environ.get("DASHBOARD_API_CACHE_MB", 64))
+API_WORKERS = int(os.environ.get("DASHBOARD_API_WORKERS", 0)) or None  # 0 = varsayılan havuz boyutu
+
+API_AGGREGATES = {                     # Yol adı -> CHART_AGGREGATES adı
+    "category_totals": "treemap",
+    "state_totals": "states",
+    "state_category_means": "heatmap",
+    "season_category_totals": "sunburst",
+    "item_totals": "items",
+}
+RESULT_COLUMNS = ["sum", "count", "mean"]
+FLOW_MEASURES = ("count", "sum")       # Müşteri sayısı (grafikteki gibi) veya harcama
+MEDIA_TYPES = {"json": "application/json", "arrow": "application/vnd.apache.arrow.stream"}
+
+
+class UnknownQuery(LookupError):       # 404: bilinmeyen toplam adı
+    pass
+
+
+# ----------------------------------------
+# The prepared dataset with its engines, rebuilt when the data file changes
+# (or extended with appended rows under DASHBOARD_INCREMENTAL=1, as in the app)
+
+@dataclass(frozen=True)
+class Dataset:
+    fingerprint: tuple
+    df: object
+    filter_engine: object
+    engine: object
+    options: dict
+
+
+class DatasetSource:
+
+    def __init__(self, path):
+        self.path = path
+        self.live = LiveDataset(path) if INCREMENTAL and file_extension(path) == ".csv" else None
+        self._dataset = None
+        self._lock = threading.Lock()  # Aynı anda tek yükleme
+
+    def current(self):
+        with self._lock:
+            if self.live is not None:
+                snapshot = self.live.refresh()
+                if snapshot is None:
+                    raise FileNotFoundError(self.path)
+                fingerprint = ("live", self.path, snapshot.version)
+                if self._dataset is None or self._dataset.fingerprint != fingerprint:
+                    self._dataset = Dataset(fingerprint, snapshot.df, snapshot.filter_engine, snapshot.engine,
+                                            filter_options(snapshot.df))
+                return self._dataset
+
+            fingerprint = file_fingerprint(self.path)
+            if fingerprint is None:
+                if self._dataset is None:
+                    raise FileNotFoundError(self.path)
+                return self._dataset               # Dosya geçici olarak yoksa eski veriyle devam
+            if self._dataset is None or self._dataset.fingerprint != fingerprint:
+                df = load_prepared(self.path)
+                if df is None:
+                    raise FileNotFoundError(self.path)
+                filter_engine = freeze(build_filter_engine(df))
+                engine = freeze(build_aggregation_engine(df, filter_engine))
+                self._dataset = Dataset(fingerprint, df, filter_engine, engine, filter_options(df))
+            return self._dataset
+
+
+# ----------------------------------------
+# Query parameters -> FilterState, with the sidebar's defaults. Raises
+# ValueError for unknown labels or malformed numbers.
+
+def _labels(params, name, choices):
+    if name not in params:
+        return list(choices)
+    values = [v.strip() for v in params[name].split(",") if v.strip()]
+    unknown = [v for v in values if v not in choices]
+    if unknown:
+        raise ValueError(f"unknown {name}: {', '.join(unknown)} (choices: {', '.join(map(str, choices))})")
+    return values
+
+def _number(params, name, default):
+    if name not in params:
+        return default
+    try:
+        value = float(params[name])
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {params[name]!r}") from None
+    return int(value) if value.is_integer() else value
+
+def parse_filter_state(params, options):
+    season = params.get("season", "All Seasons")
+    if season != "All Seasons" and season not in options["seasons"]:
+        raise ValueError(f"unknown season: {season} (choices: All Seasons, {', '.join(options['seasons'])})")
+    return FilterState.from_sidebar(
+        season,
+        _labels(params, "categories", options["categories"]),
+        (_number(params, "age_min", options["age"][0]), _number(params, "age_max", options["age"][1])),
+        _labels(params, "genders", options["genders"]),
+        (_number(params, "price_min", options["price"][0]), _number(params, "price_max", options["price"][1])),
+    )
+
+def parse_stages(params, columns):
+    if "stages" not in params:
+        return default_options(columns)["sankey"]["stages"]
+    stages = tuple(s.strip() for s in params["stages"].split(",") if s.strip())
+    allowed = [c for c in SANKEY_STAGE_OPTIONS if c in columns]
+    unknown = [s for s in stages if s not in allowed]
+    if unknown:
+        raise ValueError(f"unknown stages: {', '.join(unknown)} (choices: {', '.join(allowed)})")
+    if len(stages) < 2:
+        raise ValueError("stages needs at least two columns")
+    return stages
+
+
+# ----------------------------------------
+# Response bodies
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+def _filters(state):
+    return {name: list(value) if value is not None else None for name, value in asdict(state).items()}
+
+def encode(payload, frame, fmt):
+    if fmt == "arrow":
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({"query": json.dumps(payload, default=_json_default)})
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    return json.dumps(payload, default=_json_default).encode("utf-8")
+
+def aggregate_body(dataset, name, state, fmt):
+    selection = dataset.filter_engine.select(state)
+    chart = API_AGGREGATES[name]
+    dims = list(CHART_AGGREGATES[chart])
+    frame = dataset.engine.run({chart: dims}, state, selection)[chart][dims + RESULT_COLUMNS]
+    payload = dict(aggregate=name, filters=_filters(state), rows=len(selection))
+    if fmt == "json":
+        payload["data"] = frame.to_dict(orient="records")
+    return encode(payload, frame, fmt)
+
+def flow_body(dataset, stages, measure, state, fmt):
+    selection = dataset.filter_engine.select(state)
+    flow = build_flow_graph(dataset.engine, stages, state, selection, measure=measure)
+    labels, node_stage = np.asarray(flow.labels, dtype=object), np.asarray(flow.node_stage, dtype=object)
+    links = dict(source_stage=node_stage[flow.sources], source=labels[flow.sources],
+                 target_stage=node_stage[flow.targets], target=labels[flow.targets], value=flow.values)
+    payload = dict(stages=list(stages), measure=measure, filters=_filters(state), rows=len(selection))
+    if fmt == "json":
+        payload["nodes"] = [dict(label=label, stage=stage) for label, stage in zip(flow.labels, flow.node_stage)]
+        payload["links"] = [dict(source=int(s), target=int(t), value=v)
+                            for s, t, v in zip(flow.sources, flow.targets, flow.values)]
+    return encode(payload, pd.DataFrame(links), fmt)
+
+
+# ----------------------------------------
+# Request batching and result cache. fetch() runs on the event loop; the
+# computation itself runs on the pool.
+
+class AggregationService:
+
+    def __init__(self, source, cache_bytes=int(API_CACHE_MB * 1024 * 1024), max_workers=API_WORKERS):
+        self.source = source
+        self.cache = LRUCache(cache_bytes, len)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self._inflight = {}            # anahtar -> hesaplanan future (yalnızca olay döngüsünde)
+        self.requests = 0
+        self.batched = 0
+
+    async def dataset(self):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, self.source.current)
+
+    # build(dataset) -> response body; query identifies it within a dataset
+    async def fetch(self, dataset, query, build):
+        self.requests += 1
+        key = (dataset.fingerprint,) + query
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.pool, self._compute, key, dataset, build)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.batched += 1          # Aynı sorgu zaten hesaplanıyor: sonucunu bekle
+        return await asyncio.shield(future)
+
+    def _compute(self, key, dataset, build):
+        body = build(dataset)
+        self.cache.put(key, body)       # Future bitmeden önbellekte olsun
+        return body
+
+    def stats(self):
+        return dict(self.cache.stats(), requests=self.requests, batched=self.batched)
+
+
+# ----------------------------------------
+# HTTP routes
+
+def create_app(service):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    def response_format(request):
+        fmt = request.query_params.get("format", "json")
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"format must be one of: {', '.join(MEDIA_TYPES)}")
+        if fmt == "arrow" and pa is None:
+            raise ValueError("format=arrow needs pyarrow (pip install pyarrow)")
+        return fmt
+
+    def handler(query):
+        async def endpoint(request):
+            try:
+                dataset = await service.dataset()
+                fmt = response_format(request)
+                key, build = query(request, dataset, fmt)
+                body = await service.fetch(dataset, key + (fmt,), build)
+            except UnknownQuery as error:
+                return JSONResponse({"error": str(error)}, status_code=404)
+            except ValueError as error:
+                return JSONResponse({"error": str(error)}, status_code=400)
+            except FileNotFoundError as error:
+                return JSONResponse({"error": f"dataset not found: {error}"}, status_code=503)
+            return Response(body, media_type=MEDIA_TYPES[fmt])
+        return endpoint
+
+    def aggregates(request, dataset, fmt):
+        name = request.path_params["name"]
+        if name not in API_AGGREGATES:
+            raise UnknownQuery(f"unknown aggregate: {name} (choices: {', '.join(API_AGGREGATES)})")
+        if not all(c in dataset.df.columns for c in CHART_AGGREGATES[API_AGGREGATES[name]]):
+            raise UnknownQuery(f"{name} is not available for this dataset")
+        state = parse_filter_state(request.query_params, dataset.options)
+        return ("aggregate", name, state), lambda d: aggregate_body(d, name, state, fmt)
+
+    def flows(request, dataset, fmt):
+        stages = parse_stages(request.query_params, dataset.df.columns)
+        measure = request.query_params.get("measure", "count")
+        if measure not in FLOW_MEASURES:
+            raise ValueError(f"measure must be one of: {', '.join(FLOW_MEASURES)}")
+        state = parse_filter_state(request.query_params, dataset.options)
+        return ("flows", stages, measure, state), lambda d: flow_body(d, stages, measure, state, fmt)
+
+    async def options(request):
+        try:
+            dataset = await service.dataset()
+        except FileNotFoundError as error:
+            return JSONResponse({"error": f"dataset not found: {error}"}, status_code=503)
+        return JSONResponse(dict(dataset.options, rows=len(dataset.df), aggregates=list(API_AGGREGATES),
+                                 stages=[c for c in SANKEY_STAGE_OPTIONS if c in dataset.df.columns]))
+
+    async def stats(request):
+        return JSONResponse(service.stats())
+
+    return Starlette(routes=[
+        Route("/options", options),
+        Route("/aggregates/{name}", handler(aggregates)),
+        Route("/flows", handler(flows)),
+        Route("/stats", stats),
+    ])
+
+
+# ----------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard's aggregations over local HTTP.")
+    parser.add_argument("data", nargs="?", default=os.environ.get("DASHBOARD_DATA", "Shopping_behavior.csv"),
+                        help="dataset file (a newer Parquet / Arrow copy next to a CSV is preferred, as in the app)")
+    parser.add_argument("--host", default=API_HOST, help=f"interface to listen on (default: {API_HOST})")
+    parser.add_argument("--port", type=int, default=API_PORT, help=f"port (default: {API_PORT})")
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="aggregation threads")
+    parser.add_argument("--cache-mb", type=float, default=API_CACHE_MB, help="response cache budget (MB)")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    path = resolve_data_path(args.data)
+    source = DatasetSource(path)
+    try:
+        dataset = source.current()           # İlk istek beklemesin
+    except FileNotFoundError:
+        parser.exit(1, f"Could not read {path}\n")
+    print(f"Serving {len(dataset.df):,} rows of {path} on http://{args.host}:{args.port}")
+    service = AggregationService(source, int(args.cache_mb * 1024 * 1024), args.workers)
+    uvicorn.run(create_app(service), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
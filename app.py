@@ -1,14 +1,78 @@
 # ----------------------------------------
 # This section imports all Python libraries used in the project.
-# Includes data processing (pandas, numpy), visualization (plotly),
+# Includes data processing (pandas), visualization (plotly),
 # UI rendering (streamlit), and optional machine learning tools.
 
 import streamlit as st             # Streamlit arayüz kütüphanesi
 import pandas as pd                # Veri işleme için pandas
-import numpy as np                 # Sayısal hesaplamalar için numpy
-import plotly.express as px        # Plotly'nin hızlı görselleştirme modülü
-import plotly.graph_objects as go  # Daha karmaşık grafikler için Plotly GO
 import os                          # Dosya işlemleri için OS modülü
+import hashlib                     # Yüklenen dosyanın içerik özeti (cache anahtarı)
+import uuid                        # Oturum kimliği (zaman ölçüm logu için)
+from concurrent.futures import FIRST_COMPLETED, wait   # Arka plan grafik işlerini beklemek için
+
+from data_loader import (          # Veri okuma ve temizleme adımları
+    UPLOAD_MAX_MB,
+    column_memory,
+    file_extension,
+    file_fingerprint,
+    resolve_data_path,
+)
+from filter_engine import FilterState                 # Önceden indekslenmiş filtreler
+from pipeline import (                                # Streamlit'siz çalışabilen aşamalar
+    build_aggregation_engine,
+    build_filter_engine,
+    filter_options,
+    load_partitioned,
+    load_prepared,
+    load_prepared_bytes,
+    section_requests,
+)
+from incremental import INCREMENTAL, LiveDataset         # Büyüyen CSV'nin yalnızca yeni satırları
+from partitions import (                              # Çok dosyalı (bölümlenmiş) veri kaynakları
+    discover,
+    is_partitioned,
+    listing_fingerprint,
+    partition_options,
+    prune,
+)
+from export import (                                  # Filtrelenmiş verinin parça parça dışa aktarımı
+    available_formats,
+    export_file_name,
+    export_mime,
+)
+from duckdb_backend import (                          # İsteğe bağlı disk üzerinde sorgu motoru
+    BACKEND,
+    DuckDBBackend,
+    QueryContext,
+    duckdb_available,
+)
+from charts import PARCOORDS_ROW_BUDGET, SCATTER_MODES  # Grafik oluşturucular (charts.py)
+from figure_cache import FigureCache, figure_size     # Oturumlar arası ortak figür önbelleği
+from figure_store import FIGURE_STORE_DIR, FigureStore  # batch_render.py ile önceden üretilmiş figürler
+from instrumentation import Recorder, debug_enabled    # ?debug=1 ile açılan performans paneli
+from lru_cache import LRUCache                        # Yüklenen dosyaların ortak önbelleği
+from memory_accounting import (                       # Paylaşılan veri ve oturum başına bellek (?admin=1)
+    SessionRegistry,
+    admin_enabled,
+    deep_size,
+    freeze,
+    reachable,
+    shared_sizes,
+)
+from progressive import (                             # Önce örnekten, sonra arka planda tam hesap
+    PROGRESSIVE,
+    PROGRESSIVE_MIN_ROWS,
+    ProgressiveRunner,
+    SampleContext,
+    build_sample,
+)
+from sections import (                                # Bağımsız çalışan grafik bölümleri
+    FIGURE_BUDGET_KB,
+    SANKEY_STAGE_OPTIONS,
+    SECTIONS,
+    ChartContext,
+    default_options,
+)
 
 
 # ----------------------------------------
@@ -44,125 +108,188 @@ h1 {
 
 
 # ----------------------------------------
-st.title("Shopping Behavior Dashboard")       # Sayfa başlığı
-st.markdown("Welcome to the interactive dashboard for analyzing customer shopping trends.")
-st.markdown("---")                            # Araya çizgi çekelim
+# Opt-in performance instrumentation (instrumentation.py).
+# With ?debug=1 or DASHBOARD_DEBUG=1 every stage of this run is timed, a
+# panel is shown at the bottom of the sidebar and each measurement is
+# appended to the JSON-lines log (DASHBOARD_TIMING_LOG).
+
+recorder = Recorder(
+    enabled=debug_enabled(st.query_params.get("debug")),
+    session=st.session_state.setdefault("session_id", uuid.uuid4().hex[:12])
+)
 
 
 # ----------------------------------------
-# US State Codes Map
-
-STATE_NAME_TO_ABBR = {
-    'Alabama':'AL','Alaska':'AK','Arizona':'AZ','Arkansas':'AR','California':'CA','Colorado':'CO','Connecticut':'CT',
-    'Delaware':'DE','Florida':'FL','Georgia':'GA','Hawaii':'HI','Idaho':'ID','Illinois':'IL','Indiana':'IN','Iowa':'IA',
-    'Kansas':'KS','Kentucky':'KY','Louisiana':'LA','Maine':'ME','Maryland':'MD','Massachusetts':'MA','Michigan':'MI',
-    'Minnesota':'MN','Mississippi':'MS','Missouri':'MO','Montana':'MT','Nebraska':'NE','Nevada':'NV','New Hampshire':'NH',
-    'New Jersey':'NJ','New Mexico':'NM','New York':'NY','North Carolina':'NC','North Dakota':'ND','Ohio':'OH','Oklahoma':'OK',
-    'Oregon':'OR','Pennsylvania':'PA','Rhode Island':'RI','South Carolina':'SC','South Dakota':'SD','Tennessee':'TN',
-    'Texas':'TX','Utah':'UT','Vermont':'VT','Virginia':'VA','Washington':'WA','West Virginia':'WV','Wisconsin':'WI',
-    'Wyoming':'WY','District of Columbia':'DC'
-}
+st.title("Shopping Behavior Dashboard")       # Sayfa başlığı
+st.markdown("Welcome to the interactive dashboard for analyzing customer shopping trends.")
+st.markdown("---")                            # Araya çizgi çekelim
 
 
 # ----------------------------------------
-# This function attempts to load the CSV file from a given path.
-# If the file is missing or unreadable, it returns None instead of crashing.
-# Streamlit's cache avoids re-reading the file on every interaction.
-
-@st.cache_data
-def load_data(filepath):          # CSV dosyasını yükler, hata olursa None döner
-    try:
-        df = pd.read_csv(filepath)
-        return df
-    except FileNotFoundError:
-        return None
-    except Exception:
-        return None
-
-data_path = "Shopping_behavior.csv"
-df = load_data(data_path)         # Veriyi yüklüyoruz
+# Prepared dataset cache.
+# The cleaned frame is built once per source and shared read-only by every
+# session (st.cache_resource hands out the same object instead of a copy).
+# Files are keyed by path + modification time + size, uploads by a content
+# hash, so a changed file is picked up while slider drags never re-clean.
+# Loading and cleaning themselves live in data_loader.py.
+
+@st.cache_resource(max_entries=4, show_spinner="Preparing dataset...")
+def load_prepared_data(filepath, fingerprint, _recorder=None):
+    # Only timed when the cache is cold; _recorder is not part of the key
+    return load_prepared(filepath, _recorder or Recorder())
+
+@st.cache_resource(max_entries=4, show_spinner="Reading partitions...")
+def load_partitioned_data(fingerprint, _partitions, _recorder=None):
+    # fingerprint covers exactly the files in _partitions; returns (df, sketches)
+    return load_partitioned(_partitions, _recorder or Recorder())
+
+# Uploads are parsed once per content (chunk by chunk, with a progress bar)
+# and kept in a server-wide LRU keyed by the SHA-256 of the file, so the
+# same extract uploaded again, by anyone, is not parsed again. The LRU
+# (lru_cache.py) is sized by the frames' memory (DASHBOARD_UPLOAD_CACHE_MB).
+# The hash itself is computed once per uploaded file and session.
+
+UPLOAD_CACHE_MB = float(os.environ.get("DASHBOARD_UPLOAD_CACHE_MB", 1024))
+
+@st.cache_resource(show_spinner=False)
+def get_upload_cache():
+    return LRUCache(int(UPLOAD_CACHE_MB * 1024 * 1024), lambda df: int(df.memory_usage(deep=True).sum()))
+
+def upload_hash(uploaded_file):
+    hashes = st.session_state.setdefault("upload_hashes", {})    # file_id -> içerik özeti
+    if uploaded_file.file_id not in hashes:
+        hashes[uploaded_file.file_id] = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    return hashes[uploaded_file.file_id]
+
+def prepared_upload(uploaded_file, content_hash):
+    held = st.session_state.get("upload_frame")                  # Bütçeye sığmasa da oturumda kalır
+    if held is not None and held[0] == content_hash:
+        return held[1]
+    upload_cache = get_upload_cache()
+    df = upload_cache.get(content_hash)
+    if df is None:
+        bar = st.sidebar.progress(0.0, text=f"Parsing {uploaded_file.name}...")
+        df = load_prepared_bytes(
+            uploaded_file.getvalue(), uploaded_file.name, recorder,
+            progress=lambda done, rows: bar.progress(done, text=f"Parsing {uploaded_file.name}: {rows:,} rows")
+        )
+        bar.empty()
+        if df is None:
+            return None
+        upload_cache.put(content_hash, df)
+    st.session_state["upload_frame"] = (content_hash, df)
+    return df
+
+# With DASHBOARD_BACKEND=duckdb the file is queried in place (duckdb_backend.py)
+# instead of being loaded: filters and aggregations run as SQL on the file,
+# so datasets larger than memory work. Uploads always use the pandas path.
+
+@st.cache_resource(max_entries=4, show_spinner="Opening dataset...")
+def get_query_backend(filepath, fingerprint):
+    return DuckDBBackend(filepath)
+
+# With DASHBOARD_INCREMENTAL=1 a CSV that only grows is not reloaded when it
+# changes: each run parses just the lines appended since the last one and
+# merges them into the shared frame, filter engine and cube (incremental.py).
+
+@st.cache_resource(show_spinner="Preparing dataset...")
+def get_live_dataset(filepath):
+    return LiveDataset(filepath)
+
+# DASHBOARD_DATA may also name a directory or glob of partition files
+# (partitions.py). Partitions excluded by the current Season / Category /
+# Gender selection are not read. The selection is taken from the widget
+# state (st.session_state) because the sidebar is drawn after loading.
+
+def pending_constraints(choices):
+    return FilterState.from_sidebar(
+        st.session_state.get("season_sel", "All Seasons"),
+        st.session_state.get("cat_sel", []),
+        (0, 0),
+        st.session_state.get("gender_sel", choices.get("Gender", [])),
+        (0, 0),
+    ).categorical()
+
+data_source = os.environ.get("DASHBOARD_DATA", "Shopping_behavior.csv")
+backend, df, snapshot = None, None, None
+partition_sketches = None                                # Okunan bölüm dosyalarının birleşik taslakları
+partition_choices = {}                                   # Dizin adlarından gelen seçenekler
+if is_partitioned(data_source):
+    data_path = data_source
+    partitions = discover(data_source)
+    partition_choices = partition_options(partitions)
+    needed = prune(partitions, pending_constraints(partition_choices)) or partitions[:1]
+    data_fingerprint = ("partitions",) + listing_fingerprint(needed) if needed else None
+    if data_fingerprint:
+        df, partition_sketches = load_partitioned_data(data_fingerprint, needed, recorder)
+else:
+    data_path = resolve_data_path(data_source)           # Varsa Parquet/Arrow kopyasını tercih et
+    data_fingerprint = file_fingerprint(data_path)
+    if data_fingerprint and BACKEND == "duckdb" and duckdb_available():
+        backend = get_query_backend(data_path, data_fingerprint)
+        data_fingerprint = ("duckdb",) + tuple(data_fingerprint)     # Figür önbelleği iki yolu ayırsın
+    elif data_fingerprint and INCREMENTAL and file_extension(data_path) == ".csv":
+        snapshot = get_live_dataset(data_path).refresh(recorder)      # Sadece eklenen satırları okur
+        df = snapshot.df
+        data_fingerprint = ("live", data_path, snapshot.version)
+    elif data_fingerprint:
+        df = load_prepared_data(data_path, data_fingerprint, recorder)   # Veriyi yüklüyoruz
 
 # Eğer bulunamazsa kullanıcıdan yüklemesini istiyoruz
-if df is None:
+if backend is None and df is None:
     st.sidebar.warning(f"The dataset could not be found at:`{data_path}'")
 
-    uploaded_file = st.sidebar.file_uploader("Upload CSV File", type=["csv"])
+    uploaded_file = st.sidebar.file_uploader(
+        "Upload Dataset (CSV, Parquet or Arrow)",
+        type=["csv", "parquet", "pq", "feather", "arrow", "ipc"],
+        max_upload_size=max(int(UPLOAD_MAX_MB), 1),
+        help=f"Files up to {UPLOAD_MAX_MB:,.0f} MB (DASHBOARD_UPLOAD_MAX_MB)."
+    )
 
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+        if uploaded_file.size > UPLOAD_MAX_MB * 1024 * 1024:      # Sunucu tarafında da kontrol et
+            st.sidebar.error(f"The file is larger than the {UPLOAD_MAX_MB:,.0f} MB upload limit.")
+            st.stop()
+        data_fingerprint = ("upload", upload_hash(uploaded_file))
+        df = prepared_upload(uploaded_file, data_fingerprint[1])
+        if df is None:
+            st.sidebar.error("The uploaded file has no usable rows.")
+            st.stop()
         st.sidebar.success("File uploaded successfully")
     else:
         st.info("Upload the dataset to continue")
         st.stop()
 
 
-# ----------------------------------------
-# Removes unnecessary columns, normalizes column names, converts numeric fields, 
-# handles missing values and prepares categorical + location data for analysis.
-
-cols_to_drop = [                     # Kullanılmayan sütunları kaldır
-    "Review Rating",
-    "Subscription Status",
-    "Discount Applied",
-    "Promo Code Used",
-    "Previous Purchases"
-]
-
-for col in cols_to_drop:
-    if col in df.columns:
-        df.drop(columns=col, inplace=True)   # Varsa sutünu kaldır
-
-df.columns = [c.strip() for c in df.columns]        # Sütun adlarını düzenle (boşluk vs varsa kaldır)
-
-numeric_cols = ["Age", "Purchase Amount (USD)", "Frequency of Purchases"]   # Seçili alanları sayısal değere çevir
-for col in numeric_cols:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-categorical_cols = [                                             # Kategorik sütunlardaki eksik değerleri doldur
-    "Gender", "Category", "Season", "Payment Method", 
-    "Shipping Type", "Size", "Color", "Item Purchased", "Location"
-]
-
-for col in categorical_cols:
-    if col in df.columns:
-        df[col] = df[col].fillna("Unknown").astype(str)
-
-for col in ["Age", "Purchase Amount (USD)"]:          # Eksik sayısal değeri olan satırları sil
-    if col in df.columns:
-        df = df[~df[col].isna()]
-
-if "Location" in df.columns:                        # Coğrafi grafikler için eyalet isimlerini kodla  
-    df["Location_Abbr"] = df["Location"].apply(
-        lambda x: STATE_NAME_TO_ABBR.get(x, x) if pd.notna(x) else np.nan
-    )
-else:
-    df["Location_Abbr"] = np.nan
-
-
 # ----------------------------------------
 # This section provides interactive controls for filtering the dataset.
 # It allows users to customize the dashboard based on their analysis needs.
 
 st.sidebar.header("🔎 Filters / Controls")     # Sidebar başlığı
 
-season_list = sorted(df["Season"].dropna().unique().tolist()) if "Season" in df.columns else []  # Mevcut sezonları listele
+options = backend.options if backend is not None else filter_options(df)   # Seçenekler ve sınırlar
+for col, name in (("Season", "seasons"), ("Category", "categories"), ("Gender", "genders")):
+    if col in partition_choices:                 # Okunmamış bölümlerin değerleri de seçilebilsin
+        options[name] = partition_choices[col]
+
+season_list = options["seasons"]                 # Mevcut sezonları listele
 season_sel = st.sidebar.selectbox(
     "Select Season",                                # Selectbox başlığı
     options=["All Seasons"] + season_list,          # 'Tümü' seçeneği ekle
-    help="Filter data by season to see seasonal trends in shopping behavior."  # Tooltip açıklaması
+    help="Filter data by season to see seasonal trends in shopping behavior.",  # Tooltip açıklaması
+    key="season_sel"                                # Bölüm budaması bu değeri okur
 )
 
-cat_options = sorted(df["Category"].dropna().unique().tolist()) if "Category" in df.columns else []  # Kategori listesi
+cat_options = options["categories"]              # Kategori listesi
 cat_sel = st.sidebar.multiselect(
     "Select Category (optional)",    # Kullanıcıya görünen başlık
     options=cat_options,             # Tüm kategoriler
     default=cat_options,             # Varsayılan: Hepsi seçili
-    help="Choose one or more product categories to focus on specific items."    # Tooltip açıklaması
+    help="Choose one or more product categories to focus on specific items.",   # Tooltip açıklaması
+    key="cat_sel"                    # Bölüm budaması bu değeri okur
 )
 
-age_min = int(df["Age"].min()) if "Age" in df.columns else 18   # Minimum yaş
-age_max = int(df["Age"].max()) if "Age" in df.columns else 90   # Maksimum yaş
+age_min, age_max = options["age"]                # Minimum ve maksimum yaş
 age_range = st.sidebar.slider(
     "Age Range",            # Slider başlığı
     min_value=age_min,      # Slider alt sınır
@@ -171,16 +298,16 @@ age_range = st.sidebar.slider(
     help="Filter customers by age to see trends for different age groups."   # Tooltip açıklaması
 )
 
-gender_options = sorted(df["Gender"].unique().tolist()) if "Gender" in df.columns else []  # Cinsiyet listesi
+gender_options = options["genders"]              # Cinsiyet listesi
 gender_sel = st.sidebar.multiselect(
     "Select Gender (optional)",   # Kullanıcı başlığı
     options=gender_options,       # Mevcut cinsiyetler
     default=gender_options,       # Varsayılan: Hepsi seçilir
-    help="Filter by gender to compare shopping behavior of different groups."   # Tooltip açıklaması
+    help="Filter by gender to compare shopping behavior of different groups.",  # Tooltip açıklaması
+    key="gender_sel"              # Bölüm budaması bu değeri okur
 )
 
-pmin = int(df["Purchase Amount (USD)"].min()) if "Purchase Amount (USD)" in df.columns else 0   # Minimum harcama
-pmax = int(df["Purchase Amount (USD)"].max()) if "Purchase Amount (USD)" in df.columns else 1000 # Maksimum harcama
+pmin, pmax = options["price"]                    # Minimum ve maksimum harcama
 price_range = st.sidebar.slider(
     "Purchase Amount Range (USD)",    # Başlık
     min_value=pmin,                    # Alt limit
@@ -194,446 +321,439 @@ price_range = st.sidebar.slider(
 # This section applies all user-selected filters to the dataset.
 # Our purpose is that we should be ensure that only relevant records appear in visualizations.
 
-filtered = df.copy()  # Orijinal verinin kopyasını oluşturur
-
-if season_sel != "All Seasons":                                # Eğer tüm sezonlar seçilmediyse
-    filtered = filtered[filtered["Season"] == season_sel]      # Veri sezona göre filtrelenir
-
-if cat_sel:                                                    # Eğer en az 1 kategori seçilmişse
-    filtered = filtered[filtered["Category"].isin(cat_sel)]    # Kategoriye göre filtreleme
-
-filtered = filtered[
-    (filtered["Age"] >= age_range[0]) &                        # Minimum yaş kontrolü
-    (filtered["Age"] <= age_range[1])                          # Maksimum yaş kontrolü
-]
-
-filtered = filtered[filtered["Gender"].isin(gender_sel)]       # Cinsiyet filtrelemesi
-
-filtered = filtered[
-    (filtered["Purchase Amount (USD)"] >= price_range[0]) &    # Minimum harcama
-    (filtered["Purchase Amount (USD)"] <= price_range[1])      # Maksimum harcama
-]
-
-st.sidebar.markdown(f"**Filtered Records:** {len(filtered)}")  # Kaç kayıt kaldığını gösterir
-
-st.header("Shopping Insights Overview")  # Görselleştirmelerin ana başlığı
-
+# The filter engine (filter_engine.py) is built once per dataset and shared
+# by all sessions. It turns the sidebar state into one array of row
+# positions; only that selection is materialized, with no per-filter copies.
 
-# ----------------------------------------
-# 1) TREEMAP — TOTAL SPENDING BY CATEGORY
-# Treemap chart showing total spending aggregated by product category.
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_filter_engine(fingerprint, _df):
+    return freeze(build_filter_engine(_df))          # Paylaşılan indeksler salt okunur
 
-st.subheader("Treemap")    # Grafik alt başlığı
-st.markdown("This treemap shows the total purchase amount aggregated by product category, \
-             giving a clear view of which categories contribute most to revenue.")
+# Chart aggregations are answered by the aggregation engine (aggregation.py)
+# from the aggregate cube (cube.py) with integer-code bincounts, sharing the
+# filter slice and one rollup per cuboid instead of one groupby per chart.
 
-if "Category" in filtered.columns:
-    tdf = filtered.groupby("Category")["Purchase Amount (USD)"].sum().reset_index()
-    fig_treemap = px.treemap(tdf, 
-                path=["Category"], 
-                values="Purchase Amount (USD)",
-                title="Total Spending by Category"
-                )
-    st.plotly_chart(fig_treemap, use_container_width=True)     # Grafiği ekranda göster
+@st.cache_resource(max_entries=4, show_spinner="Building aggregate cube...")
+def get_aggregation_engine(fingerprint, _df, _filter_engine, _sketches=None):
+    return freeze(build_aggregation_engine(_df, _filter_engine, _sketches))
 
+filter_state = FilterState.from_sidebar(season_sel, cat_sel, age_range, gender_sel, price_range)
 
-# ----------------------------------------
-# 2) SANKEY DIAGRAM — CUSTOMER FLOW
-# Visualizes customer flow from Category to Payment Method to Shipping Type.
-
-st.subheader("Sankey Diagram")   # Grafik başlığı
-st.markdown(
-    "This Sankey diagram visualizes how customers move from product categories \
-     to their preferred payment methods and shipping types, giving insight into purchasing behavior patterns.")
-
-if all(c in filtered.columns for c in ["Category", "Payment Method", "Shipping Type"]):     # Gerekli kolonları kontrol ediyoruz
-    cats = filtered["Category"].astype(str).unique().tolist()
-    pays = filtered["Payment Method"].astype(str).unique().tolist()
-    ships = filtered["Shipping Type"].astype(str).unique().tolist()
-    
-    labels = cats + pays + ships         # Tüm etiketleri tek listede birleştir
-
-    def idx(x):                          # Etiket ismine göre index bulmak için yardımcı fonksiyon
-        return labels.index(x)
-
-    src, dst, val = [], [], []           # Sankey bağlantıları için listeler
-
-    # Category → Payment Method
-    cat_pay = filtered.groupby(["Category", "Payment Method"]).size().reset_index(name="count")
-    for _, r in cat_pay.iterrows():
-        src.append(idx(r["Category"]))
-        dst.append(idx(r["Payment Method"]))
-        val.append(int(r["count"]))
-
-    # Payment Method → Shipping Type
-    pay_ship = filtered.groupby(["Payment Method", "Shipping Type"]).size().reset_index(name="count")
-    for _, r in pay_ship.iterrows():
-        src.append(idx(r["Payment Method"]))
-        dst.append(idx(r["Shipping Type"]))
-        val.append(int(r["count"]))
-
-    # Bağlantı yoksa grafik gösterme
-    if sum(val) > 0:
-        sankey_fig = go.Figure(
-          data=[ go.Sankey
-                    ( node=dict(
-                            label=labels,
-                            pad=15,
-                            thickness=15
-                        ),
-                    link=dict(
-                            source=src,
-                            target=dst,
-                            value=val
-                        )
-                    )
-                ]
-            )
-        
-    sankey_fig.update_layout(
-        title_text="Customer Flow: Category → Payment Method → Shipping Type",
-        font_size=10
-        )
-    
-    st.plotly_chart(sankey_fig, use_container_width=True)     # Grafiği ekranda göster
-   
+if backend is None:
+    if snapshot is not None:                         # Eklemelerle güncel tutulan motorlar
+        filter_engine, agg_engine = snapshot.filter_engine, snapshot.engine
+    else:
+        filter_engine = get_filter_engine(data_fingerprint, df)
+        agg_engine = get_aggregation_engine(data_fingerprint, df, filter_engine, partition_sketches)
+    with recorder.timer("filter", rows_in=len(df)) as timing:
+        selection = filter_engine.select(filter_state)   # Seçili satırların indeksleri
+        timing["rows_out"] = len(selection)
+
+    if recorder.enabled:                             # Her filtrenin tek tek etkisi
+        for name, rows_in, rows_out in filter_engine.funnel(filter_state):
+            recorder.record("filter_step", filter=name, rows_in=rows_in, rows_out=rows_out)
+        recorder.record("dataframe_memory", rows_out=len(df), bytes=int(df.memory_usage(deep=True).sum()))
+
+    columns = df.columns
 else:
-    st.info("Not enough data to generate the Sankey diagram.")
+    with recorder.timer("filter") as timing:         # Filtreler SQL WHERE olarak çalışır
+        timing["rows_out"] = backend.count(filter_state)
+    agg_engine = backend
+    columns = backend.columns
 
 
 # ----------------------------------------
-# HISTOGRAM — AGE DISTRIBUTION
-# Histogram showing the distribution of customer ages.
-
-st.subheader("Age Distribution Histogram")   # Grafik başlığı
-st.markdown(
-    "This histogram displays the distribution of customer ages."
-    "which age groups are more active shoppers. ")
-
-if "Age" in filtered.columns:                # Age kolonu mevcut mu kontrol edilir
-
- fig_hist = px.histogram(                    # Histogram çizimi için Plotly kullanıyoruz
-        filtered,
-        x="Age",                             # Histogram ekseni
-        nbins=20,                            # Histogram kutu sayısı
-        title="Customer Age Distribution",
-        marginal="box",                      # Üstte boxplot göster
-        hover_data=["Gender", "Category"]    # Üzerine basınca ek bilgi 
- )
- st.plotly_chart(fig_hist, use_container_width=True)    
+# Every visualization is an independent section (sections.py) rendered in
+# its own st.fragment: a section's widgets rerun only that section and a
+# collapsed section computes nothing.
+#
+# Built figures go into one LRU cache shared by all sessions
+# (figure_cache.py), keyed by dataset fingerprint, chart, normalized filter
+# state and chart options, so returning to a view seen before (by anyone)
+# skips the rebuild. Budget: DASHBOARD_FIGURE_CACHE_MB (default 256).
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    return FigureCache()
+
+figure_cache = get_figure_cache()
+
+# Figures pre-built by batch_render.py (e.g. after a nightly data refresh)
+# are read from the persistent store (DASHBOARD_FIGURE_STORE) on a memory
+# cache miss, before anything is computed.
+
+@st.cache_resource
+def get_figure_store():
+    return FigureStore(FIGURE_STORE_DIR) if FIGURE_STORE_DIR else None
+
+figure_store = get_figure_store()
+
+def is_prebuilt(key):
+    return key in figure_cache or (figure_store is not None and key in figure_store)
+
+def build_or_load(section, ctx, options, key):
+    stored = figure_store.get(key) if figure_store is not None else None
+    return stored if stored is not None else section.render(ctx, options)
+
+# Progressive rendering (DASHBOARD_PROGRESSIVE=1, in-memory datasets of
+# DASHBOARD_PROGRESSIVE_MIN_ROWS rows or more; progressive.py). A section
+# without a cached figure is drawn from a sample first; its exact figure is
+# built on a shared thread pool and swapped in once the page is drawn.
+# Fragment reruns of a single section compute it directly.
+
+@st.cache_resource(show_spinner=False)
+def get_progressive_runner():
+    return ProgressiveRunner()
+
+@st.cache_resource(max_entries=4, show_spinner="Sampling dataset...")
+def get_progressive_sample(fingerprint, _df):
+    return freeze(build_sample(_df))
+
+progressive = PROGRESSIVE and backend is None and len(df) >= PROGRESSIVE_MIN_ROWS
+progressive_sample, sample_context = None, None
+if progressive:
+    progressive_runner = get_progressive_runner()
+    progressive_sample = get_progressive_sample(data_fingerprint, df)
+    sample_context = SampleContext(progressive_sample, filter_state)
+    ProgressiveRunner.cancel(st.session_state.get("progressive_jobs", []))   # Önceki filtrenin bekleyen işleri
+    st.session_state["progressive_jobs"] = []
+pending_sections = []                                # (bölüm, yer tutucu, iş) — sayfa çizilince doldurulur
+page_pass = True                                     # Sayfa çizilirken True; parça yeniden çalışmalarında False
+
+def section_is_open(section):
+    state = st.session_state.get(f"section_{section.key}")   # Kullanıcı açıp kapattıysa
+    return section.default_open if state is None else state
+
+# Returns (figure, caption, job). job is the background future of the exact
+# figure when the returned one was drawn from the sample, else None.
+def section_figure(section, ctx, options, timing):
+    key = section.dependency_key(data_fingerprint, ctx.state, options)
+    timing["cached"] = is_prebuilt(key)
+    if progressive and page_pass and not timing["cached"]:
+        job = progressive_runner.submit(
+            lambda: figure_cache.get_or_build(key, lambda: build_or_load(section, ctx, options, key))
+        )
+        st.session_state["progressive_jobs"].append(job)
+        fig, caption = figure_cache.get_or_build(
+            key + ("sample",), lambda: section.render(sample_context, options)
+        )
+        return fig, caption, job
+    return figure_cache.get_or_build(key, lambda: build_or_load(section, ctx, options, key)) + (None,)
 
-# ----------------------------------------
-# SUNBURST CHART — SEASON → CATEGORY SALES
-# Shows total spending grouped by Season and Category
+def section_is_cached(section):
+    options = default_options(columns).get(section.key, {})
+    return is_prebuilt(section.dependency_key(data_fingerprint, filter_state, options))
 
-st.subheader("Sunburst Chart")
-st.markdown(
-    "This sunburst chart visualizes how total purchase amounts are distributed "
-    "across different seasons and product categories."
+# The aggregations of the open sections that need a new figure are
+# requested here in one batch; sections opened later fetch their own.
+batch = {} if progressive else section_requests(      # İlerlemeli modda işler kendi toplamlarını ister
+    [s for s in SECTIONS if section_is_open(s) and not section_is_cached(s)], columns
 )
+with recorder.timer("aggregate", requests=len(batch)):
+    if backend is None:
+        aggregates = agg_engine.run(batch, filter_state, selection) if batch else {}
+    else:
+        aggregates = backend.run(batch, filter_state) if batch else {}
 
-if not filtered.empty:
-    # Create a sunburst chart showing hierarchy: Season -> Category
-    fig_sunburst = px.sunburst(
-        filtered,
-        path=["Season", "Category"],
-        values="Purchase Amount (USD)",
-        color_continuous_scale="Viridis",
-        color="Purchase Amount (USD)",
-        title="Sales Distribution by Season and Category",
-        hover_data={"Purchase Amount (USD)": ":,.2f"}
-    )
-    st.plotly_chart(fig_sunburst, use_container_width=True)
+if backend is None:
+    chart_context = ChartContext(df, selection, filter_state, agg_engine, aggregates, take=filter_engine.take)
 else:
-    st.warning("No data available for selected filters.")
-
-
-
-# ----------------------------------------
-# BAR CHART — TOTAL SALES BY ITEM
-
-st.subheader("Bar Chart")
-st.markdown(
-    "This bar chart displays the total purchase amount for each item, highlighting the top-selling products."
-)
+    chart_context = QueryContext(backend, filter_state, aggregates)
 
-if not filtered.empty:
-    # Aggregate total sales per item
-    item_sales = (
-        filtered.groupby("Item Purchased")["Purchase Amount (USD)"].sum().reset_index()
-    )
-
-    # Sort descending to show top-selling items at the top
-    item_sales = item_sales.sort_values("Purchase Amount (USD)", ascending=False)
-
-    # Create bar chart
-    fig_bar = px.bar(
-        item_sales,
-        x="Item Purchased",
-        y="Purchase Amount (USD)",
-        color_continuous_scale="Plasma",
-        color="Purchase Amount (USD)",
-        title="Total Sales by Item",
-        hover_data={"Item Purchased": False, "Purchase Amount (USD)": ":,.2f"}
-    )
+st.sidebar.markdown(f"**Filtered Records:** {chart_context.count}")  # Kaç kayıt kaldığını gösterir
 
-    st.plotly_chart(fig_bar, use_container_width=True)
-
-else:
-    st.warning("No data available for the selected filters.")
+with recorder.timer("unique_customers"):
+    unique_customers = chart_context.unique_customers()
+if unique_customers is not None:                     # Büyük veride HyperLogLog tahmini (~)
+    value, approximate = unique_customers
+    st.sidebar.markdown(f"**Unique Customers:** {'~' if approximate else ''}{value:,}")
 
 
 # ----------------------------------------
-# GEOGRAPHIC MAP — TOTAL PURCHASE AMOUNT BY STATE
-
-st.subheader("Geographical Distribution of Total Spending")
-st.markdown(
-    "This choropleth map shows total purchase amounts across U.S. states. "
-    
-)
-
-# Eğer Location_Abbr varsa işle
-if "Location_Abbr" in filtered.columns and not filtered.empty:
-    # Aggregate total sales per state
-    geo_df = (
-        filtered.groupby("Location_Abbr")["Purchase Amount (USD)"]
-        .sum()
-        .reset_index()
+# Section-local controls. Each returns the keyword options of the section's
+# build function; changing them reruns only that section.
+
+def sankey_options(ctx):
+    # Any ordered list of categorical columns can be used as flow stages.
+    # Links are counted by the aggregation engine (flow_graph.py).
+    flow_options = [c for c in SANKEY_STAGE_OPTIONS if c in ctx.columns]
+    flow_stages = st.multiselect(
+        "Flow stages (in order)",
+        options=flow_options,
+        default=list(default_options(ctx.columns)["sankey"]["stages"]),
+        help="Pick two or more columns; customers flow from the first to the last."
     )
-
-    fig_geo = px.choropleth(
-        geo_df,
-        locations="Location_Abbr",          # State abbreviations
-        locationmode="USA-states",
-        color="Purchase Amount (USD)",      # Color by spending
-        color_continuous_scale="Viridis",
-        scope="usa",
-        title="Total Purchase Amount by US State"
+    return {"stages": tuple(flow_stages)}
+
+def scatter_options(ctx):
+    # Large selections switch to WebGL and then to server-side density bins
+    # (charts.py). Narrowing the zoom window drills back down to raw points.
+    age_range, price_range = ctx.state.age_range, ctx.state.price_range
+    scatter_mode = st.radio("Rendering", SCATTER_MODES, horizontal=True,
+                            help="Auto picks points, WebGL or density bins from the number of rows.")
+    x_window, y_window = tuple(age_range), tuple(price_range)
+    with st.popover("Zoom window (drill down)"):
+        if age_range[0] < age_range[1]:
+            x_window = st.slider("Age window", min_value=age_range[0], max_value=age_range[1],
+                                 value=(age_range[0], age_range[1]))
+        if price_range[0] < price_range[1]:
+            y_window = st.slider("Purchase Amount window", min_value=price_range[0], max_value=price_range[1],
+                                 value=(price_range[0], price_range[1]))
+
+    zoomed = x_window != tuple(age_range) or y_window != tuple(price_range)
+    return {
+        "mode": scatter_mode,
+        "x_window": x_window if zoomed else None,
+        "y_window": y_window if zoomed else None,
+    }
+
+def parcoords_options(ctx):
+    # At most a row budget of lines is drawn: a stratified sample that keeps the
+    # Gender / Season / Category / Payment mix and the spending extremes.
+    # Axis codes and tick labels come from the encodings built once per dataset.
+    budget = st.slider(
+        "Lines to draw",
+        min_value=500,
+        max_value=20_000,
+        value=PARCOORDS_ROW_BUDGET,
+        step=500,
+        help="Larger selections are drawn as a stratified sample of this many customers."
     )
+    return {"budget": budget}
 
-    st.plotly_chart(fig_geo, use_container_width=True)
+SECTION_OPTIONS = {
+    "sankey": sankey_options,
+    "scatter": scatter_options,
+    "parcoords": parcoords_options,
+}
 
-else:
-    st.warning("Not enough geographical data to generate the map.")
 
+# Payload of the charts on the page (serialized figure bytes), by section.
+# Sections over the DASHBOARD_FIGURE_BUDGET_KB budget were simplified when
+# they were built (Section.render).
+chart_payload = {}
+
+# slots: (chart placeholder, caption placeholder). key is only given to
+# charts that get replaced within the same run (progressive mode).
+def show_section(section, fig, caption, slots, key=None):
+    chart_slot, caption_slot = slots
+    if fig is None:
+        chart_payload.pop(section.key, None)
+        if section.empty_level == "info":
+            chart_slot.info(section.empty_message)
+        else:
+            chart_slot.warning(section.empty_message)
+        caption_slot.empty()
+        return
+    chart_slot.plotly_chart(fig, use_container_width=True, key=key)     # Grafiği ekranda göster
+    chart_payload[section.key] = figure_size(fig)                       # Önbellekte ölçülmüş boyut
+    if caption:
+        caption_slot.caption(caption)
+    else:
+        caption_slot.empty()
+
+@st.fragment
+def chart_section(section, ctx):
+    container = st.expander(section.title, expanded=section.default_open,
+                            key=f"section_{section.key}", on_change="rerun")
+    if not container.open:
+        return                                       # Kapalı bölüm hiçbir şey hesaplamaz
+    with container:
+        if section.description:
+            st.markdown(section.description)
+        if not section.available(ctx.columns):
+            st.warning(section.empty_message)
+            return
+        options = SECTION_OPTIONS[section.key](ctx) if section.key in SECTION_OPTIONS else {}
+        slots = (st.empty(), st.empty())             # Örnek grafik sonra tam grafikle değiştirilir
+        with recorder.timer("section", chart=section.key) as timing:
+            fig, caption, job = section_figure(section, ctx, options, timing)
+            if job is not None:
+                caption = " ".join(filter(None, [
+                    caption, f"Approximate: drawn from a {sample_context.sample_rows:,}-row sample, refining..."
+                ]))
+            show_section(section, fig, caption, slots, key=f"{section.key}_approximate" if job else None)
+        if job is not None:
+            pending_sections.append((section, slots, job))
+        elif fig is not None and recorder.enabled:
+            recorder.record("figure", chart=section.key, bytes=chart_payload[section.key])
+
+# Swaps the sample charts for the exact ones as their jobs finish. The
+# status line is redrawn while waiting, which is also where Streamlit stops
+# this run when a newer filter change arrives.
+def refine_sections(pending):
+    jobs = {job: (section, slots) for section, slots, job in pending}
+    status = st.empty()
+    while jobs:
+        status.caption(f"Refining {len(jobs)} approximate chart(s)...")
+        done, _ = wait(jobs, timeout=0.25, return_when=FIRST_COMPLETED)
+        for job in done:
+            section, slots = jobs.pop(job)
+            if job.cancelled():
+                continue
+            (fig, caption), seconds = job.result()
+            show_section(section, fig, caption, slots, key=f"{section.key}_exact")
+            recorder.record("refine", chart=section.key, seconds=seconds)
+            if fig is not None and recorder.enabled:
+                recorder.record("figure", chart=section.key, bytes=chart_payload[section.key])
+    status.empty()
 
 
-# ----------------------------------------
-# SCATTER PLOT — AGE vs PURCHASE AMOUNT
-st.subheader("Scatter Plot: Age vs Purchase Amount")
-st.markdown("This scatter plot visualizes the relationship between customer age and how much they spend.")
-
-if all(c in filtered.columns for c in ["Age", "Purchase Amount (USD)"]):
-    fig_scatter = px.scatter(
-        filtered,
-        x="Age",
-        y="Purchase Amount (USD)",
-        color="Gender",
-        title="Age vs Purchase Amount",
-        hover_data=["Category", "Season"]
-    )
-    st.plotly_chart(fig_scatter, use_container_width=True)
+st.header("Shopping Insights Overview")  # Görselleştirmelerin ana başlığı
 
+for section in SECTIONS:
+    chart_section(section, chart_context)
 
 
 # ----------------------------------------
-# HEATMAP — CORRELATION MATRIX
-st.subheader("6. Heatmap: Location vs Category")
-
-if len(filtered) > 0:
-    # 1. Pivot the Data
-    # We use state abbreviations to keep the axis cleaner
-    loc_col = 'Location_Abbr' if 'Location_Abbr' in filtered.columns else 'Location'
-
-    heatmap_data = filtered.pivot_table(
-        index=loc_col,
-        columns='Category',
-        values='Purchase Amount (USD)',
-        aggfunc='mean'
-    ).fillna(0)
-
-    # 2. Sorting - Makes the chart more readable
-    # Sort rows (States) by average spending (Ascending sort works best for the Y-axis visual)
-    heatmap_data['Total_Mean'] = heatmap_data.mean(axis=1)
-    heatmap_data = heatmap_data.sort_values('Total_Mean', ascending=True).drop(columns='Total_Mean')
-
-    # 3. Visualization
-    fig_heatmap = px.imshow(
-        heatmap_data,
-        title="Average Purchase Amount ($) - State vs Category",
-        labels=dict(x="Category", y="State (Abbr)", color="Avg Amount"),
-        color_continuous_scale='YlGnBu',  # A fresher color palette (Yellow-Green-Blue)
-        text_auto=".0f",  # Display values inside cells (no decimals)
-        aspect="auto"
+# DATA PREVIEW & DOWNLOAD
+# Section for previewing filtered data and downloading it as CSV, gzip CSV or Parquet.
+# Also a fragment: changing the download format does not touch the charts.
+
+@st.fragment
+def data_section(ctx):
+    st.markdown("---")                                   # Bölüm ayırıcı çizgi 
+    st.subheader("Filtered Data Preview & Download")     # Alt baslık
+
+    st.markdown(                                         # Kullanıcı bilgilendirmesi  
+        "View a snapshot of the filtered dataset below. You can also download the \
+        filtered data as CSV, gzip CSV or Parquet for further analysis or reporting."
     )
-
-    # 4. Fine-tuning Layout
-    fig_heatmap.update_layout(
-        height=800,  # Increased height to prevent state labels from overlapping
-        xaxis_title=None,  # Avoid unnecessary label clutter
-        yaxis_title=None,
-        xaxis=dict(side="top")  # Move categories to the top for better readability
+    st.dataframe(ctx.preview(20))                        # Seçimin ilk 20 satırını tablo olarak göster
+
+    # The file is only built when the button is clicked (Streamlit calls the
+    # function on a separate thread) and is written in chunks (export.py).
+    export_format = st.selectbox(
+        "Download format",
+        options=available_formats(),
+        help="Gzip CSV and Parquet files are much smaller for large selections."
     )
 
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-else:
-    st.warning("No data available to display with these filters.")
+    def build_export(fmt=export_format):                 # Tıklanınca çalışır
+        return ctx.export(fmt)
 
+    st.download_button(
+        label=f"Download Filtered Data ({export_format})",
+        data=build_export,
+        file_name=export_file_name("filtered_shopping_behavior", export_format),
+        mime=export_mime(export_format)
+    )
 
-# ----------------------------------------
-# PARALLEL COORDINATES
-st.subheader("Advanced Multi-Dimensional Analysis")
-st.markdown("""
-**This chart reveals complex relationships within the dataset.** By following the lines from left to right, you can visualize a complete customer journey: 
-starting from their gender, moving through the season, product category, purchase amount, 
-and finally their chosen payment method.
-""")
-
-# 1. Data Preparation: Encoding categorical data into numbers
-# This process allows text values like "Winter" or "Credit Card" to appear on the axes.
-
-plot_df = filtered.copy()
-
-# Define categorical columns and their display labels
-cat_features = {
-    "Gender": "Gender",
-    "Season": "Season",
-    "Category": "Category",
-    "Payment Method": "Payment Method",
-    "Review Rating": "Rating (1-5)"
-}
+data_section(chart_context)
 
-# Numerical columns
-num_features = ["Age", "Purchase Amount (USD)"]
-
-# Create a list of dimensions (axes) for the plot
-dimensions = []
-
-# -- Gender Axis --
-if "Gender" in plot_df.columns:
-    # Convert categories to codes (e.g., Female=0, Male=1)
-    plot_df["Gender_Code"] = plot_df["Gender"].astype("category").cat.codes
-    # Get the actual names for the axis ticks
-    g_names = plot_df["Gender"].astype("category").cat.categories
-
-    dimensions.append(dict(
-        range=[0, len(g_names) - 1],
-        tickvals=list(range(len(g_names))),
-        ticktext=list(g_names),
-        label="Gender",
-        values=plot_df["Gender_Code"]
-    ))
-
-# -- Age Axis (Numerical) --
-if "Age" in plot_df.columns:
-    dimensions.append(dict(
-        range=[plot_df["Age"].min(), plot_df["Age"].max()],
-        label="Age",
-        values=plot_df["Age"]
-    ))
-
-# -- Season Axis --
-if "Season" in plot_df.columns:
-    plot_df["Season_Code"] = plot_df["Season"].astype("category").cat.codes
-    s_names = plot_df["Season"].astype("category").cat.categories
-
-    dimensions.append(dict(
-        range=[0, len(s_names) - 1],
-        tickvals=list(range(len(s_names))),
-        ticktext=list(s_names),
-        label="Season",
-        values=plot_df["Season_Code"]
-    ))
-
-# -- Category Axis --
-if "Category" in plot_df.columns:
-    plot_df["Cat_Code"] = plot_df["Category"].astype("category").cat.codes
-    c_names = plot_df["Category"].astype("category").cat.categories
-
-    dimensions.append(dict(
-        range=[0, len(c_names) - 1],
-        tickvals=list(range(len(c_names))),
-        ticktext=list(c_names),
-        label="Category",
-        values=plot_df["Cat_Code"]
-    ))
-
-# -- Purchase Amount Axis (Numerical - Main Focus) --
-if "Purchase Amount (USD)" in plot_df.columns:
-    dimensions.append(dict(
-        range=[plot_df["Purchase Amount (USD)"].min(), plot_df["Purchase Amount (USD)"].max()],
-        label="Spend ($)",
-        values=plot_df["Purchase Amount (USD)"]
-    ))
-
-# -- Payment Method Axis --
-if "Payment Method" in plot_df.columns:
-    plot_df["Pay_Code"] = plot_df["Payment Method"].astype("category").cat.codes
-    p_names = plot_df["Payment Method"].astype("category").cat.categories
-
-    dimensions.append(dict(
-        range=[0, len(p_names) - 1],
-        tickvals=list(range(len(p_names))),
-        ticktext=list(p_names),
-        label="Payment",
-        values=plot_df["Pay_Code"]
-    ))
-
-# -- Review Rating Axis --
-if "Review Rating" in plot_df.columns:
-    dimensions.append(dict(
-        range=[1, 5],
-        label="Rating",
-        values=plot_df["Review Rating"]
-    ))
-
-# 2. Generating the Chart (Using Go.Parcoords)
-if len(plot_df) > 0:
-    fig_complex = go.Figure(data=
-    go.Parcoords(
-        line=dict(
-            color=plot_df["Purchase Amount (USD)"],  # Color lines based on spending
-            colorscale="Turbo",  # Vibrant, high-contrast color scale
-            showscale=True,
-            cmin=plot_df["Purchase Amount (USD)"].min(),
-            cmax=plot_df["Purchase Amount (USD)"].max()
-        ),
-        dimensions=dimensions  # The list of axes we prepared above
-    )
-    )
+refine_sections(pending_sections)
+page_pass = False
 
-    fig_complex.update_layout(
-        title="Complex Analysis: Customer Journey Flow",
-        height=600,  # Increase height for better visibility
-        font=dict(size=11)  # Adjust font size for readability
+cache_stats = figure_cache.stats()
+st.sidebar.caption(
+    f"Figure cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+    f"{cache_stats['entries']} figures ({cache_stats['bytes'] / 1e6:.1f} MB)"
+)
+if chart_payload:
+    largest = max(chart_payload, key=chart_payload.get)
+    budget = f"; budget {FIGURE_BUDGET_KB:,} KB per chart" if FIGURE_BUDGET_KB else ""
+    st.sidebar.caption(
+        f"Chart payload: {sum(chart_payload.values()) / 1024:,.0f} KB for {len(chart_payload)} charts "
+        f"(largest: {largest}, {chart_payload[largest] / 1024:,.0f} KB{budget})"
     )
 
-    st.plotly_chart(fig_complex, use_container_width=True)
-else:
-    st.warning("Not enough data available to generate this chart.")
-
 
 # ----------------------------------------
-# DATA PREVIEW & CSV DOWNLOAD
-# Section for previewing filtered data and downloading it as CSV.
-
-st.markdown("---")                                   # Bölüm ayırıcı çizgi 
-st.subheader("Filtered Data Preview & Download")     # Alt baslık
-
-st.markdown(                                         # Kullanıcı bilgilendirmesi  
-    "View a snapshot of the filtered dataset below. You can also download the \
-    filtered data as a CSV file for further analysis or reporting."
-)
-st.dataframe(filtered.head(20))                      # Datasetin ilk 20 satırını tablo olarak göster
+# SESSION MEMORY
+# The dataset, its indexes and the caches above are held once per server
+# process; a session only adds what it keeps between runs: its
+# session_state and the chart contexts its section fragments hold on to
+# (row positions, aggregate frames, sketch selections). That is measured at
+# the end of every run, without anything reachable from the shared
+# resources, and reported to a server-wide registry. The admin view
+# (?admin=1 or DASHBOARD_ADMIN=1) lists it per session for sizing pods.
+
+@st.cache_resource(show_spinner=False)
+def get_session_registry():
+    return SessionRegistry()
+
+session_registry = get_session_registry()
+shared_resources = [
+    ("Prepared dataset", df),
+    ("Filter engine", filter_engine if backend is None else None),
+    ("Aggregation engine", agg_engine if backend is None else None),
+    ("Query backend", backend),
+    ("Progressive sample", progressive_sample),
+]
+with recorder.timer("session_memory") as timing:
+    shared_ids = reachable([obj for _, obj in shared_resources] + [figure_cache, get_upload_cache()])
+    session_parts = {
+        "Chart context": deep_size(chart_context, shared_ids),
+        "Sample context": deep_size(sample_context, shared_ids) if sample_context is not None else 0,
+        "Session state": deep_size(st.session_state.to_dict(), shared_ids),
+    }
+    timing["bytes"] = sum(session_parts.values())
+session_registry.update(st.session_state["session_id"], session_parts, rows=chart_context.count)
+
+if admin_enabled(st.query_params.get("admin")):
+    with st.sidebar.expander("🧮 Memory (admin)", expanded=True):
+        shared = shared_sizes(shared_resources) + [
+            ("Figure cache", figure_cache.stats()["bytes"]),
+            ("Upload cache", get_upload_cache().stats()["bytes"]),
+        ]
+        st.dataframe(pd.DataFrame({"Shared": [name for name, _ in shared],
+                                   "MB": [round(size / 2**20, 2) for _, size in shared]}),
+                     hide_index=True)
+        sessions = session_registry.sessions()
+        st.dataframe(
+            pd.DataFrame([
+                {"Session": session_id + (" (this)" if session_id == st.session_state["session_id"] else ""),
+                 "Idle s": round(usage["idle"]),
+                 "Rows": usage["rows"],
+                 **{name: round(size / 1024, 1) for name, size in usage["parts"].items()},
+                 "Total KB": round(usage["bytes"] / 1024, 1)}
+                for session_id, usage in sorted(sessions.items(), key=lambda item: -item[1]["bytes"])
+            ]),
+            hide_index=True,
+        )
+        shared_mb = sum(size for _, size in shared) / 2**20
+        largest_mb = max(usage["bytes"] for usage in sessions.values()) / 2**20
+        st.caption(
+            f"{len(sessions)} active session(s) hold {sum(u['bytes'] for u in sessions.values()) / 2**20:,.2f} MB "
+            f"on top of {shared_mb:,.1f} MB shared. Sizing: {shared_mb:,.1f} MB + sessions x {largest_mb:,.2f} MB "
+            f"(largest session), plus the interpreter and Streamlit."
+        )
 
-def df_to_csv_bytes(df_):
-    return df_.to_csv(index=False).encode("utf-8") 
 
-csv_data = df_to_csv_bytes(filtered)                # İndirilebilir formata getir
- 
-st.download_button(
-    label="Download Filtered Data (CSV)",    
-    data=csv_data,                         
-    file_name="filtered_shopping_behavior.csv",  
-    mime="text/csv"                            
-)
\ No newline at end of file
+# ----------------------------------------
+# PERFORMANCE PANEL (debug mode only)
+# Drawn last so that it includes every section of this run. Reruns of a
+# single section only reach the JSON-lines log.
+
+def debug_rows(entries):
+    rows = []
+    for e in entries:
+        rows.append({
+            "Stage": e["stage"],
+            "Detail": e.get("chart") or e.get("filter") or e.get("source") or "",
+            "ms": round(e["seconds"] * 1000, 1) if "seconds" in e else None,
+            "Rows in": e.get("rows_in"),
+            "Rows out": e.get("rows_out"),
+            "Bytes": e.get("bytes"),
+            "Cached": e.get("cached"),
+        })
+    return pd.DataFrame(rows)
+
+if recorder.enabled:
+    with st.sidebar.expander("🛠 Performance (debug)", expanded=True):
+        if not recorder.find("load_data"):
+            st.caption("load_data / clean: served from the dataset cache")
+        st.dataframe(debug_rows(recorder.entries), hide_index=True)
+        sections_ms = sum(e["seconds"] for e in recorder.find("section")) * 1000
+        payload = sum(e["bytes"] for e in recorder.find("figure"))
+        st.caption(
+            f"Sections: {sections_ms:,.0f} ms, figures: {payload / 1e6:.2f} MB. "
+            f"Log: {recorder.log_path}"
+        )
+        if df is not None:                           # Sütun başına bellek (kompakt tipler)
+            memory = column_memory(df)
+            st.dataframe(
+                pd.DataFrame({"Column": memory.index, "Dtype": df.dtypes.astype(str).values,
+                              "KB": (memory.values / 1024).round(1)}),
+                hide_index=True,
+            )
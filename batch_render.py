@@ -0,0 +1,186 @@
+# ----------------------------------------
+# Headless batch renderer and figure cache pre-warmer.
+# Builds every dashboard section for a grid of filter states with the app's
+# own pipeline (pipeline.py, sections.py; no Streamlit), on a process pool,
+# and writes each figure into the persistent figure store the app reads
+# (figure_store.py, DASHBOARD_FIGURE_STORE) and optionally as Plotly JSON or
+# HTML files. Meant to run after each data refresh:
+#
+#   python batch_render.py Shopping_behavior.csv --store figure_store
+#   python batch_render.py data.parquet --grid season,category,gender --out renders --format html
+#
+# The grid takes every season (plus "All Seasons") and every subset of the
+# categories / genders of the chosen dimensions; the other filters keep
+# their sidebar defaults. Figures are keyed like the app's (fingerprint of
+# the resolved data file, section, filter inputs, default widget options),
+# so the app finds them for the same selections. Applies to single-file
+# datasets on the pandas backend.
+#
+# Store entries are built with the Plotly template the app builds with
+# (Streamlit's theme, whose placeholder colors only the Streamlit frontend
+# resolves); files for --out are built with Plotly's own template.
+
+import argparse
+import itertools
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly.io as pio
+
+from data_loader import file_fingerprint, resolve_data_path
+from filter_engine import FilterState
+from figure_store import FigureStore
+from pipeline import (
+    aggregate,
+    build_aggregation_engine,
+    build_filter_engine,
+    filter_options,
+    load_prepared,
+)
+from sections import SECTIONS, ChartContext, default_options
+
+
+GRID_DIMENSIONS = ("season", "category", "gender")
+OUTPUT_FORMATS = ("json", "html")
+APP_TEMPLATE = "streamlit"             # Streamlit içe aktarılınca kaydedilen varsayılan şablon
+FILE_TEMPLATE = "plotly"
+
+
+def subsets(values):
+    return [combo for size in range(len(values) + 1) for combo in itertools.combinations(values, size)]
+
+# Filter states of the grid, without duplicates, in a stable order
+def filter_grid(options, dimensions=("season", "category")):
+    seasons = ["All Seasons"] + list(options["seasons"]) if "season" in dimensions else ["All Seasons"]
+    categories = subsets(options["categories"]) if "category" in dimensions else [tuple(options["categories"])]
+    genders = subsets(options["genders"]) if "gender" in dimensions else [tuple(options["genders"])]
+    states = (
+        FilterState.from_sidebar(season, list(cats), options["age"], list(gens), options["price"])
+        for season, cats, gens in itertools.product(seasons, categories, genders)
+    )
+    return list(dict.fromkeys(states))
+
+# Directory name of a state in --out: season-Winter__categories-all__genders-Female+Male
+def state_slug(state):
+    parts = []
+    for name in ("season", "categories", "genders"):
+        values = getattr(state, name)
+        text = "all" if values is None else "+".join(values) or "none"
+        parts.append(f"{name}-{text}")
+    return re.sub(r"[^\w+.=-]+", "_", "__".join(parts))
+
+
+# ----------------------------------------
+# Worker side. Every process loads, cleans and indexes the dataset once.
+
+_worker = {}
+
+def _init_worker(path, fingerprint, store_dir, out_dir, fmt):
+    if store_dir:
+        import streamlit  # noqa: F401  (yalnızca Plotly temasını kaydeder)
+    df = load_prepared(path)
+    if df is None:
+        raise RuntimeError(f"Could not read {path}")
+    filter_engine = build_filter_engine(df)
+    _worker.update(
+        df=df,
+        filter_engine=filter_engine,
+        engine=build_aggregation_engine(df, filter_engine),
+        fingerprint=fingerprint,
+        options=default_options(df.columns),
+        store=FigureStore(store_dir) if store_dir else None,
+        out_dir=out_dir,
+        fmt=fmt,
+    )
+
+def render_state(state):
+    w = _worker
+    start = time.perf_counter()
+    selection = w["filter_engine"].select(state)
+    ctx = ChartContext(w["df"], selection, state, w["engine"],
+                       aggregate(w["engine"], state, selection), take=w["filter_engine"].take)
+    sections = [s for s in SECTIONS if s.available(ctx.columns)]
+
+    if w["store"] is not None:
+        for section, options, value in _build_all(ctx, sections, w["options"], APP_TEMPLATE):
+            w["store"].put(section.dependency_key(w["fingerprint"], state, options), value)
+    if w["out_dir"]:
+        directory = os.path.join(w["out_dir"], state_slug(state))
+        os.makedirs(directory, exist_ok=True)
+        for section, _, (figure, _) in _build_all(ctx, sections, w["options"], FILE_TEMPLATE):
+            if figure is None:
+                continue
+            path = os.path.join(directory, f"{section.key}.{w['fmt']}")
+            if w["fmt"] == "html":
+                figure.write_html(path, include_plotlyjs="cdn")
+            else:
+                figure.write_json(path)
+    return state_slug(state), len(selection), len(sections), time.perf_counter() - start
+
+def _build_all(ctx, sections, options, template):
+    pio.templates.default = template
+    for section in sections:
+        section_options = options.get(section.key, {})
+        yield section, section_options, section.render(ctx, section_options)
+
+
+# ----------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-build dashboard figures for a grid of filter states.")
+    parser.add_argument("data", help="dataset file (a newer Parquet / Arrow copy next to a CSV is preferred, as in the app)")
+    parser.add_argument("--grid", default="season,category",
+                        help=f"comma-separated filter dimensions to expand ({', '.join(GRID_DIMENSIONS)})")
+    parser.add_argument("--store", default=os.environ.get("DASHBOARD_FIGURE_STORE"),
+                        help="figure store directory read by the app (default: DASHBOARD_FIGURE_STORE)")
+    parser.add_argument("--out", default=None, help="also write every figure to this directory")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json", help="file format for --out")
+    parser.add_argument("--workers", type=int, default=0, help="processes (default: one per core)")
+    parser.add_argument("--clear", action="store_true", help="empty the figure store first")
+    args = parser.parse_args(argv)
+
+    dimensions = [d.strip() for d in args.grid.split(",") if d.strip()]
+    unknown = [d for d in dimensions if d not in GRID_DIMENSIONS]
+    if unknown:
+        parser.error(f"unknown grid dimension(s): {', '.join(unknown)}")
+    if not args.store and not args.out:
+        parser.error("nothing to write: give --store (or DASHBOARD_FIGURE_STORE) and/or --out")
+
+    path = resolve_data_path(args.data)
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        parser.error(f"dataset not found: {args.data}")
+    if args.store and args.clear:
+        print(f"Removed {FigureStore(args.store).clear()} stored figures")
+
+    df = load_prepared(path)
+    if df is None:
+        parser.exit(1, f"Could not read {path}\n")
+    states = filter_grid(filter_options(df), dimensions)
+    del df
+    workers = min(args.workers or os.cpu_count() or 1, len(states))
+    print(f"Rendering {len(states)} filter states of {path} on {workers} process(es)")
+
+    start = time.perf_counter()
+    init_args = (path, fingerprint, args.store, args.out, args.format)
+    if workers == 1:
+        _init_worker(*init_args)
+        results = map(render_state, states)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args)
+        results = pool.map(render_state, states, chunksize=max(1, len(states) // (workers * 4)))
+    try:
+        figures = 0
+        for i, (slug, rows, written, seconds) in enumerate(results, 1):
+            figures += written
+            print(f"[{i}/{len(states)}] {slug}: {rows:,} rows, {written} figures in {seconds:.2f}s")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(f"Wrote {figures} figures in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# ----------------------------------------
+# Benchmark suite for the dashboard pipeline (pipeline.py), run headless on
+# synthetic datasets with the Shopping_behavior.csv schema.
+#
+# For each dataset size it times
+#
+#   load, clean                       once
+#   filter_index, cube                once (per-dataset structures)
+#   filter, aggregate, figure/<chart> for every scenario in SCENARIOS
+#
+# and records the peak traced memory of each stage (tracemalloc) and the
+# serialized JSON size of every figure. Results can be written to a file and
+# compared against a stored baseline; the exit code is 1 when a stage got
+# slower than the tolerance allows or a figure payload grew.
+#
+#   python -m benchmarks.run --sizes 4k,100k --baseline benchmarks/baseline.json
+#   python -m benchmarks.run --output benchmarks/baseline.json   # new baseline
+
+import argparse
+import dataclasses
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import dataset_path, parse_size
+from data_loader import clean_data, load_data
+from figure_cache import figure_size
+from pipeline import (
+    aggregate,
+    build_aggregation_engine,
+    build_filter_engine,
+    default_filter_state,
+    filter_options,
+)
+from sections import SECTIONS, ChartContext
+
+
+DEFAULT_SIZES = "4k,100k,1M,10M"
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+TIME_TOLERANCE = 1.25              # %25'ten fazla yavaşlama gerileme sayılır
+BYTES_TOLERANCE = 1.05             # Figür boyutu %5'ten fazla büyürse gerileme
+MIN_SECONDS = 0.025                # Bundan küçük farklar ölçüm gürültüsü sayılır
+
+
+# Filter states measured for every dataset (the default view plus a few
+# typical saved views)
+SCENARIOS = {
+    "all": lambda state: state,
+    "winter": lambda state: dataclasses.replace(state, season=("Winter",)),
+    "narrow_age": lambda state: dataclasses.replace(state, age_range=(25, 30)),
+    "two_categories": lambda state: dataclasses.replace(
+        state, categories=("Clothing", "Footwear"), price_range=(40, 80)
+    ),
+}
+
+
+# ----------------------------------------
+# Times fn (best of `repeat` runs), then runs it once more under
+# tracemalloc for the peak memory, so tracing never inflates the times.
+# setup() returns fresh arguments for every run (e.g. a new raw frame for
+# clean_data, which modifies its input). Returns (result, stats).
+
+def measure(fn, repeat=1, memory=True, setup=tuple):
+    result, best = None, None
+    for i in range(max(repeat, 1)):
+        args = setup()
+        gc.collect()
+        start = time.perf_counter()
+        value = fn(*args)
+        seconds = time.perf_counter() - start
+        if i == 0:
+            result = value
+        best = seconds if best is None else min(best, seconds)
+        del value
+    stats = {"seconds": best}
+    if memory:
+        args = setup()
+        gc.collect()
+        tracemalloc.start()
+        fn(*args)
+        stats["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result, stats
+
+
+def run_size(size, data_dir, ext=".csv", repeat=3, memory=True, log=print):
+    path = dataset_path(size, data_dir, ext)
+    stages = {}
+
+    raw, stages["load"] = measure(lambda: load_data(path), memory=memory)
+    if raw is None:
+        raise RuntimeError(f"Could not load {path}")
+    del raw
+    df, stages["clean"] = measure(clean_data, memory=memory, setup=lambda: (load_data(path),))
+
+    filter_engine, stages["filter_index"] = measure(lambda: build_filter_engine(df), memory=memory)
+    engine, stages["cube"] = measure(lambda: build_aggregation_engine(df, filter_engine), memory=memory)
+
+    base_state = default_filter_state(filter_options(df))
+    for scenario, make_state in SCENARIOS.items():
+        state = make_state(base_state)
+        selection, stages[f"filter/{scenario}"] = measure(lambda: filter_engine.select(state), repeat, memory)
+        stages[f"filter/{scenario}"]["rows"] = int(len(selection))
+        aggregates, stages[f"aggregate/{scenario}"] = measure(
+            lambda: aggregate(engine, state, selection), repeat, memory
+        )
+        for section in SECTIONS:
+            if not section.available(df.columns):
+                continue
+            def build(section=section, state=state, selection=selection, aggregates=aggregates):
+                ctx = ChartContext(df, selection, state, engine, aggregates, take=filter_engine.take)
+                return section.render(ctx)
+            (fig, _), stats = measure(build, repeat, memory)
+            stats["json_bytes"] = figure_size(fig)
+            stages[f"figure/{scenario}/{section.key}"] = stats
+        log(f"  {size}: {scenario} done")
+
+    return {"rows": int(len(df)), "memory_mb": df.memory_usage(deep=True).sum() / 2**20, "stages": stages}
+
+
+# ----------------------------------------
+# Comparison against a baseline file. Returns (report lines, regressions).
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, bytes_tolerance=BYTES_TOLERANCE,
+            min_seconds=MIN_SECONDS):
+    lines, regressions = [], []
+    header = f"{'size':>5}  {'stage':<32} {'seconds':>9} {'baseline':>9} {'ratio':>6}  {'peak MB':>8}  {'JSON KB':>8}"
+    lines.append(header)
+    for size, result in results["sizes"].items():
+        base_stages = baseline.get("sizes", {}).get(size, {}).get("stages", {})
+        for stage, stats in result["stages"].items():
+            base = base_stages.get(stage)
+            flags = []
+            ratio_text, base_text = "", ""
+            if base is not None:
+                base_text = f"{base['seconds']:9.4f}"
+                ratio = stats["seconds"] / base["seconds"] if base["seconds"] > 0 else float("inf")
+                ratio_text = f"{ratio:6.2f}"
+                if ratio > time_tolerance and stats["seconds"] - base["seconds"] > min_seconds:
+                    flags.append("SLOWER")
+                if base.get("json_bytes") and stats.get("json_bytes", 0) > base["json_bytes"] * bytes_tolerance:
+                    flags.append("LARGER")
+            peak = f"{stats['peak_mb']:8.1f}" if "peak_mb" in stats else ""
+            kb = f"{stats['json_bytes'] / 1024:8.1f}" if "json_bytes" in stats else ""
+            lines.append(
+                f"{size:>5}  {stage:<32} {stats['seconds']:9.4f} {base_text:>9} {ratio_text:>6}  {peak:>8}  {kb:>8}"
+                + ("  " + ",".join(flags) if flags else "")
+            )
+            if flags:
+                regressions.append((size, stage, flags))
+    return lines, regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipeline on synthetic data.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet", "feather"],
+                        help="on-disk format of the synthetic datasets")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where generated datasets are kept")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per per-scenario stage (best time kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (faster, no peak memory)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help=f"allowed slowdown ratio before a stage is flagged (default {TIME_TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    for size in sizes:
+        parse_size(size)                   # Hatalı boyutu veri üretmeden önce yakala
+
+    results = {"environment": environment(), "format": args.format, "sizes": {}}
+    for size in sizes:
+        print(f"Running {size} rows...", file=sys.stderr)
+        results["sizes"][size] = run_size(
+            size, args.data_dir, "." + args.format, args.repeat, not args.no_memory,
+            log=lambda msg: print(msg, file=sys.stderr)
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    lines, regressions = compare(results, baseline, time_tolerance=args.tolerance)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+# ----------------------------------------
+# Synthetic datasets with the exact Shopping_behavior.csv schema.
+# Same columns, order and value domains as the original 3,900-row file:
+# items are drawn uniformly and carry their own category (so Clothing stays
+# the largest category), states are the 50 US states, ages 18-70, purchase
+# amounts 20-100 USD, ratings 2.5-5.0. Rows are generated and written in
+# chunks, so even 10M rows never need the whole frame in memory.
+#
+#   python -m benchmarks.synthetic 1M benchmarks/data/shopping_1M.csv
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import STATE_NAME_TO_ABBR
+
+
+COLUMNS = [
+    "Customer ID", "Age", "Gender", "Item Purchased", "Category", "Purchase Amount (USD)",
+    "Location", "Size", "Color", "Season", "Review Rating", "Subscription Status",
+    "Shipping Type", "Discount Applied", "Promo Code Used", "Previous Purchases",
+    "Payment Method", "Frequency of Purchases"
+]
+
+ITEMS_BY_CATEGORY = {
+    "Accessories": ["Backpack", "Belt", "Gloves", "Handbag", "Hat", "Jewelry", "Scarf", "Sunglasses"],
+    "Clothing": ["Blouse", "Dress", "Hoodie", "Jeans", "Pants", "Shirt", "Shorts", "Skirt", "Socks",
+                 "Sweater", "T-shirt"],
+    "Footwear": ["Boots", "Sandals", "Shoes", "Sneakers"],
+    "Outerwear": ["Coat", "Jacket"],
+}
+
+COLORS = [
+    "Beige", "Black", "Blue", "Brown", "Charcoal", "Cyan", "Gold", "Gray", "Green", "Indigo",
+    "Lavender", "Magenta", "Maroon", "Olive", "Orange", "Peach", "Pink", "Purple", "Red", "Silver",
+    "Teal", "Turquoise", "Violet", "White", "Yellow"
+]
+
+STATES = [s for s in STATE_NAME_TO_ABBR if s != "District of Columbia"]
+
+CHOICES = {                              # Sütun -> (değerler, olasılıklar veya None = eşit)
+    "Gender": (["Male", "Female"], [0.68, 0.32]),
+    "Size": (["S", "M", "L", "XL"], [0.17, 0.45, 0.27, 0.11]),
+    "Season": (["Fall", "Spring", "Summer", "Winter"], None),
+    "Subscription Status": (["Yes", "No"], [0.27, 0.73]),
+    "Shipping Type": (["2-Day Shipping", "Express", "Free Shipping", "Next Day Air", "Standard",
+                       "Store Pickup"], None),
+    "Discount Applied": (["Yes", "No"], [0.43, 0.57]),
+    "Promo Code Used": (["Yes", "No"], [0.43, 0.57]),
+    "Payment Method": (["Bank Transfer", "Cash", "Credit Card", "Debit Card", "PayPal", "Venmo"], None),
+    "Frequency of Purchases": (["Annually", "Bi-Weekly", "Every 3 Months", "Fortnightly", "Monthly",
+                                "Quarterly", "Weekly"], None),
+}
+
+SIZES = {"4k": 4_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+CHUNK_ROWS = 500_000
+
+
+def parse_size(text):
+    text = str(text).strip()
+    if text in SIZES:
+        return SIZES[text]
+    suffix = text[-1:].lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(suffix)
+    return int(float(text[:-1]) * scale) if scale else int(text)
+
+
+def _pick(rng, values, p, n):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n, p=p)]
+
+
+# Rows first_id .. first_id + n - 1 of a synthetic dataset
+def generate(n, seed=0, first_id=1):
+    rng = np.random.default_rng(seed)
+    items = [(item, category) for category, names in ITEMS_BY_CATEGORY.items() for item in names]
+    item_index = rng.integers(0, len(items), size=n)
+
+    data = {
+        "Customer ID": np.arange(first_id, first_id + n, dtype=np.int64),
+        "Age": rng.integers(18, 71, size=n),
+        "Item Purchased": np.asarray([i for i, _ in items], dtype=object)[item_index],
+        "Category": np.asarray([c for _, c in items], dtype=object)[item_index],
+        "Purchase Amount (USD)": rng.integers(20, 101, size=n),
+        "Location": _pick(rng, STATES, None, n),
+        "Color": _pick(rng, COLORS, None, n),
+        "Review Rating": rng.integers(25, 51, size=n) / 10,
+        "Previous Purchases": rng.integers(1, 51, size=n),
+    }
+    for col, (values, p) in CHOICES.items():
+        data[col] = _pick(rng, values, p, n)
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+# Writes n rows as CSV (or Parquet / Arrow when pyarrow is installed),
+# chunk by chunk. Returns the path.
+def write_dataset(n, path, seed=0, chunk_rows=CHUNK_ROWS):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ext = os.path.splitext(path)[1].lower()
+    chunks = (
+        generate(min(chunk_rows, n - start), seed=seed + i, first_id=start + 1)
+        for i, start in enumerate(range(0, n, chunk_rows))
+    )
+    if ext == ".csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=(i == 0))
+        return path
+
+    import pyarrow as pa
+    import pyarrow.parquet as pa_parquet
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                if ext in (".parquet", ".pq"):
+                    writer = pa_parquet.ParquetWriter(path, table.schema, compression="zstd")
+                else:
+                    writer = pa.ipc.new_file(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+# Cached dataset of a given size (generated on first use)
+def dataset_path(size, directory, ext=".csv", seed=0):
+    n = parse_size(size)
+    path = os.path.join(directory, f"shopping_{size}{ext}")
+    if not os.path.exists(path):
+        write_dataset(n, path, seed=seed)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Shopping_behavior dataset.")
+    parser.add_argument("size", help="number of rows (e.g. 4k, 100k, 1M, 10M or 250000)")
+    parser.add_argument("dst", help="output file (.csv, .parquet, .feather or .arrow)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    write_dataset(parse_size(args.size), args.dst, seed=args.seed)
+    print(f"Wrote {parse_size(args.size)} rows to {args.dst}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,595 @@
+# ----------------------------------------
+# Figure builders shared by the dashboard.
+# Plain functions from data to Plotly figures (no Streamlit calls), so they
+# can also be used outside the app.
+
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+
+# ----------------------------------------
+# PAYLOAD ENCODING
+# Plotly sends numpy arrays to the browser as base64 typed arrays (dtype +
+# raw bytes) instead of JSON number lists, so the dtype decides the payload
+# size. Integral data (codes, counts, whole ages and amounts) is narrowed to
+# the smallest integer type that holds it before it goes into a trace (the
+# prepared frame's int16 / int32 columns would otherwise be sent as they
+# are), and categorical hover labels are written once per trace instead of
+# once per point (see scatter_figure).
+
+COMPACT_INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+def compact_array(values):
+    values = np.asarray(values)
+    if len(values) == 0 or values.dtype.kind not in "iuf":
+        return values
+    if values.dtype.kind == "f" and not (np.all(np.isfinite(values)) and np.all(values == np.round(values))):
+        return values                     # Kesirli / eksik değer: olduğu gibi
+    lo, hi = values.min(), values.max()
+    for dtype in COMPACT_INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype, copy=False)
+    return values
+
+
+# ----------------------------------------
+# SCATTER PLOT — AGE vs PURCHASE AMOUNT
+# Up to SCATTER_POINTS_LIMIT rows the original chart is drawn (markers with
+# Category / Season hover), up to SCATTER_WEBGL_LIMIT rows the points are
+# forced onto WebGL without the extra hover columns, above that they are
+# binned on the server and drawn as one density heatmap per Gender. Both
+# limits can be overridden with environment variables.
+
+SCATTER_POINTS_LIMIT = int(os.environ.get("DASHBOARD_SCATTER_POINTS_LIMIT", 5_000))
+SCATTER_WEBGL_LIMIT = int(os.environ.get("DASHBOARD_SCATTER_WEBGL_LIMIT", 100_000))
+SCATTER_BINS = (40, 40)                 # Yoğunluk modunda (Age, Amount) kutu sayısı
+SCATTER_MIN_TRACE_POINTS = 16           # Etiket başına iz için ortalama en az bu kadar nokta
+
+SCATTER_MODES = ["Auto", "Points", "WebGL", "Density"]
+SCATTER_COLUMNS = ("Age", "Purchase Amount (USD)", "Gender", "Category", "Season")   # Saçılım grafiğinin okuduğu sütunlar
+
+def scatter_mode_for(n_rows, mode="Auto", points_limit=None, webgl_limit=None):
+    points_limit = SCATTER_POINTS_LIMIT if points_limit is None else points_limit
+    webgl_limit = SCATTER_WEBGL_LIMIT if webgl_limit is None else webgl_limit
+    if mode != "Auto":
+        return mode
+    if n_rows <= points_limit:
+        return "Points"
+    if n_rows <= webgl_limit:
+        return "WebGL"
+    return "Density"
+
+
+# Counts per (group, x bin, y bin) in one vectorized pass. weights lets
+# pre-counted (x, y, group) combinations be binned (query backends).
+# Returns the bin edges and a (groups, x bins, y bins) count array.
+def density_bins(x, y, groups, x_range, y_range, bins=SCATTER_BINS, weights=None):
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    group_codes, group_labels = pd.factorize(groups, sort=True)
+
+    x_edges = np.linspace(x_range[0], x_range[1], bins[0] + 1)
+    y_edges = np.linspace(y_range[0], y_range[1], bins[1] + 1)
+    ix = np.clip(np.searchsorted(x_edges, x, side="right") - 1, 0, bins[0] - 1)
+    iy = np.clip(np.searchsorted(y_edges, y, side="right") - 1, 0, bins[1] - 1)
+
+    inside = (x >= x_range[0]) & (x <= x_range[1]) & (y >= y_range[0]) & (y <= y_range[1]) & (group_codes >= 0)
+    key = (group_codes[inside] * bins[0] + ix[inside]) * bins[1] + iy[inside]
+    if weights is not None:
+        weights = np.asarray(weights, dtype="float64")[inside]
+    counts = np.bincount(key, weights=weights, minlength=len(group_labels) * bins[0] * bins[1])
+    if weights is not None:
+        counts = counts.astype(np.int64)
+    return x_edges, y_edges, list(group_labels), counts.reshape(len(group_labels), bins[0], bins[1])
+
+
+def density_figure(x_edges, y_edges, group_labels, counts, title):
+    fig = make_subplots(
+        rows=1, cols=max(len(group_labels), 1),
+        shared_yaxes=True,
+        subplot_titles=[str(g) for g in group_labels],
+        horizontal_spacing=0.04
+    )
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    for i, group in enumerate(group_labels):
+        z = counts[i].T.astype("float64")
+        z[z == 0] = np.nan               # Boş kutular şeffaf kalsın
+        fig.add_trace(go.Heatmap(
+            x=x_centers,
+            y=y_centers,
+            z=z,
+            coloraxis="coloraxis",
+            name=str(group),
+            hovertemplate="Age: %{x:.0f}<br>Purchase Amount (USD): %{y:.0f}<br>Customers: %{z}<extra>"
+                          + str(group) + "</extra>"
+        ), row=1, col=i + 1)
+        fig.update_xaxes(title_text="Age", row=1, col=i + 1)
+    fig.update_yaxes(title_text="Purchase Amount (USD)", row=1, col=1)
+    fig.update_layout(title=title, coloraxis=dict(colorscale="Viridis", colorbar_title="Customers"))
+    return fig
+
+
+# Markers like px.scatter(color=..., hover_data=...), but with one trace per
+# (color, hover labels) combination: the labels go into the trace's hover
+# template once instead of into customdata once per point. A trace costs
+# a few hundred bytes of JSON, so when the traces would hold fewer than
+# SCATTER_MIN_TRACE_POINTS points on average there is one trace per color
+# and the labels stay per point. Traces of one color share a legend entry.
+# trace=go.Scattergl draws them with WebGL.
+
+def point_traces_figure(data, x_col, y_col, color_col, hover_cols, title, trace=go.Scatter):
+    colors, color_labels = pd.factorize(data[color_col])        # px gibi: ilk görülme sırası
+    hover = [pd.factorize(data[col], sort=True) for col in hover_cols]
+    for split in (hover, []):                                    # İz başına yazılan etiketler
+        shape = [max(len(color_labels), 1)] + [max(len(labels), 1) for _, labels in split]
+        key = np.ravel_multi_index([colors] + [codes for codes, _ in split], shape)
+        order = np.argsort(key, kind="stable")
+        groups, starts = np.unique(key[order], return_index=True)
+        if len(data) >= SCATTER_MIN_TRACE_POINTS * len(groups):
+            break
+    per_point = [] if split is hover else hover
+    custom = (np.column_stack([np.asarray(names, dtype=object)[codes] for codes, names in per_point])
+              if per_point else None)
+    x = compact_array(data[x_col].to_numpy())
+    y = compact_array(data[y_col].to_numpy())
+
+    colorway = pio.templates[pio.templates.default].layout.colorway or px.colors.qualitative.Plotly
+    fig = go.Figure()
+    shown = set()
+    for group, start, stop in zip(groups, starts, list(starts[1:]) + [len(order)]):
+        color, *labels = np.unravel_index(group, shape)
+        name = str(color_labels[color])
+        rows = order[start:stop]
+        hovertemplate = "<br>".join(
+            [f"{color_col}={name}", f"{x_col}=%{{x}}", f"{y_col}=%{{y}}"]
+            + [f"{col}={names[i]}" for col, (_, names), i in zip(hover_cols, split, labels)]
+            + [f"{col}=%{{customdata[{j}]}}" for j, col in enumerate(hover_cols[len(split):])]
+        )
+        fig.add_trace(trace(
+            x=x[rows], y=y[rows],
+            customdata=custom[rows] if custom is not None else None,
+            mode="markers",
+            marker=dict(color=colorway[color % len(colorway)], symbol="circle"),
+            name=name, legendgroup=name, showlegend=name not in shown,
+            hovertemplate=hovertemplate + "<extra></extra>"
+        ))
+        shown.add(name)
+    fig.update_layout(title=title, xaxis_title=x_col, yaxis_title=y_col,
+                      legend=dict(title_text=color_col, tracegroupgap=0))
+    return fig
+
+
+# ----------------------------------------
+# filtered:  filtered rows
+# mode:      "Auto", "Points", "WebGL" or "Density"
+# x_window / y_window: optional (min, max) zoom window on Age / Amount.
+#   Zooming in re-evaluates the mode on the rows inside the window, so a
+#   small enough window drills down from density bins to raw points.
+# Returns (figure, mode used, rows inside the window).
+
+def scatter_figure(filtered, mode="Auto", x_window=None, y_window=None,
+                   points_limit=None, webgl_limit=None, bins=SCATTER_BINS):
+    x_col, y_col = "Age", "Purchase Amount (USD)"
+    data = filtered
+    if x_window is not None or y_window is not None:
+        inside = np.ones(len(filtered), dtype=bool)
+        if x_window is not None:
+            inside &= filtered[x_col].between(*x_window).to_numpy()
+        if y_window is not None:
+            inside &= filtered[y_col].between(*y_window).to_numpy()
+        data = filtered[inside]
+
+    used = scatter_mode_for(len(data), mode, points_limit, webgl_limit)
+    title = "Age vs Purchase Amount"
+
+    if used == "Density":
+        x_range, y_range = x_window, y_window
+        if x_range is None:
+            x_range = (float(data[x_col].min()), float(data[x_col].max())) if len(data) else (0, 1)
+        if y_range is None:
+            y_range = (float(data[y_col].min()), float(data[y_col].max())) if len(data) else (0, 1)
+        fig = density_figure(
+            *density_bins(data[x_col], data[y_col], data["Gender"], x_range, y_range, bins),
+            title=f"{title} (customers per bin)"
+        )
+        return fig, used, len(data)
+
+    if used == "Points":
+        fig = point_traces_figure(data, x_col, y_col, "Gender", ["Category", "Season"], title)
+    else:
+        fig = point_traces_figure(data, x_col, y_col, "Gender", [], title, trace=go.Scattergl)
+    if x_window is not None:
+        fig.update_xaxes(range=list(x_window))
+    if y_window is not None:
+        fig.update_yaxes(range=list(y_window))
+    return fig, used, len(data)
+
+
+# ----------------------------------------
+# PARALLEL COORDINATES
+# One polyline per customer does not scale, so at most a row budget of
+# lines is drawn. The sample is stratified on Gender x Season x Category x
+# Payment Method (every group keeps its share of the lines); each group's
+# lines start with its cheapest and most expensive purchase and the overall
+# extremes are always drawn, so the Purchase Amount range stays visible. Categorical axes use the dataset
+# encodings (integer codes + labels) built once by the aggregation engine.
+
+PARCOORDS_ROW_BUDGET = int(os.environ.get("DASHBOARD_PARCOORDS_ROW_BUDGET", 5_000))
+PARCOORDS_STRATA = ("Gender", "Season", "Category", "Payment Method")
+
+# strata_codes: list of per-row integer code arrays, values: per-row amounts.
+# Returns sorted positions (into those arrays) of `budget` rows (plus the
+# overall min / max when their stratum did not pick them).
+def stratified_sample(strata_codes, values, budget, seed=0):
+    n = len(values)
+    if n <= budget:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)      # Sabit tohum: aynı filtre = aynı örnek
+
+    if strata_codes:
+        cards = [int(c.max()) + 1 for c in strata_codes]
+        strata, _ = pd.factorize(np.ravel_multi_index(strata_codes, cards))
+    else:
+        strata = np.zeros(n, dtype=np.int64)
+    order = np.argsort(strata, kind="stable")
+    sizes = np.bincount(strata)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    # Lines per stratum in proportion to its size (largest remainder)
+    share = budget * sizes / n
+    quota = np.floor(share).astype(int)
+    extra = budget - quota.sum()
+    if extra > 0:
+        quota[np.argsort(quota - share)[:extra]] += 1
+
+    # Inside a stratum the cheapest and the most expensive purchase come
+    # first, the rest of its quota is drawn at random
+    picked = np.zeros(n, dtype=bool)
+    picked[np.argmin(values)] = True
+    picked[np.argmax(values)] = True
+    for s in np.flatnonzero(quota):
+        block = order[starts[s]:starts[s] + sizes[s]]
+        block_values = values[block]
+        ends = [block[np.argmax(block_values)], block[np.argmin(block_values)]][:quota[s]]
+        picked[ends] = True
+        rest = quota[s] - int(picked[block].sum())
+        if rest > 0:
+            candidates = block[~picked[block]]
+            picked[rng.choice(candidates, size=min(rest, len(candidates)), replace=False)] = True
+    return np.flatnonzero(picked)
+
+
+# Axis for a categorical column from its dataset encoding, limited to the
+# categories that actually appear among the drawn lines
+def _category_axis(dimension, codes, label):
+    present = np.flatnonzero(np.bincount(codes, minlength=dimension.cardinality))
+    remap = np.full(dimension.cardinality, -1)
+    remap[present] = np.arange(len(present))
+    names = [str(name) for name in dimension.labels[present]]
+    return dict(
+        range=[0, len(names) - 1],
+        tickvals=list(range(len(names))),
+        ticktext=names,
+        label=label,
+        values=compact_array(remap[codes])
+    )
+
+def _numeric_axis(values, label, value_range):
+    return dict(range=list(value_range), label=label, values=compact_array(values))
+
+
+# df / rows:   prepared dataset and the selected row positions
+# encode:      column name -> Dimension (AggregationEngine.dimension)
+# Returns (figure or None when nothing is selected, lines drawn).
+def parallel_coordinates_figure(df, rows, encode, budget=PARCOORDS_ROW_BUDGET):
+    if len(rows) == 0:
+        return None, 0
+    amount = df["Purchase Amount (USD)"].to_numpy()[rows]
+    strata = [encode(c).codes[rows] for c in PARCOORDS_STRATA if c in df.columns]
+    sample = stratified_sample(strata, amount, budget)
+    picked_rows = rows[sample]
+
+    def numeric(col):
+        values = df[col].to_numpy()[rows]
+        return values[sample], (values.min(), values.max())
+
+    dimensions = []
+    axes = [
+        ("Gender", "Gender", "category"),
+        ("Age", "Age", "numeric"),
+        ("Season", "Season", "category"),
+        ("Category", "Category", "category"),
+        ("Purchase Amount (USD)", "Spend ($)", "numeric"),
+        ("Payment Method", "Payment", "category"),
+    ]
+    for col, label, kind in axes:
+        if col not in df.columns:
+            continue
+        if kind == "category":
+            dimensions.append(_category_axis(encode(col), encode(col).codes[picked_rows], label))
+        else:
+            values, value_range = numeric(col)
+            dimensions.append(_numeric_axis(values, label, value_range))
+    if "Review Rating" in df.columns:
+        dimensions.append(_numeric_axis(df["Review Rating"].to_numpy()[picked_rows], "Rating", (1, 5)))
+
+    fig = go.Figure(data=
+        go.Parcoords(
+            line=dict(
+                color=compact_array(amount[sample]),   # Color lines based on spending
+                colorscale="Turbo",          # Vibrant, high-contrast color scale
+                showscale=True,
+                cmin=amount.min(),
+                cmax=amount.max()
+            ),
+            dimensions=dimensions
+        )
+    )
+    fig.update_layout(
+        title="Complex Analysis: Customer Journey Flow",
+        height=600,                          # Increase height for better visibility
+        font=dict(size=11)                   # Adjust font size for readability
+    )
+    return fig, len(sample)
+
+
+# ----------------------------------------
+# HISTOGRAM — AGE DISTRIBUTION
+# Bin counts and box-plot statistics are computed here, so the figure
+# carries O(bins) numbers instead of every customer's age. Bin widths are
+# "nice" numbers (1, 2, 2.5, 5 x 10^k) close to range / nbins, like Plotly's
+# own autobinning; integer data gets edges on half values.
+
+HISTOGRAM_OUTLIER_CAP = 50             # Kutu grafiğinde her uçta en fazla bu kadar aykırı değer
+
+def nice_bin_width(span, nbins):
+    if span <= 0:
+        return 1.0
+    raw = span / nbins
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for step in (1, 2, 2.5, 5, 10):
+        if step * magnitude >= raw:
+            return float(step * magnitude)
+    return float(10 * magnitude)
+
+def _histogram_edges(lo, hi, integral, nbins):
+    width = nice_bin_width(hi - lo, nbins)
+    if integral:
+        width = max(width, 1.0)
+        start = np.floor(lo / width) * width - 0.5
+    else:
+        start = np.floor(lo / width) * width
+    n_bins = int(np.floor((hi - start) / width)) + 1
+    return start, width, n_bins
+
+# values: one value per row, or (with counts) the distinct values in
+# ascending order and how many rows have each, as a query backend returns
+# them. Both give the same summary. box: optional box-plot statistics from
+# a quantile sketch (sketches.QuantileSketch.box) used instead of sorting
+# the values.
+def histogram_summary(values, nbins=20, outlier_cap=HISTOGRAM_OUTLIER_CAP, counts=None, box=None):
+    values = np.asarray(values, dtype="float64")
+    if counts is not None:
+        return _weighted_histogram_summary(values, np.asarray(counts, dtype=np.int64), nbins, outlier_cap)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+
+    lo, hi = values.min(), values.max()
+    start, width, n_bins = _histogram_edges(lo, hi, bool(np.all(values == np.round(values))), nbins)
+    edges = start + width * np.arange(n_bins + 1)
+    counts = np.bincount(((values - start) // width).astype(np.int64), minlength=n_bins)[:n_bins]
+
+    if box is None:
+        q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        lowerfence, upperfence = inside.min(), inside.max()
+        low_out = np.unique(values[values < lowerfence])[:outlier_cap]
+        high_out = np.unique(values[values > upperfence])[-outlier_cap:] if outlier_cap else np.empty(0)
+        box = dict(
+            q1=q1, median=median, q3=q3,
+            lowerfence=lowerfence, upperfence=upperfence,
+            outliers=np.concatenate([low_out, high_out])
+        )
+
+    return dict(n=len(values), edges=edges, counts=counts, min=lo, max=hi, **box)
+
+
+def _weighted_histogram_summary(values, counts, nbins, outlier_cap):
+    keep = ~np.isnan(values) & (counts > 0)
+    values, counts = values[keep], counts[keep]
+    if len(values) == 0:
+        return None
+
+    lo, hi = values[0], values[-1]
+    start, width, n_bins = _histogram_edges(lo, hi, bool(np.all(values == np.round(values))), nbins)
+    edges = start + width * np.arange(n_bins + 1)
+    bin_counts = np.bincount(((values - start) // width).astype(np.int64), weights=counts,
+                             minlength=n_bins)[:n_bins].astype(np.int64)
+
+    # Linear interpolation between order statistics, as np.quantile does
+    n = int(counts.sum())
+    ends = np.cumsum(counts)
+    def order_stat(i):
+        return values[np.searchsorted(ends, i, side="right")]
+    quartiles = []
+    for q in (0.25, 0.5, 0.75):
+        h = (n - 1) * q
+        below = int(np.floor(h))
+        a, b = order_stat(below), order_stat(min(below + 1, n - 1))
+        quartiles.append(a + (b - a) * (h - below))
+    q1, median, q3 = quartiles
+
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    lowerfence, upperfence = inside.min(), inside.max()
+    low_out = values[values < lowerfence][:outlier_cap]
+    high_out = values[values > upperfence][-outlier_cap:] if outlier_cap else np.empty(0)
+
+    return dict(
+        n=n,
+        edges=edges,
+        counts=bin_counts,
+        q1=q1, median=median, q3=q3,
+        lowerfence=lowerfence, upperfence=upperfence,
+        min=lo, max=hi,
+        outliers=np.concatenate([low_out, high_out])
+    )
+
+
+def histogram_figure(summary, x_label="Age", title="Customer Age Distribution"):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    fig.add_trace(go.Box(
+        q1=[summary["q1"]], median=[summary["median"]], q3=[summary["q3"]],
+        lowerfence=[summary["lowerfence"]], upperfence=[summary["upperfence"]],
+        y=[x_label], orientation="h",
+        name=x_label, showlegend=False, boxpoints=False,
+        marker_color="#636efa"
+    ), row=1, col=1)
+    if len(summary["outliers"]):
+        fig.add_trace(go.Scatter(
+            x=summary["outliers"], y=[x_label] * len(summary["outliers"]),
+            mode="markers", marker=dict(color="#636efa", size=5, symbol="circle-open"),
+            name="Outliers", showlegend=False,
+            hovertemplate=x_label + ": %{x}<extra>outlier</extra>"
+        ), row=1, col=1)
+
+    edges = summary["edges"]
+    fig.add_trace(go.Bar(
+        x=compact_array((edges[:-1] + edges[1:]) / 2),
+        y=compact_array(summary["counts"]),
+        width=compact_array(np.diff(edges)),
+        marker_color="#636efa",
+        name="count", showlegend=False,
+        customdata=np.stack([edges[:-1], edges[1:]], axis=1),
+        hovertemplate=x_label + ": %{customdata[0]:g} – %{customdata[1]:g}<br>count: %{y}<extra></extra>"
+    ), row=2, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_xaxes(title_text=x_label, row=2, col=1)
+    fig.update_yaxes(title_text="count", row=2, col=1)
+    fig.update_layout(title=title, bargap=0)
+    return fig
+
+
+# ----------------------------------------
+# AGGREGATE CHARTS
+# Treemap, Sankey, sunburst, bar, choropleth and heatmap are drawn from the
+# aggregation engine's group frames (columns sum, count, sum_sq, mean), never
+# from raw rows.
+
+def treemap_figure(categories):
+    tdf = categories.rename(columns={"sum": "Purchase Amount (USD)"})
+    return px.treemap(tdf,
+                path=["Category"],
+                values="Purchase Amount (USD)",
+                title="Total Spending by Category"
+                )
+
+
+# flow: FlowGraph (flow_graph.py)
+def sankey_figure(flow):
+    fig = go.Figure(
+      data=[ go.Sankey
+                ( node=dict(
+                        label=flow.labels,
+                        pad=15,
+                        thickness=15
+                    ),
+                link=dict(
+                        source=compact_array(flow.sources),
+                        target=compact_array(flow.targets),
+                        value=compact_array(flow.values)
+                    )
+                )
+            ]
+        )
+    fig.update_layout(
+        title_text=f"Customer Flow: {flow.title}",
+        font_size=10
+        )
+    return fig
+
+
+def sunburst_figure(season_categories):
+    # Node colors are the spend-weighted mean amount (sum of squares / sum),
+    # which is what Plotly computes when it is given the raw rows
+    sun_df = season_categories.assign(weighted=season_categories["sum_sq"] / season_categories["sum"])
+    return px.sunburst(
+        sun_df,
+        path=["Season", "Category"],
+        values="sum",
+        color_continuous_scale="Viridis",
+        color="weighted",
+        title="Sales Distribution by Season and Category",
+        hover_data={"weighted": ":,.2f"},
+        labels={"sum": "Purchase Amount (USD)_sum", "weighted": "Purchase Amount (USD)"}
+    )
+
+
+def item_sales_figure(items):
+    # Sort descending to show top-selling items at the top
+    item_sales = (
+        items
+        .rename(columns={"sum": "Purchase Amount (USD)"})
+        .sort_values("Purchase Amount (USD)", ascending=False)
+    )
+    return px.bar(
+        item_sales,
+        x="Item Purchased",
+        y="Purchase Amount (USD)",
+        color_continuous_scale="Plasma",
+        color="Purchase Amount (USD)",
+        title="Total Sales by Item",
+        hover_data={"Item Purchased": False, "Purchase Amount (USD)": ":,.2f"}
+    )
+
+
+def state_map_figure(states):
+    geo_df = states.rename(columns={"sum": "Purchase Amount (USD)"})
+    return px.choropleth(
+        geo_df,
+        locations="Location_Abbr",          # State abbreviations
+        locationmode="USA-states",
+        color="Purchase Amount (USD)",      # Color by spending
+        color_continuous_scale="Viridis",
+        scope="usa",
+        title="Total Purchase Amount by US State"
+    )
+
+
+def location_category_heatmap(state_categories):
+    # Cell means come from the cube's sum / count per State x Category
+    heatmap_data = state_categories.pivot(
+        index="Location_Abbr",
+        columns="Category",
+        values="mean"
+    ).fillna(0)
+
+    # Sort rows (States) by average spending (Ascending sort works best for the Y-axis visual)
+    heatmap_data["Total_Mean"] = heatmap_data.mean(axis=1)
+    heatmap_data = heatmap_data.sort_values("Total_Mean", ascending=True).drop(columns="Total_Mean")
+
+    fig = px.imshow(
+        heatmap_data,
+        title="Average Purchase Amount ($) - State vs Category",
+        labels=dict(x="Category", y="State (Abbr)", color="Avg Amount"),
+        color_continuous_scale="YlGnBu",  # A fresher color palette (Yellow-Green-Blue)
+        text_auto=".0f",  # Display values inside cells (no decimals)
+        aspect="auto"
+    )
+    fig.update_layout(
+        height=800,  # Increased height to prevent state labels from overlapping
+        xaxis_title=None,  # Avoid unnecessary label clutter
+        yaxis_title=None,
+        xaxis=dict(side="top")  # Move categories to the top for better readability
+    )
+    return fig
@@ -0,0 +1,201 @@
+# ----------------------------------------
+# Pre-aggregated OLAP cube of "Purchase Amount (USD)".
+# Built once per dataset with sum, count and sum of squares measures over
+#
+#   Season x Category x Gender x Age bucket x Price bucket x
+#   Location_Abbr x Item Purchased x Payment Method x Shipping Type
+#
+# Charts are answered by slicing the cube with the sidebar filters and
+# rolling it up to the dimensions they need, so their cost follows the
+# number of cube cells instead of the number of rows.
+#
+# Smaller cuboids (a chart's dimensions, with or without the filter
+# dimensions) are rolled up from the base cube at build time; each query is
+# routed to the smallest cuboid that still contains every dimension it needs.
+#
+# Age and price are bucketed. A bucket is used from the cube only when the
+# slider fully covers it; rows of partially covered buckets are re-checked
+# one by one, so results always match filtering the raw rows.
+
+import copy
+
+import numpy as np
+
+from aggregation import (
+    MEASURE,
+    Dimension,
+    merge_cuboids,
+    row_cuboid,
+    to_frame,
+    union_dims,
+)
+
+
+CUBE_DIMENSIONS = (
+    "Season", "Category", "Gender", "Age", "Purchase Amount (USD)",
+    "Location_Abbr", "Item Purchased", "Payment Method", "Shipping Type"
+)
+
+FILTER_DIMENSIONS = ("Season", "Category", "Gender", "Age", "Purchase Amount (USD)")
+
+# Coarse buckets keep the chart cuboids (with the filter dimensions) small;
+# a slider that cuts through a bucket costs a re-check of its rows only
+BUCKET_WIDTHS = {"Age": 5, "Purchase Amount (USD)": 10}  # Aralık filtresi olan boyutlar (yıl, $)
+
+class AggregateCube:
+
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS, bucket_widths=BUCKET_WIDTHS,
+                 materialize=(), sorted_index=None):
+        sorted_index = sorted_index or {}
+        self.dimensions = {}
+        for name in dimensions:
+            if name not in df.columns:
+                continue
+            self.dimensions[name] = Dimension(
+                name, df[name], bucket_widths.get(name), sorted_index.get(name)
+            )
+        self.dims = tuple(self.dimensions)
+        self.cardinalities = {d: dim.cardinality for d, dim in self.dimensions.items()}
+
+        self.row_values = df[MEASURE].to_numpy(dtype="float64")
+        self.range_values = {
+            d: np.asarray(df[d], dtype="float64") for d, dim in self.dimensions.items()
+            if dim.bucket_width is not None
+        }
+
+        row_codes = {d: dim.codes for d, dim in self.dimensions.items()}
+        rows = row_cuboid(self.dims, row_codes, self.row_values)
+        self.base = rows.rollup(self.dims, self.cardinalities)
+
+        self.cuboids = [self.base]
+        for chart_dims in materialize:
+            self.add_cuboid(chart_dims)
+            self.add_cuboid(tuple(chart_dims) + tuple(d for d in FILTER_DIMENSIONS if d not in chart_dims))
+
+    @property
+    def n_cells(self):
+        return self.base.n_cells
+
+    # The cube of the same rows plus `tail`: the new rows are rolled up on
+    # their own and merged into every cuboid, so existing cells are updated
+    # instead of recounted. sorted_index is the filter engine's, already
+    # covering the new rows. Returns None when a dimension needs a new label
+    # (the cube must then be rebuilt).
+    def appended(self, tail, sorted_index=None):
+        sorted_index = sorted_index or {}
+        new = copy.copy(self)
+        new.dimensions = {}
+        for name, dim in self.dimensions.items():
+            new.dimensions[name] = dim.appended(tail[name], sorted_index.get(name))
+            if new.dimensions[name] is None:
+                return None
+
+        n_old = len(self.row_values)
+        tail_values = tail[MEASURE].to_numpy(dtype="float64")
+        new.row_values = np.concatenate([self.row_values, tail_values])
+        new.range_values = {
+            d: np.concatenate([values, np.asarray(tail[d], dtype="float64")])
+            for d, values in self.range_values.items()
+        }
+
+        tail_codes = {d: dim.codes[n_old:] for d, dim in new.dimensions.items()}
+        tail_cells = row_cuboid(self.dims, tail_codes, tail_values).rollup(self.dims, self.cardinalities)
+        new.cuboids = [
+            merge_cuboids(cuboid, tail_cells.rollup(cuboid.dims, self.cardinalities),
+                          cuboid.dims, self.cardinalities)
+            for cuboid in self.cuboids
+        ]
+        new.base = new.cuboids[0]
+        return new
+
+    def add_cuboid(self, dims):
+        dims = tuple(d for d in self.dims if d in dims)
+        if any(c.dims == dims for c in self.cuboids):
+            return
+        self.cuboids.append(self.base.rollup(dims, self.cardinalities))
+
+    # ----------------------------------------
+    # Answers "dims -> sum / count / mean" under a FilterState.
+
+    def query(self, dims, state):
+        return self.query_many({"result": dims}, state)["result"]
+
+    # Answers several requests with the same filter state. The filter is
+    # resolved once, requests routed to the same cuboid share one rollup
+    # and the rows of partially covered buckets are visited only once.
+    def query_many(self, requests, state):
+        allowed, partial = self._slice(state)
+
+        batches = {}               # cuboid index -> request names
+        for name, dims in requests.items():
+            needed = set(dims) | set(allowed)
+            index = min(
+                (i for i, c in enumerate(self.cuboids) if needed <= set(c.dims)),
+                key=lambda i: self.cuboids[i].n_cells
+            )
+            batches.setdefault(index, []).append(name)
+
+        edge_rows = self._edge_rows(state, partial) if partial else None
+        results = {}
+        for index, names in batches.items():
+            cuboid = self.cuboids[index]
+            dims = union_dims(requests[name] for name in names)
+
+            mask = None
+            for col, table in allowed.items():
+                cell_ok = table[cuboid.codes[col]]
+                mask = cell_ok if mask is None else mask & cell_ok
+            shared = cuboid.rollup(dims, self.cardinalities, mask)
+
+            if edge_rows is not None:
+                edge = row_cuboid(
+                    dims,
+                    {d: self.dimensions[d].codes[edge_rows] for d in dims},
+                    self.row_values[edge_rows]
+                ).rollup(dims, self.cardinalities)
+                shared = merge_cuboids(shared, edge, dims, self.cardinalities)
+
+            for name in names:
+                result = shared.rollup(tuple(requests[name]), self.cardinalities)
+                results[name] = to_frame(result, self.dimensions)
+        return results
+
+    # Resolves the filter state to allowed-code tables per dimension and the
+    # partially covered buckets of the range sliders
+    def _slice(self, state):
+        allowed = {}               # dimension -> allowed-code lookup table
+        partial = {}               # bucketed dimension -> partially covered buckets
+
+        for col, wanted in state.categorical().items():
+            if wanted is None or col not in self.dimensions:
+                continue
+            allowed[col] = self.dimensions[col].allowed(wanted)
+
+        for col, bounds in state.ranges().items():
+            if bounds is None or col not in self.dimensions:
+                continue
+            dim = self.dimensions[col]
+            full, part = dim.classify(bounds)
+            non_empty = dim.stops > dim.starts
+            if dim.missing_code is None and full[:len(non_empty)][non_empty].all():
+                continue           # Slider bütün kovaları kapsıyor, filtre yok
+            allowed[col] = full
+            if part.any():
+                partial[col] = part
+        return allowed, partial
+
+    # Rows inside partially covered buckets that pass the exact filter
+    def _edge_rows(self, state, partial):
+        rows = np.unique(np.concatenate(
+            [self.dimensions[col].rows_in_buckets(part) for col, part in partial.items()]
+        ))
+        keep = np.ones(len(rows), dtype=bool)
+        for col, wanted in state.categorical().items():
+            if wanted is not None and col in self.dimensions:
+                dim = self.dimensions[col]
+                keep &= dim.allowed(wanted)[dim.codes[rows]]
+        for col, bounds in state.ranges().items():
+            if bounds is not None and col in self.range_values:
+                values = self.range_values[col][rows]
+                keep &= (values >= bounds[0]) & (values <= bounds[1])
+        return rows[keep]
@@ -0,0 +1,395 @@
+# ----------------------------------------
+# Data loading and cleaning for the Shopping Behavior Dashboard.
+# Everything in this module is plain pandas / pyarrow so it can be used
+# without Streamlit (the dashboard adds its own caching on top).
+#
+# Supported sources:
+#   .csv                      -> pandas.read_csv with column projection
+#   .parquet / .pq            -> pyarrow, memory-mapped, column projection
+#   .feather / .arrow / .ipc  -> Arrow IPC, memory-mapped, column projection
+#
+# Convert a CSV export once with:
+#   python data_loader.py Shopping_behavior.csv Shopping_behavior.feather
+
+import argparse
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+try:                                   # pyarrow is only needed for columnar files
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except ImportError:
+    pa = None
+
+
+# ----------------------------------------
+# US State Codes Map
+
+STATE_NAME_TO_ABBR = {
+    'Alabama':'AL','Alaska':'AK','Arizona':'AZ','Arkansas':'AR','California':'CA','Colorado':'CO','Connecticut':'CT',
+    'Delaware':'DE','Florida':'FL','Georgia':'GA','Hawaii':'HI','Idaho':'ID','Illinois':'IL','Indiana':'IN','Iowa':'IA',
+    'Kansas':'KS','Kentucky':'KY','Louisiana':'LA','Maine':'ME','Maryland':'MD','Massachusetts':'MA','Michigan':'MI',
+    'Minnesota':'MN','Mississippi':'MS','Missouri':'MO','Montana':'MT','Nebraska':'NE','Nevada':'NV','New Hampshire':'NH',
+    'New Jersey':'NJ','New Mexico':'NM','New York':'NY','North Carolina':'NC','North Dakota':'ND','Ohio':'OH','Oklahoma':'OK',
+    'Oregon':'OR','Pennsylvania':'PA','Rhode Island':'RI','South Carolina':'SC','South Dakota':'SD','Tennessee':'TN',
+    'Texas':'TX','Utah':'UT','Vermont':'VT','Virginia':'VA','Washington':'WA','West Virginia':'WV','Wisconsin':'WI',
+    'Wyoming':'WY','District of Columbia':'DC'
+}
+
+
+# ----------------------------------------
+# Column groups used by the cleaning step.
+
+cols_to_drop = [                     # Kullanılmayan sütunları kaldır
+    "Review Rating",
+    "Subscription Status",
+    "Discount Applied",
+    "Promo Code Used",
+    "Previous Purchases"
+]
+
+numeric_cols = ["Age", "Purchase Amount (USD)"]   # Seçili alanları sayısal değere çevir
+
+categorical_cols = [                                             # Kategorik sütunlardaki eksik değerleri doldur
+    "Gender", "Category", "Season", "Payment Method",
+    "Shipping Type", "Size", "Color", "Item Purchased", "Location"
+]
+
+ordered_cols = {                                                 # Sıralı kategoriler (en sıktan en seyreğe)
+    "Frequency of Purchases": [
+        "Weekly", "Bi-Weekly", "Fortnightly", "Monthly", "Every 3 Months", "Quarterly", "Annually"
+    ],
+}
+
+
+# ----------------------------------------
+# Column projection.
+# Only the columns that survive cols_to_drop are read from disk, so unused
+# fields are never parsed (CSV) or paged in (Parquet / Arrow).
+
+def keep_column(name):
+    return name.strip() not in cols_to_drop
+
+def projected_columns(all_columns):
+    return [c for c in all_columns if keep_column(c)]
+
+
+# ----------------------------------------
+# Format readers.
+# Each reader takes a path (or a file-like object for uploads) and returns a
+# raw, uncleaned DataFrame. New formats can be added with register_loader().
+
+def read_csv_source(source):
+    return pd.read_csv(source, usecols=keep_column)
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required to read Parquet / Arrow files (pip install pyarrow)")
+
+def read_parquet_source(source):
+    _require_pyarrow()
+    schema = pa_parquet.read_schema(source, memory_map=isinstance(source, str))
+    if not isinstance(source, str):
+        source.seek(0)
+    table = pa_parquet.read_table(
+        source,
+        columns=projected_columns(schema.names),
+        memory_map=isinstance(source, str)
+    )
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def read_arrow_source(source):
+    _require_pyarrow()
+    if isinstance(source, str):
+        # Uncompressed IPC files are mapped straight into the process; the
+        # OS pages in only the projected columns.
+        with pa.memory_map(source, "r") as mm:
+            names = pa.ipc.open_file(mm).schema.names
+        table = pa_feather.read_table(source, columns=projected_columns(names), memory_map=True)
+    else:
+        reader = pa.ipc.open_file(source)
+        table = reader.read_all().select(projected_columns(reader.schema.names))
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+LOADERS = {
+    ".csv": read_csv_source,
+    ".parquet": read_parquet_source,
+    ".pq": read_parquet_source,
+    ".feather": read_arrow_source,
+    ".arrow": read_arrow_source,
+    ".ipc": read_arrow_source,
+}
+
+COLUMNAR_EXTENSIONS = [".feather", ".arrow", ".ipc", ".parquet", ".pq"]   # Tercih sırası
+
+def register_loader(extension, reader):
+    LOADERS[extension.lower()] = reader
+
+def file_extension(filepath):
+    return os.path.splitext(str(filepath))[1].lower()
+
+
+# ----------------------------------------
+# This function attempts to load the dataset from a given path.
+# If the file is missing or unreadable, it returns None instead of crashing.
+
+def load_data(filepath):          # Dosyayı uzantısına göre yükler, hata olursa None döner
+    reader = LOADERS.get(file_extension(filepath), read_csv_source)
+    try:
+        df = reader(filepath)
+        return df
+    except FileNotFoundError:
+        return None
+    except Exception:
+        return None
+
+def load_bytes(raw_bytes, filename):   # Yüklenen dosyayı (bytes) uzantısına göre okur
+    reader = LOADERS.get(file_extension(filename), read_csv_source)
+    return reader(io.BytesIO(raw_bytes))
+
+
+# ----------------------------------------
+# Chunked reading of uploaded files.
+# Yields (raw chunk, fraction of the input read) so large uploads can be
+# cleaned chunk by chunk while a progress bar advances. CSV is read in
+# chunk_rows pieces, Parquet by record batches, Arrow by its own batches.
+
+UPLOAD_MAX_MB = float(os.environ.get("DASHBOARD_UPLOAD_MAX_MB", 200))      # Daha büyük yüklemeler reddedilir
+UPLOAD_CHUNK_ROWS = int(os.environ.get("DASHBOARD_UPLOAD_CHUNK_ROWS", 100_000))
+
+def iter_csv_chunks(source, total, chunk_rows):
+    for chunk in pd.read_csv(source, usecols=keep_column, chunksize=chunk_rows):
+        yield chunk, min(source.tell() / total, 1.0)
+
+def iter_parquet_chunks(source, total, chunk_rows):
+    _require_pyarrow()
+    parquet = pa_parquet.ParquetFile(source)
+    n_rows, done = max(parquet.metadata.num_rows, 1), 0
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=projected_columns(parquet.schema_arrow.names)):
+        done += batch.num_rows
+        yield batch.to_pandas(), done / n_rows
+
+def iter_arrow_chunks(source, total, chunk_rows):
+    _require_pyarrow()
+    reader = pa.ipc.open_file(source)
+    columns = projected_columns(reader.schema.names)
+    for i in range(reader.num_record_batches):
+        yield reader.get_batch(i).select(columns).to_pandas(), (i + 1) / reader.num_record_batches
+
+CHUNK_READERS = {
+    read_csv_source: iter_csv_chunks,
+    read_parquet_source: iter_parquet_chunks,
+    read_arrow_source: iter_arrow_chunks,
+}
+
+def iter_bytes_chunks(raw_bytes, filename, chunk_rows=UPLOAD_CHUNK_ROWS):
+    reader = LOADERS.get(file_extension(filename), read_csv_source)
+    source = io.BytesIO(raw_bytes)
+    if reader not in CHUNK_READERS:                  # register_loader ile eklenen format: tek parça
+        yield reader(source), 1.0
+        return
+    yield from CHUNK_READERS[reader](source, max(len(raw_bytes), 1), chunk_rows)
+
+
+# ----------------------------------------
+# If an already converted columnar copy sits next to the CSV and is at least
+# as new, the dashboard reads that instead (Shopping_behavior.csv ->
+# Shopping_behavior.feather / .parquet).
+
+def resolve_data_path(filepath):
+    if file_extension(filepath) != ".csv":
+        return filepath
+    base = os.path.splitext(filepath)[0]
+    try:
+        csv_mtime = os.stat(filepath).st_mtime_ns
+    except OSError:
+        csv_mtime = None
+    for ext in COLUMNAR_EXTENSIONS:
+        candidate = base + ext
+        try:
+            mtime = os.stat(candidate).st_mtime_ns
+        except OSError:
+            continue
+        if pa is not None and (csv_mtime is None or mtime >= csv_mtime):
+            return candidate
+    return filepath
+
+
+# ----------------------------------------
+# Returns a (path, modified time, size) tuple that identifies the current
+# version of the file. Used as the cache key for the prepared dataset.
+
+def file_fingerprint(filepath):   # Dosya değiştiyse farklı bir anahtar üretir
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+
+
+# ----------------------------------------
+# Compact in-memory schema.
+#   categorical_cols        -> pandas categoricals (one small code per row)
+#   ordered_cols            -> ordered categoricals in their natural order
+#   whole-number numerics   -> int16 / int32 (the smallest that fits)
+#   fractional numerics     -> float32
+# Frames of one dataset that are cleaned separately (chunks, partitions,
+# appended rows) are combined with concat_prepared, which aligns the
+# categories so the result stays categorical.
+#
+# Plotly narrows int64 arrays to the smallest integer type when it encodes
+# a figure, but sends int16 / int32 / float32 as they are. Charts that put
+# these columns into a trace narrow them first (charts.compact_array);
+# otherwise an int16 Age column costs twice the bytes of the int64 one.
+
+def compact_numeric(series):
+    values = series.to_numpy()
+    if len(values) and np.isfinite(values).all() and (values == np.round(values)).all():
+        for dtype in (np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if values.min() >= info.min and values.max() <= info.max:
+                return series.astype(dtype)
+        return series.astype(np.int64)
+    return series.astype(np.float32)
+
+def ordered_categorical(series, order):
+    extra = sorted(set(series.dropna().unique()) - set(order))   # Bilinmeyen değerler sona
+    return series.astype(pd.CategoricalDtype(list(order) + extra, ordered=True))
+
+# Location -> state code on the categories (50 lookups), not on every row
+def state_codes(location):
+    location = location.astype("category")
+    labels = np.array([STATE_NAME_TO_ABBR.get(c, c) for c in location.cat.categories], dtype=object)
+    abbr = pd.Series(labels, dtype=object).reindex(location.cat.codes.to_numpy()).to_numpy()   # -1 -> NaN
+    return pd.Series(abbr, index=location.index, dtype="category")
+
+def concat_prepared(frames):
+    frames = list(frames)
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    for col in frames[0].columns:
+        dtypes = [f[col].dtype for f in frames if col in f.columns]
+        if not all(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+            continue
+        if dtypes[0].ordered:
+            categories = list(dtypes[0].categories)
+            for d in dtypes[1:]:
+                categories += [c for c in d.categories if c not in categories]
+        else:
+            categories = sorted(set().union(*(d.categories for d in dtypes)))
+        dtype = pd.CategoricalDtype(categories, ordered=dtypes[0].ordered)
+        frames = [f.assign(**{col: f[col].astype(dtype)}) if col in f.columns else f for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+# ----------------------------------------
+# Bytes per column before and after cleaning (python data_loader.py
+# --memory-report file). Index: column, with dtype and bytes of both frames.
+
+def column_memory(df):
+    return df.memory_usage(deep=True, index=False)
+
+def memory_report(raw, prepared):
+    raw = raw.rename(columns=str.strip)
+    columns = list(dict.fromkeys(list(raw.columns) + list(prepared.columns)))
+    report = pd.DataFrame({
+        "dtype_before": raw.dtypes.astype(str).reindex(columns, fill_value=""),
+        "bytes_before": column_memory(raw).reindex(columns, fill_value=0),
+        "dtype_after": prepared.dtypes.astype(str).reindex(columns, fill_value=""),
+        "bytes_after": column_memory(prepared).reindex(columns, fill_value=0),
+    }, index=columns)
+    report.loc["TOTAL"] = ["", report["bytes_before"].sum(), "", report["bytes_after"].sum()]
+    return report
+
+
+# ----------------------------------------
+# Removes unnecessary columns, normalizes column names, converts numeric fields,
+# handles missing values and prepares categorical + location data for analysis.
+
+def clean_data(df):
+    for col in cols_to_drop:
+        if col in df.columns:
+            df.drop(columns=col, inplace=True)   # Varsa sutünu kaldır
+
+    df.columns = [c.strip() for c in df.columns]        # Sütun adlarını düzenle (boşluk vs varsa kaldır)
+
+    for col in numeric_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    for col in ["Age", "Purchase Amount (USD)"]:          # Eksik sayısal değeri olan satırları sil
+        if col in df.columns:
+            df = df[~df[col].isna()]
+
+    for col in numeric_cols:                              # En küçük uygun sayı tipi
+        if col in df.columns:
+            df[col] = compact_numeric(df[col])
+
+    for col in categorical_cols:
+        if col in df.columns:
+            df[col] = df[col].fillna("Unknown").astype(str).astype("category")
+
+    for col, order in ordered_cols.items():
+        if col in df.columns:
+            df[col] = ordered_categorical(df[col], order)
+
+    if "Location" in df.columns:                        # Coğrafi grafikler için eyalet isimlerini kodla
+        df["Location_Abbr"] = state_codes(df["Location"])
+    else:
+        df["Location_Abbr"] = np.nan
+
+    return df
+
+
+# ----------------------------------------
+# One-shot CSV -> Parquet / Arrow converter.
+# Only the projected columns are written. The raw values are kept as they
+# are (cleaning still happens at load time), so the converted file is a
+# drop-in replacement for the CSV. Arrow/Feather output is uncompressed by
+# default because compressed IPC buffers cannot be memory-mapped.
+
+def convert_to_columnar(src, dst, compression=None):
+    _require_pyarrow()
+    header = pd.read_csv(src, nrows=0).columns
+    table = pa_csv.read_csv(
+        src,
+        convert_options=pa_csv.ConvertOptions(include_columns=projected_columns(header))
+    )
+    ext = file_extension(dst)
+    if ext in (".parquet", ".pq"):
+        pa_parquet.write_table(table, dst, compression=compression or "zstd")
+    elif ext in (".feather", ".arrow", ".ipc"):
+        pa_feather.write_feather(table, dst, compression=compression or "uncompressed")
+    else:
+        raise ValueError(f"Unsupported output format: {dst}")
+    return table.num_rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a Shopping_behavior-shaped CSV to Parquet or Arrow IPC.")
+    parser.add_argument("src", help="input CSV file")
+    parser.add_argument("dst", nargs="?", help="output file (.parquet, .pq, .feather, .arrow or .ipc)")
+    parser.add_argument("--compression", default=None,
+                        help="codec override (default: zstd for Parquet, uncompressed for Arrow)")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="print per-column dtype and memory before and after cleaning")
+    args = parser.parse_args(argv)
+    if args.dst is None and not args.memory_report:
+        parser.error("dst is required unless --memory-report is given")
+
+    if args.memory_report:
+        raw = load_data(args.src)
+        if raw is None:
+            parser.exit(1, f"Could not read {args.src}\n")
+        print(memory_report(raw, clean_data(raw.copy())).to_string())
+    if args.dst is None:
+        return
+    rows = convert_to_columnar(args.src, args.dst, args.compression)
+    print(f"Wrote {rows} rows to {args.dst}")
+
+if __name__ == "__main__":
+    main()
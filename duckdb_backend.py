@@ -0,0 +1,384 @@
+# ----------------------------------------
+# Out-of-core query backend on embedded DuckDB.
+# Selected with DASHBOARD_BACKEND=duckdb. The dataset stays on disk (CSV,
+# Parquet or Arrow IPC; columnar files are best) and is never loaded into
+# one pandas DataFrame:
+#
+#   - the cleaning rules of data_loader.clean_data are a SQL view,
+#   - the sidebar filters become a WHERE clause pushed down to the scan,
+#   - chart aggregations run as one GROUPING SETS query per batch,
+#   - histogram and density scatter read one row per distinct value,
+#     points and parallel coordinates read at most a bounded sample.
+#
+# Aggregations, the histogram and the density scatter equal the pandas
+# path. Parallel coordinates draw a different (still stratified) sample.
+# QueryContext gives the chart sections (sections.py) the same methods as
+# the in-memory ChartContext.
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:                                   # duckdb is only needed for this backend
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import pyarrow.dataset as pa_dataset
+except ImportError:
+    pa_dataset = None
+
+from aggregation import MEASURE, Dimension, union_dims
+from charts import (
+    PARCOORDS_ROW_BUDGET,
+    SCATTER_BINS,
+    density_bins,
+    density_figure,
+    histogram_summary,
+    parallel_coordinates_figure,
+    scatter_figure,
+    scatter_mode_for,
+)
+from data_loader import STATE_NAME_TO_ABBR, categorical_cols, cols_to_drop, numeric_cols
+from flow_graph import build_flow_graph
+from sections import CHART_AGGREGATES
+from sketches import CUSTOMER_COLUMN, SKETCH_MIN_ROWS, SKETCH_TOP_ITEMS
+
+
+BACKEND = os.environ.get("DASHBOARD_BACKEND", "pandas").lower()          # "pandas" veya "duckdb"
+DUCKDB_MEMORY_LIMIT = os.environ.get("DASHBOARD_DUCKDB_MEMORY_LIMIT")   # Örn. "2GB"; aşılırsa diske taşar
+
+PARCOORDS_OVERSAMPLE = 4               # Tabakalı örnek bu kat büyük rastgele örnekten seçilir
+
+
+def duckdb_available():
+    return duckdb is not None
+
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, (bool, np.bool_)):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return repr(float(value)) if isinstance(value, (float, np.floating)) else str(int(value))
+    raise TypeError(f"Unsupported filter value: {value!r}")
+
+
+class DuckDBBackend:
+
+    def __init__(self, path, memory_limit=DUCKDB_MEMORY_LIMIT):
+        if duckdb is None:
+            raise ImportError("duckdb is required for DASHBOARD_BACKEND=duckdb (pip install duckdb)")
+        self.path = path
+        self._arrow = None                     # Arrow IPC kaynağı (her imlece kaydedilir)
+        self.con = duckdb.connect()
+        if memory_limit:
+            self.con.execute(f"SET memory_limit = {literal(memory_limit)}")
+        self.con.execute(f"SET temp_directory = {literal(tempfile.gettempdir())}")
+
+        self.con.execute("CREATE TABLE state_abbr (name VARCHAR, abbr VARCHAR)")
+        self.con.executemany("INSERT INTO state_abbr VALUES (?, ?)", list(STATE_NAME_TO_ABBR.items()))
+
+        self._create_source(path)
+        self.con.execute(f"CREATE VIEW shopping AS {self._clean_sql()}")
+        self.columns = [row[0] for row in self.con.execute("DESCRIBE shopping").fetchall()]
+        self.options = self._filter_options()
+
+    # ----------------------------------------
+    # Raw source and cleaning view
+
+    def _create_source(self, path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in (".parquet", ".pq"):
+            self.con.execute(f"CREATE VIEW raw AS SELECT * FROM read_parquet({literal(path)})")
+        elif ext in (".feather", ".arrow", ".ipc"):
+            if pa_dataset is None:
+                raise ImportError("pyarrow is required to query Arrow files (pip install pyarrow)")
+            # DuckDB scans the Arrow dataset lazily with projection pushdown.
+            # It has no built-in IPC reader, and a registered object is only
+            # visible to its own cursor, so cursor() registers it again.
+            self._arrow = pa_dataset.dataset(path, format="ipc")
+            self.con.register("raw", self._arrow)
+        else:
+            self.con.execute(f"CREATE VIEW raw AS SELECT * FROM read_csv_auto({literal(path)})")
+
+    # Same rules as data_loader.clean_data: drop unused columns, strip names,
+    # numbers from text, "Unknown" for missing categories, rows without an
+    # age or amount removed, state names mapped to their codes
+    def _clean_sql(self):
+        expressions = {}                       # Temiz sütun adı -> SQL ifadesi
+        for raw_name, raw_type, *_ in self.con.execute("DESCRIBE raw").fetchall():
+            name = raw_name.strip()
+            if name in cols_to_drop:
+                continue
+            column = f"raw.{quote(raw_name)}"
+            numeric_type = any(t in raw_type.upper() for t in ("INT", "DOUBLE", "FLOAT", "DECIMAL", "REAL"))
+            if name in numeric_cols and not numeric_type:
+                column = f"TRY_CAST({column} AS DOUBLE)"
+            elif name in categorical_cols:
+                column = f"COALESCE(CAST({column} AS VARCHAR), 'Unknown')"
+            expressions[name] = column
+
+        source = "raw"
+        if "Location" in expressions:
+            expressions["Location_Abbr"] = f"COALESCE(state_abbr.abbr, {expressions['Location']})"
+            source = f"raw LEFT JOIN state_abbr ON state_abbr.name = {expressions['Location']}"
+        else:
+            expressions["Location_Abbr"] = "CAST(NULL AS VARCHAR)"
+
+        select = ", ".join(f"{expr} AS {quote(name)}" for name, expr in expressions.items())
+        where = [f"{expressions[c]} IS NOT NULL" for c in ("Age", MEASURE) if c in expressions]
+        sql = f"SELECT {select} FROM {source}"
+        return sql + (f" WHERE {' AND '.join(where)}" if where else "")
+
+    def _filter_options(self):
+        def distinct(col):
+            if col not in self.columns:
+                return []
+            rows = self.query(f"SELECT DISTINCT {quote(col)} FROM shopping WHERE {quote(col)} IS NOT NULL "
+                              f"ORDER BY 1")
+            return rows.iloc[:, 0].tolist()
+        def bounds(col, default):
+            if col not in self.columns:
+                return default
+            lo, hi = self.cursor().execute(
+                f"SELECT MIN({quote(col)}), MAX({quote(col)}) FROM shopping"
+            ).fetchone()
+            return (int(lo), int(hi)) if lo is not None else default
+        return dict(
+            seasons=distinct("Season"),
+            categories=distinct("Category"),
+            genders=distinct("Gender"),
+            age=bounds("Age", (18, 90)),
+            price=bounds(MEASURE, (0, 1000)),
+        )
+
+    # ----------------------------------------
+    # Queries. Each call gets its own cursor: sessions run on their own
+    # threads and a DuckDB connection must not be shared between them.
+
+    def cursor(self):
+        cursor = self.con.cursor()
+        if self._arrow is not None:
+            cursor.register("raw", self._arrow)
+        return cursor
+
+    def query(self, sql):
+        return self.cursor().execute(sql).df()
+
+    def where(self, state, extra=()):
+        clauses = list(extra)
+        for col, wanted in state.categorical().items():
+            if wanted is None or col not in self.columns:
+                continue
+            if not wanted:
+                clauses.append("FALSE")        # Boş seçim hiçbir satır seçmez
+                continue
+            clauses.append(f"{quote(col)} IN ({', '.join(literal(v) for v in wanted)})")
+        for col, bounds in state.ranges().items():
+            if bounds is None or col not in self.columns:
+                continue
+            clauses.append(f"{quote(col)} BETWEEN {literal(bounds[0])} AND {literal(bounds[1])}")
+        return " AND ".join(clauses) if clauses else "TRUE"
+
+    def count(self, state):
+        return int(self.cursor().execute(f"SELECT COUNT(*) FROM shopping WHERE {self.where(state)}").fetchone()[0])
+
+    # Same contract as AggregationEngine.run: {name: [dims]} -> {name: frame
+    # with dims, sum, count, sum_sq, mean}, missing labels left out, rows
+    # ordered by the dimension labels. selection is ignored.
+    def run(self, requests, state, selection=None):
+        requests = {name: tuple(dims) for name, dims in requests.items()}
+        if not requests:
+            return {}
+        dims = union_dims(requests.values())
+        sets = list(dict.fromkeys(requests.values()))
+        grouping = ", ".join("(" + ", ".join(quote(d) for d in s) + ")" for s in sets)
+        flags = ", ".join(f"GROUPING({quote(d)}) AS {quote('_g_' + d)}" for d in dims)
+        amount = quote(MEASURE)
+        shared = self.query(
+            f"SELECT {', '.join(quote(d) for d in dims)}, {flags}, "
+            f"SUM({amount}) AS sum, COUNT(*) AS count, SUM({amount} * {amount}) AS sum_sq "
+            f"FROM shopping WHERE {self.where(state)} GROUP BY GROUPING SETS ({grouping})"
+        )
+
+        results = {}
+        for name, req_dims in requests.items():
+            # GROUPING() is 0 for the dimensions a grouping set contains
+            keep = np.ones(len(shared), dtype=bool)
+            for d in dims:
+                keep &= (shared["_g_" + d] == 0).to_numpy() == (d in req_dims)
+            frame = shared.loc[keep, list(req_dims) + ["sum", "count", "sum_sq"]]
+            frame = frame.dropna(subset=list(req_dims))
+            frame = frame.sort_values(list(req_dims), kind="stable").reset_index(drop=True)
+            for d in req_dims:
+                if frame[d].dtype == object:
+                    frame[d] = frame[d].astype(str)   # pandas yolundaki etiket tipiyle aynı
+            frame["sum"] = frame["sum"].astype("float64")
+            frame["sum_sq"] = frame["sum_sq"].astype("float64")
+            frame["count"] = frame["count"].astype("int64")
+            frame["mean"] = frame["sum"] / frame["count"]
+            results[name] = frame
+        return results
+
+    # Distinct values of a column and how many selected rows have each
+    def value_counts(self, col, state, extra=()):
+        return self.query(
+            f"SELECT {quote(col)} AS value, COUNT(*) AS n FROM shopping "
+            f"WHERE {self.where(state, extra)} AND {quote(col)} IS NOT NULL GROUP BY 1 ORDER BY 1"
+        )
+
+    def rows(self, state, columns, extra=(), limit=None, sample=None):
+        cols = ", ".join(quote(c) for c in columns if c in self.columns)
+        sql = f"SELECT {cols} FROM shopping WHERE {self.where(state, extra)}"
+        if sample is not None:
+            sql = f"SELECT * FROM ({sql}) USING SAMPLE reservoir({int(sample)} ROWS) REPEATABLE (0)"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql)
+
+    # Writes the selected rows with DuckDB's own streaming writers
+    def export(self, state, fmt):
+        options = {
+            "CSV": "FORMAT CSV, HEADER",
+            "CSV (gzip)": "FORMAT CSV, HEADER, COMPRESSION GZIP",
+            "Parquet": "FORMAT PARQUET, COMPRESSION ZSTD",
+        }
+        if fmt not in options:
+            raise ValueError(f"Unknown export format: {fmt}")
+        fd, target = tempfile.mkstemp(suffix=".export")
+        os.close(fd)
+        try:
+            self.cursor().execute(
+                f"COPY (SELECT * FROM shopping WHERE {self.where(state)}) TO {literal(target)} ({options[fmt]})"
+            )
+            with open(target, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(target)
+
+
+# ----------------------------------------
+# Chart data for one filter state, answered by the backend (same methods
+# as sections.ChartContext).
+
+def _window(col, window):
+    return () if window is None else (f"{quote(col)} BETWEEN {literal(window[0])} AND {literal(window[1])}",)
+
+class QueryContext:
+
+    def __init__(self, backend, state, aggregates=None):
+        self.backend = backend
+        self.engine = backend
+        self.state = state
+        self.selection = None
+        self.aggregates = dict(aggregates or {})
+        self._count = None
+
+    @property
+    def columns(self):
+        return self.backend.columns
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.state)
+        return self._count
+
+    def aggregate(self, name):
+        if name not in self.aggregates:
+            self.aggregates.update(self.backend.run({name: list(CHART_AGGREGATES[name])}, self.state))
+        return self.aggregates[name]
+
+    def flow(self, stages):
+        return build_flow_graph(self.backend, stages, self.state)
+
+    def histogram(self, col, nbins=20):
+        counts = self.backend.value_counts(col, self.state)
+        return histogram_summary(counts["value"], nbins=nbins, counts=counts["n"])
+
+    def top_items(self, n=SKETCH_TOP_ITEMS):
+        return None                    # Ürün toplamları SQL ile tam hesaplanır
+
+    # DuckDB's HyperLogLog (approx_count_distinct) above SKETCH_MIN_ROWS
+    def unique_customers(self):
+        if CUSTOMER_COLUMN not in self.columns:
+            return None
+        approximate = self.count >= SKETCH_MIN_ROWS
+        column = quote(CUSTOMER_COLUMN)
+        expression = f"approx_count_distinct({column})" if approximate else f"COUNT(DISTINCT {column})"
+        value = self.backend.cursor().execute(
+            f"SELECT {expression} FROM shopping WHERE {self.backend.where(self.state)}"
+        ).fetchone()[0]
+        return int(value), approximate
+
+    def scatter(self, mode="Auto", x_window=None, y_window=None):
+        x_col, y_col = "Age", MEASURE
+        extra = _window(x_col, x_window) + _window(y_col, y_window)
+        n = self.count if not extra else int(self.backend.query(
+            f"SELECT COUNT(*) AS n FROM shopping WHERE {self.backend.where(self.state, extra)}"
+        )["n"].iloc[0])
+        used = scatter_mode_for(n, mode)
+
+        if used != "Density":
+            rows = self.backend.rows(self.state, [x_col, y_col, "Gender", "Category", "Season"], extra)
+            fig, _, _ = scatter_figure(rows, mode=used, x_window=x_window, y_window=y_window)
+            return fig, used, n
+
+        # One row per distinct (age, amount, gender) with its count
+        cells = self.backend.query(
+            f"SELECT {quote(x_col)} AS x, {quote(y_col)} AS y, \"Gender\" AS g, COUNT(*) AS n "
+            f"FROM shopping WHERE {self.backend.where(self.state, extra)} GROUP BY 1, 2, 3"
+        )
+        x_range, y_range = x_window, y_window
+        if x_range is None:
+            x_range = (float(cells["x"].min()), float(cells["x"].max())) if len(cells) else (0, 1)
+        if y_range is None:
+            y_range = (float(cells["y"].min()), float(cells["y"].max())) if len(cells) else (0, 1)
+        fig = density_figure(
+            *density_bins(cells["x"], cells["y"], cells["g"], x_range, y_range, SCATTER_BINS, weights=cells["n"]),
+            title="Age vs Purchase Amount (customers per bin)"
+        )
+        return fig, used, n
+
+    # A random sample a few times larger than the budget (plus the cheapest
+    # and most expensive purchase) is fetched; the stratified sample of
+    # charts.py is then drawn from it.
+    def parallel_coordinates(self, budget=PARCOORDS_ROW_BUDGET):
+        total = self.count
+        if total == 0:
+            return None, 0
+        columns = ["Gender", "Age", "Season", "Category", MEASURE, "Payment Method", "Review Rating"]
+        if total <= budget:
+            sample = self.backend.rows(self.state, columns)
+        else:
+            where = self.backend.where(self.state)
+            cols = ", ".join(quote(c) for c in columns if c in self.backend.columns)
+            extremes = self.backend.query(
+                f"(SELECT {cols} FROM shopping WHERE {where} ORDER BY {quote(MEASURE)} ASC LIMIT 1) UNION ALL "
+                f"(SELECT {cols} FROM shopping WHERE {where} ORDER BY {quote(MEASURE)} DESC LIMIT 1)"
+            )
+            sample = pd.concat(
+                [extremes, self.backend.rows(self.state, columns, sample=budget * PARCOORDS_OVERSAMPLE)],
+                ignore_index=True
+            )
+        encodings = {}
+        def encode(col):
+            if col not in encodings:
+                encodings[col] = Dimension(col, sample[col])
+            return encodings[col]
+        fig, drawn = parallel_coordinates_figure(sample, np.arange(len(sample)), encode, budget)
+        return fig, drawn
+
+    def preview(self, n_rows=20):
+        return self.backend.query(f"SELECT * FROM shopping WHERE {self.backend.where(self.state)} LIMIT {int(n_rows)}")
+
+    def export(self, fmt):
+        return self.backend.export(self.state, fmt)
@@ -0,0 +1,85 @@
+# ----------------------------------------
+# Export of the filtered rows as CSV, gzip-compressed CSV or Parquet.
+# Nothing is serialized until the user actually asks for the file, and the
+# rows are written in chunks into a spooled temporary file, so memory use
+# stays at one chunk plus the finished file (no full-size CSV string and no
+# second copy from encoding it).
+
+import gzip
+import io
+import tempfile
+
+try:                                   # pyarrow is only needed for Parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pa_parquet
+except ImportError:
+    pa = None
+
+
+EXPORT_CHUNK_ROWS = 100_000
+SPOOL_MAX_BYTES = 64 * 1024 * 1024      # Bu boyuttan büyük dosyalar diske taşınır
+
+EXPORT_FORMATS = {                      # Görünen ad -> (dosya uzantısı, MIME tipi)
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+def available_formats():
+    return [name for name in EXPORT_FORMATS if name != "Parquet" or pa is not None]
+
+
+# Yields the selected rows of df, chunk_rows at a time
+def iter_chunks(df, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    if rows is None:
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+    for start in range(0, len(rows), chunk_rows):
+        yield df.take(rows[start:start + chunk_rows])
+
+
+def write_csv(df, rows, target, chunk_rows=EXPORT_CHUNK_ROWS):
+    text = io.TextIOWrapper(target, encoding="utf-8", newline="", write_through=True)
+    df.iloc[:0].to_csv(text, index=False)           # Başlık satırı
+    for chunk in iter_chunks(df, rows, chunk_rows):
+        chunk.to_csv(text, index=False, header=False)
+    text.flush()
+    text.detach()                                   # target açık kalsın
+
+def write_parquet(df, rows, target, chunk_rows=EXPORT_CHUNK_ROWS):
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet export (pip install pyarrow)")
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pa_parquet.ParquetWriter(target, schema, compression="zstd") as writer:
+        for chunk in iter_chunks(df, rows, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+# ----------------------------------------
+# Writes the export into a temporary file and returns it rewound.
+# rows: row positions from the filter engine (None = every row of df).
+
+def export_file(df, rows, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    target = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if fmt == "CSV":
+        write_csv(df, rows, target, chunk_rows)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=6) as compressed:
+            write_csv(df, rows, compressed, chunk_rows)
+    elif fmt == "Parquet":
+        write_parquet(df, rows, target, chunk_rows)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    target.seek(0)
+    return target
+
+def export_bytes(df, rows, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    with export_file(df, rows, fmt, chunk_rows) as f:
+        return f.read()
+
+def export_file_name(base, fmt):
+    return f"{base}.{EXPORT_FORMATS[fmt][0]}"
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
@@ -0,0 +1,39 @@
+# ----------------------------------------
+# Shared LRU cache of built figures.
+# Keyed by (dataset fingerprint, chart id, normalized filter tuple, chart
+# options), so going back to a view that anyone on the server has already
+# seen returns the stored figure instead of rebuilding it. Entries are sized
+# by their serialized JSON (what is sent to the browser) and the least
+# recently used ones are evicted once the memory budget is exceeded
+# (lru_cache.py).
+#
+# Cached figures are shared between sessions and must not be modified.
+
+import os
+
+import plotly.io as pio
+
+from lru_cache import LRUCache
+
+
+FIGURE_CACHE_MB = float(os.environ.get("DASHBOARD_FIGURE_CACHE_MB", 256))   # Bellek bütçesi (MB)
+
+
+# Bytes of the figure's JSON. Built figures are not modified afterwards, so
+# the size is measured once and kept on the figure (the chart budget check
+# in sections.py, the cache and the payload report share one serialization).
+def figure_size(fig):
+    if fig is None:
+        return 0
+    size = getattr(fig, "_payload_size", None)
+    if size is None:
+        size = len(pio.to_json(fig, validate=False))
+        fig._payload_size = size
+    return size
+
+
+# Values are (figure or None, extra) pairs, sized by the figure's JSON
+class FigureCache(LRUCache):
+
+    def __init__(self, max_bytes=int(FIGURE_CACHE_MB * 1024 * 1024)):
+        super().__init__(max_bytes, lambda value: figure_size(value[0]) + 64)
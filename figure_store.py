@@ -0,0 +1,75 @@
+# ----------------------------------------
+# Persistent figure store shared by batch_render.py and the app.
+# One JSON file per section figure, named after a hash of the same key as
+# the in-memory figure cache (dataset fingerprint, section, filter inputs,
+# options). The fingerprint includes the data file's modification time, so
+# figures of an older version of the file are never served for a new one.
+#
+# batch_render.py writes the store; the app only reads it, when
+# DASHBOARD_FIGURE_STORE names the directory.
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import plotly.io as pio
+
+
+FIGURE_STORE_DIR = os.environ.get("DASHBOARD_FIGURE_STORE")   # Boş = kalıcı depo kapalı
+
+
+def store_name(key):
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:40] + ".json"
+
+
+class FigureStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, store_name(key))
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    # (figure or None, caption or None), or None when the key is not stored
+    # or its file cannot be read
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != repr(key):
+            return None                    # Özet çakışması
+        figure = pio.from_json(entry["figure"], skip_invalid=True) if entry["figure"] is not None else None
+        return figure, entry["caption"]
+
+    # Written to a temporary file and renamed, so a reader never sees half
+    # an entry
+    def put(self, key, value):
+        figure, caption = value
+        entry = {
+            "key": repr(key),
+            "caption": caption,
+            "figure": pio.to_json(figure, validate=False) if figure is not None else None,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def clear(self):
+        removed = 0
+        for path in glob.glob(os.path.join(glob.escape(self.directory), "*.json")):
+            os.remove(path)
+            removed += 1
+        return removed
@@ -0,0 +1,255 @@
+# ----------------------------------------
+# Indexed filter engine for the sidebar filters.
+# Built once per dataset, then every rerun answers the current filter state
+# with a single array of row positions instead of chained DataFrame copies.
+#
+#   Season / Category / Gender       -> one packed bitmap per value (OR inside
+#                                        a column, AND across columns)
+#   Age / Purchase Amount (USD)      -> values sorted once, slider bounds are
+#                                        resolved with binary search
+#
+# When one range slider is narrow, only the rows inside it are visited
+# (sparse path); otherwise the rows outside the sliders are cleared from a
+# boolean mask (dense path). Either way the cost follows the selection, not
+# the number of filters.
+
+import copy
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from aggregation import merge_sorted
+
+
+CATEGORICAL_FILTERS = ("Season", "Category", "Gender")
+RANGE_FILTERS = ("Age", "Purchase Amount (USD)")
+
+SPARSE_RATIO = 16          # Dar aralık: satırların 1/16'sından azı seçiliyse seyrek yol
+
+
+# ----------------------------------------
+# Normalized filter state.
+# None means "no constraint" on that field; tuples are sorted so that the
+# same selection always produces the same value (usable as a cache key).
+
+@dataclass(frozen=True)
+class FilterState:
+    season: tuple = None
+    categories: tuple = None
+    genders: tuple = None
+    age_range: tuple = None
+    price_range: tuple = None
+
+    @classmethod
+    def from_sidebar(cls, season_sel, cat_sel, age_range, gender_sel, price_range):
+        # Same rules as the sidebar: "All Seasons" and an empty category
+        # list mean no filter, an empty gender list selects nothing.
+        return cls(
+            season=None if season_sel == "All Seasons" else (season_sel,),
+            categories=tuple(sorted(cat_sel)) if cat_sel else None,
+            genders=tuple(sorted(gender_sel)),
+            age_range=(age_range[0], age_range[1]),
+            price_range=(price_range[0], price_range[1]),
+        )
+
+    def categorical(self):
+        return {"Season": self.season, "Category": self.categories, "Gender": self.genders}
+
+    def ranges(self):
+        return {"Age": self.age_range, "Purchase Amount (USD)": self.price_range}
+
+    def key(self):
+        return (self.season, self.categories, self.genders, self.age_range, self.price_range)
+
+
+class FilterEngine:
+
+    def __init__(self, df, categorical=CATEGORICAL_FILTERS, ranges=RANGE_FILTERS):
+        self.n_rows = len(df)
+        self._n_words = (self.n_rows + 63) // 64
+        index_dtype = np.int32 if self.n_rows < 2**31 else np.int64
+
+        self.bitmaps = {}          # column -> {value: packed uint64 bitmap}
+        for col in categorical:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col], sort=True)
+            self.bitmaps[col] = {
+                value: self._pack(codes == i) for i, value in enumerate(uniques)
+            }
+
+        self.values = {}           # column -> raw values (row order)
+        self.sorted = {}           # column -> (sorted values, row positions)
+        for col in ranges:
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy()
+            order = np.argsort(values, kind="stable").astype(index_dtype)
+            self.values[col] = values
+            self.sorted[col] = (values[order], order)
+
+        self.all_rows = np.arange(self.n_rows, dtype=index_dtype)
+        self.all_rows.flags.writeable = False
+
+    # The engine of the same rows plus `tail` (the appended rows, in order).
+    # Bitmaps are extended and the new values merged into the sorted
+    # indexes, so nothing is re-sorted or re-factorized.
+    def appended(self, tail):
+        new = copy.copy(self)
+        new.n_rows = self.n_rows + len(tail)
+        new._n_words = (new.n_rows + 63) // 64
+
+        # Existing words are copied as they are; the tail's bits are packed
+        # from the word holding row n_rows and OR-ed in behind them
+        first_word, shift = divmod(self.n_rows, 64)
+        lead = np.zeros(shift, dtype=bool)
+        new.bitmaps = {}
+        for col, bitmaps in self.bitmaps.items():
+            tail_values = tail[col].to_numpy()
+            seen = pd.unique(tail_values[pd.notna(tail_values)])
+            values = list(bitmaps) + [v for v in seen if v not in bitmaps]
+            new.bitmaps[col] = {}
+            for value in values:
+                words = np.zeros(new._n_words, dtype=np.uint64)    # Yeni değer: sıfır kelimelerle başlar
+                if value in bitmaps:
+                    words[:self._n_words] = bitmaps[value]
+                tail_words = self._pack_words(np.concatenate([lead, tail_values == value]))
+                words[first_word:first_word + len(tail_words)] |= tail_words
+                new.bitmaps[col][value] = words
+
+        new.values = {}
+        new.sorted = {}
+        for col, values in self.values.items():
+            tail_values = tail[col].to_numpy()
+            new.values[col] = np.concatenate([values, tail_values])
+            new.sorted[col] = merge_sorted(self.sorted[col], tail_values, self.n_rows)
+
+        index_dtype = np.int32 if new.n_rows < 2**31 else np.int64
+        new.all_rows = np.arange(new.n_rows, dtype=index_dtype)
+        new.all_rows.flags.writeable = False
+        return new
+
+    # ----------------------------------------
+    # Bitmap helpers (little-endian bit order, padded to 64-bit words)
+
+    def _pack(self, mask):
+        packed = np.zeros(self._n_words * 8, dtype=np.uint8)
+        bits = np.packbits(mask, bitorder="little")
+        packed[:len(bits)] = bits
+        return packed.view(np.uint64)
+
+    # Just enough words for mask
+    @staticmethod
+    def _pack_words(mask):
+        packed = np.zeros((len(mask) + 63) // 64 * 8, dtype=np.uint8)
+        bits = np.packbits(mask, bitorder="little")
+        packed[:len(bits)] = bits
+        return packed.view(np.uint64)
+
+    def _unpack(self, bits):
+        return np.unpackbits(bits.view(np.uint8), count=self.n_rows, bitorder="little").view(bool)
+
+    def _test_bits(self, bits, rows):
+        as_bytes = bits.view(np.uint8)
+        return ((as_bytes[rows >> 3] >> (rows & 7).astype(np.uint8)) & 1).astype(bool)
+
+    # ----------------------------------------
+    # Combines the categorical filters into one bitmap (None = all rows)
+
+    def _categorical_bits(self, state):
+        combined = None
+        for col, wanted in state.categorical().items():
+            if wanted is None or col not in self.bitmaps:
+                continue
+            column_bits = np.zeros(self._n_words, dtype=np.uint64)
+            for value in wanted:
+                value_bits = self.bitmaps[col].get(value)
+                if value_bits is not None:
+                    np.bitwise_or(column_bits, value_bits, out=column_bits)
+            if combined is None:
+                combined = column_bits
+            else:
+                np.bitwise_and(combined, column_bits, out=combined)
+        return combined
+
+    # Resolves each active range slider to a [start, stop) slice of the sorted values
+    def _range_slices(self, state):
+        slices = []
+        for col, bounds in state.ranges().items():
+            if bounds is None or col not in self.sorted:
+                continue
+            sorted_values, _ = self.sorted[col]
+            start = int(np.searchsorted(sorted_values, bounds[0], side="left"))
+            stop = int(np.searchsorted(sorted_values, bounds[1], side="right"))
+            if start == 0 and stop == self.n_rows:
+                continue           # Slider tüm aralığı kapsıyor, filtre yok
+            slices.append((col, bounds, start, stop))
+        return slices
+
+    # ----------------------------------------
+    # Returns the sorted row positions matching the filter state.
+
+    def select(self, state):
+        cat_bits = self._categorical_bits(state)
+        slices = self._range_slices(state)
+
+        if not slices:
+            if cat_bits is None:
+                return self.all_rows
+            return self._positions(self._unpack(cat_bits))
+
+        # Sparse path: start from the narrowest slider and test the rest per row
+        col, bounds, start, stop = min(slices, key=lambda s: s[3] - s[2])
+        if (stop - start) * SPARSE_RATIO <= self.n_rows:
+            rows = np.sort(self.sorted[col][1][start:stop])
+            keep = np.ones(len(rows), dtype=bool)
+            for other, (lo, hi), _, _ in slices:
+                if other != col:
+                    values = self.values[other][rows]
+                    keep &= (values >= lo) & (values <= hi)
+            if cat_bits is not None:
+                keep &= self._test_bits(cat_bits, rows)
+            return rows[keep]
+
+        # Dense path: clear whatever lies outside each slider
+        mask = self._unpack(cat_bits) if cat_bits is not None else np.ones(self.n_rows, dtype=bool)
+        for col, _, start, stop in slices:
+            order = self.sorted[col][1]
+            if (stop - start) * 2 >= self.n_rows:
+                mask[order[:start]] = False
+                mask[order[stop:]] = False
+            else:
+                inside = np.zeros(self.n_rows, dtype=bool)
+                inside[order[start:stop]] = True
+                mask &= inside
+        return self._positions(mask)
+
+    # Row positions of a mask in the engine's index dtype (int32 below 2**31
+    # rows): a session keeps its selection, so it should be as small as the
+    # shared indexes it is cut from
+    def _positions(self, mask):
+        return np.flatnonzero(mask).astype(self.all_rows.dtype, copy=False)
+
+    # Row counts before and after each filter when they are applied one at a
+    # time in sidebar order (debug view). Returns [(filter, rows in, rows out)].
+    def funnel(self, state):
+        steps = [
+            ("Season", "season"), ("Category", "categories"), ("Age", "age_range"),
+            ("Gender", "genders"), ("Purchase Amount (USD)", "price_range"),
+        ]
+        partial = FilterState()
+        rows_in = self.n_rows
+        counts = []
+        for col, field in steps:
+            partial = replace(partial, **{field: getattr(state, field)})
+            rows_out = len(self.select(partial))
+            counts.append((col, rows_in, rows_out))
+            rows_in = rows_out
+        return counts
+
+    # Rows of df for a selection; the full selection returns df itself (no copy)
+    def take(self, df, rows):
+        if len(rows) == self.n_rows:
+            return df
+        return df.take(rows)
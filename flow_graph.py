@@ -0,0 +1,81 @@
+# ----------------------------------------
+# Flow graph builder for the Sankey diagram.
+# Takes an ordered list of any categorical dimensions (for example
+# Category -> Payment Method -> Shipping Type, or Season -> Category -> Size)
+# and returns nodes and stage-to-stage links for go.Sankey.
+#
+# All link weights are computed in one batch by the aggregation engine, and
+# labels are mapped to node indices with vectorized index lookups, so there
+# is no per-link list search and no Python loop over rows.
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class FlowGraph:
+    stages: tuple
+    labels: list = field(default_factory=list)        # Düğüm etiketleri (go.Sankey node.label)
+    node_stage: list = field(default_factory=list)    # Her düğümün ait olduğu aşama
+    sources: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    targets: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    values: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    @property
+    def empty(self):
+        return len(self.values) == 0 or not np.any(self.values > 0)
+
+    @property
+    def title(self):
+        return " → ".join(self.stages)
+
+
+# Aggregation requests for the links between consecutive stages
+def flow_requests(stages):
+    return {
+        f"link_{i}": [stages[i], stages[i + 1]] for i in range(len(stages) - 1)
+    }
+
+
+# ----------------------------------------
+# engine:    AggregationEngine
+# stages:    ordered list of dimension names (at least two)
+# measure:   "count" (customers, as before) or "sum" (purchase amount)
+
+def build_flow_graph(engine, stages, state, selection=None, measure="count"):
+    stages = tuple(stages)
+    if len(stages) < 2:
+        return FlowGraph(stages)
+
+    links = engine.run(flow_requests(stages), state, selection)
+
+    # Nodes of a stage are the labels that take part in at least one link.
+    # The same label in two stages (e.g. "Unknown") stays two separate nodes.
+    stage_labels = []
+    for i, stage in enumerate(stages):
+        present = []
+        if i > 0:
+            present.append(links[f"link_{i - 1}"][stage])
+        if i < len(stages) - 1:
+            present.append(links[f"link_{i}"][stage])
+        stage_labels.append(pd.Index(pd.concat(present, ignore_index=True).unique()))
+
+    offsets = np.cumsum([0] + [len(labels) for labels in stage_labels])
+
+    sources, targets, values = [], [], []
+    for i in range(len(stages) - 1):
+        frame = links[f"link_{i}"]
+        sources.append(offsets[i] + stage_labels[i].get_indexer(frame[stages[i]]))
+        targets.append(offsets[i + 1] + stage_labels[i + 1].get_indexer(frame[stages[i + 1]]))
+        values.append(frame[measure].to_numpy())
+
+    return FlowGraph(
+        stages=stages,
+        labels=[str(label) for labels in stage_labels for label in labels],
+        node_stage=[stage for stage, labels in zip(stages, stage_labels) for _ in labels],
+        sources=np.concatenate(sources),
+        targets=np.concatenate(targets),
+        values=np.concatenate(values),
+    )
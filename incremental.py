@@ -0,0 +1,140 @@
+# ----------------------------------------
+# Incremental ingestion of a CSV file that only grows.
+# Enabled with DASHBOARD_INCREMENTAL=1. The byte offset of the last complete
+# line read is remembered; on refresh only the bytes after it are parsed and
+# cleaned, appended to the prepared frame, and merged into the filter engine
+# and the aggregate cube (FilterEngine.appended / AggregateCube.appended),
+# so the per-category / per-state totals are updated instead of recounted.
+# Sketches of large datasets (sketches.py) are merged with those of the tail.
+#
+# Anything that is not a pure append (the file shrank, its beginning
+# changed, a new category appeared) falls back to a full reload.
+#
+# Every refresh produces a new immutable Snapshot (its engines' arrays are
+# read-only, memory_accounting.freeze); sessions that still hold the
+# previous one keep a consistent view.
+
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+
+from aggregation import AggregationEngine
+from data_loader import clean_data, concat_prepared, read_csv_source
+from instrumentation import NULL_RECORDER
+from memory_accounting import freeze
+from pipeline import build_aggregation_engine, build_filter_engine, build_sketches
+
+
+INCREMENTAL = os.environ.get("DASHBOARD_INCREMENTAL", "").lower() in ("1", "true", "yes", "on")
+
+SIGNATURE_BYTES = 64 * 1024            # Dosya başının değişmediğini bu kadar baytla kontrol et
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    df: object
+    filter_engine: object
+    engine: object
+    version: int                       # Her yenilemede artar (önbellek anahtarı)
+    offset: int                        # Okunan son tam satırın sonu (bayt)
+    signature_bytes: int               # İmzası alınan dosya başı uzunluğu (bayt)
+
+
+class LiveDataset:
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot = None
+        self._header = b""
+        self._signature = None
+        self._ends_with_newline = True
+        self._lock = threading.Lock()  # Aynı anda tek yenileme
+
+    # Returns the current snapshot, reading whatever was appended since the
+    # last call. Cheap (one stat) when the file has not grown.
+    def refresh(self, recorder=NULL_RECORDER):
+        with self._lock:
+            try:
+                size = os.stat(self.path).st_size
+            except OSError:
+                return self.snapshot
+            current = self.snapshot
+            if current is not None and size == current.offset:
+                return current
+            if current is None or size < current.offset or not self._same_head():
+                self.snapshot = self._reload(recorder)
+            else:
+                self.snapshot = self._append(size, recorder)
+            return self.snapshot
+
+    def _same_head(self):
+        with open(self.path, "rb") as f:
+            return self._digest(f.read(self.snapshot.signature_bytes)) == self._signature
+
+    @staticmethod
+    def _digest(data):
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    # ----------------------------------------
+    # Full read: everything up to the current end of file
+
+    def _reload(self, recorder):
+        with recorder.timer("load_data", source=str(self.path)) as info:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            raw = read_csv_source(io.BytesIO(data))
+            info["rows_out"] = len(raw)
+        with recorder.timer("clean", rows_in=len(raw)) as info:
+            df = clean_data(raw)
+            info["rows_out"] = len(df)
+        self._header = data.split(b"\n", 1)[0] + b"\n"
+        head = data[:SIGNATURE_BYTES]
+        self._signature = self._digest(head)
+        self._ends_with_newline = data.endswith(b"\n")
+        filter_engine = freeze(build_filter_engine(df))
+        engine = freeze(build_aggregation_engine(df, filter_engine))
+        version = self.snapshot.version + 1 if self.snapshot is not None else 0
+        return Snapshot(df, filter_engine, engine, version, len(data), len(head))
+
+    # ----------------------------------------
+    # Tail read: only the complete lines after the last offset
+
+    def _append(self, size, recorder):
+        current = self.snapshot
+        with open(self.path, "rb") as f:
+            f.seek(current.offset)
+            data = f.read(size - current.offset)
+        if not self._ends_with_newline and not data.startswith((b"\n", b"\r\n")):
+            return self._reload(recorder)        # Son satıra ekleme yapılmış, güvenli değil
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return current                       # Henüz tamamlanmış satır yok
+
+        with recorder.timer("append", source=str(self.path), bytes=end) as info:
+            tail = clean_data(read_csv_source(io.BytesIO(self._header + data[:end])))
+            info["rows_in"] = len(tail)
+            if len(tail) == 0:
+                snapshot = Snapshot(current.df, current.filter_engine, current.engine,
+                                    current.version, current.offset + end, current.signature_bytes)
+            else:
+                snapshot = self._merged(current, tail, current.offset + end, recorder)
+            info["rows_out"] = len(snapshot.df)
+        self._ends_with_newline = True
+        return snapshot
+
+    def _merged(self, current, tail, offset, recorder):
+        df = concat_prepared([current.df, tail[list(current.df.columns)]])
+        tail = df.iloc[len(current.df):]
+        filter_engine = current.filter_engine.appended(tail)
+        cube = current.engine.cube.appended(tail, filter_engine.sorted)
+        if cube is None:                         # Yeni kategori: küp yeniden kurulur
+            recorder.record("cube_rebuild", rows_out=len(df))
+            engine = build_aggregation_engine(df, filter_engine)
+        else:
+            sketches = current.engine.sketches       # Taslaklar birleştirilebilir: kuyruk ayrı özetlenir
+            sketches = sketches.appended(tail) if sketches is not None else build_sketches(df)
+            engine = AggregationEngine(df, cube, sketches)
+        return Snapshot(df, freeze(filter_engine), freeze(engine), current.version + 1, offset,
+                        current.signature_bytes)
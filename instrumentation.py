@@ -0,0 +1,71 @@
+# ----------------------------------------
+# Opt-in performance instrumentation.
+# Enabled with ?debug=1 in the URL or DASHBOARD_DEBUG=1 in the environment.
+# A Recorder collects wall times, row counts, memory use and figure payload
+# sizes for one script run; every measurement is also appended as one JSON
+# line to DASHBOARD_TIMING_LOG (default dashboard_timings.jsonl), so slow
+# interactions can be traced to pandas, figure construction or payload size.
+#
+# When disabled, the recorder's methods do nothing and nothing is measured.
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+DEBUG_ENV = "DASHBOARD_DEBUG"
+TIMING_LOG = os.environ.get("DASHBOARD_TIMING_LOG", "dashboard_timings.jsonl")
+
+_TRUE = ("1", "true", "yes", "on")
+_log_lock = threading.Lock()             # Oturumlar aynı log dosyasına yazar
+
+
+def debug_enabled(query_value=None):
+    if query_value is not None and str(query_value).lower() in _TRUE:
+        return True
+    return os.environ.get(DEBUG_ENV, "").lower() in _TRUE
+
+
+class Recorder:
+
+    def __init__(self, enabled=False, log_path=TIMING_LOG, session=None):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.session = session
+        self.run_id = uuid.uuid4().hex[:12] if enabled else None
+        self.entries = []
+
+    def record(self, stage, **fields):
+        if not self.enabled:
+            return
+        entry = {"stage": stage, **fields}
+        self.entries.append(entry)
+        if self.log_path:
+            line = {"ts": round(time.time(), 3), "session": self.session, "run": self.run_id, **entry}
+            with _log_lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line, default=str) + "\n")
+
+    # Times the block and records it; extra fields can be added to the
+    # yielded dict inside the block (row counts, sizes, ...)
+    @contextmanager
+    def timer(self, stage, **fields):
+        if not self.enabled:
+            yield {}
+            return
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(stage, seconds=time.perf_counter() - start, **fields)
+
+    def seconds(self, stage):
+        return sum(e.get("seconds", 0.0) for e in self.entries if e["stage"] == stage)
+
+    def find(self, stage):
+        return [e for e in self.entries if e["stage"] == stage]
+
+
+NULL_RECORDER = Recorder(enabled=False)
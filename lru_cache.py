@@ -0,0 +1,86 @@
+# ----------------------------------------
+# Byte-budgeted LRU cache shared between sessions.
+# Every entry is sized once, when it is stored, by the size_of function the
+# cache was created with (JSON bytes for figures, memory for data frames,
+# body length for API responses). The least recently used entries are
+# evicted once the total exceeds max_bytes; an entry larger than the whole
+# budget is not stored.
+#
+# Cached values are shared and must not be modified.
+
+import threading
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class LRUCache:
+
+    def __init__(self, max_bytes, size_of):
+        self.max_bytes = max_bytes
+        self.size_of = size_of                 # value -> bayt
+        self._entries = OrderedDict()          # key -> (value, size)
+        self._lock = threading.Lock()          # Oturumlar aynı önbelleği paylaşır
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):               # Sayaçları ve sırayı değiştirmez
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.size_of(value)             # Kilit dışında ölçülür
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.max_bytes:
+                return                         # Bütçeden büyük değer saklanmaz
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = build()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return dict(
+                entries=len(self._entries),
+                bytes=self.bytes,
+                max_bytes=self.max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                hit_rate=self.hits / lookups if lookups else 0.0,
+            )
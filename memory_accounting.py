@@ -0,0 +1,145 @@
+# ----------------------------------------
+# Shared dataset and per-session memory accounting.
+# The prepared frame, its filter engine and aggregation engine (and the
+# progressive sample) exist once per server process (st.cache_resource in
+# app.py) and are shared by every session. freeze() marks the engines' numpy
+# arrays read-only, so an in-place write by one session raises instead of
+# changing everyone's data; pandas' copy-on-write already guards the frame.
+#
+# A session should only hold row positions and small aggregate frames. What
+# it keeps between runs (its session_state and the chart context that its
+# section fragments hold on to) is measured with deep_size(), without
+# anything that belongs to the shared resources, and published to a
+# server-wide SessionRegistry. The admin view (?admin=1 or DASHBOARD_ADMIN=1)
+# lists the shared resources and every active session, for sizing pods.
+
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+
+ADMIN_ENV = "DASHBOARD_ADMIN"
+SESSION_IDLE_SECONDS = int(os.environ.get("DASHBOARD_SESSION_IDLE_SECONDS", 3600))   # Daha uzun sessiz oturum listeden düşer
+
+_TRUE = ("1", "true", "yes", "on")
+
+# Not followed while walking: code, synchronization objects, background jobs
+# (their results land in the shared figure cache) and figures (same)
+_LEAF_TYPES = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType,
+               types.MethodType, Future, BaseFigure, type(threading.Lock()))
+
+
+def admin_enabled(query_value=None):
+    if query_value is not None and str(query_value).lower() in _TRUE:
+        return True
+    return os.environ.get(ADMIN_ENV, "").lower() in _TRUE
+
+
+# Objects reachable from obj through containers and instance attributes,
+# each once, never entering the ids in `seen` (which is updated)
+def _walk(obj, seen):
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        yield item
+        if isinstance(item, (_LEAF_TYPES, np.ndarray, pd.DataFrame, pd.Series, pd.Index, str, bytes)):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            stack.extend(getattr(item, "__dict__", {}).values())
+            stack.extend(getattr(item, name) for name in getattr(type(item), "__slots__", ())
+                         if hasattr(item, name))
+
+
+# A view is charged its whole base array, once: `seen` holds the ids
+# already walked or charged (and is updated)
+def _own_bytes(item, seen):
+    if isinstance(item, np.ndarray):
+        base = item
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        if base is item:
+            return item.nbytes
+        if id(base) in seen:
+            return 0                       # Paylaşılan ya da sayılmış dizinin görünümü
+        seen.add(id(base))
+        return base.nbytes
+    if isinstance(item, (pd.DataFrame, pd.Series, pd.Index)):
+        return int(np.sum(item.memory_usage(deep=True)))
+    if isinstance(item, _LEAF_TYPES):
+        return 0
+    return sys.getsizeof(item)
+
+# Ids of everything reachable from the given objects
+def reachable(objects):
+    seen = set()
+    for obj in objects:
+        for _ in _walk(obj, seen):
+            pass
+    return seen
+
+# Bytes held by obj and everything it references, except the ids in
+# `exclude` (see reachable); a view of an excluded array costs nothing
+def deep_size(obj, exclude=frozenset()):
+    seen = set(exclude)
+    return sum(_own_bytes(item, seen) for item in _walk(obj, seen))
+
+
+# Marks every numpy array reachable from obj read-only; returns obj
+def freeze(obj):
+    for item in _walk(obj, set()):
+        if isinstance(item, np.ndarray):
+            item.flags.writeable = False
+    return obj
+
+
+# Sizes of the shared resources, [(name, bytes)]; an object reachable
+# from several resources is counted for the first one only
+def shared_sizes(resources):
+    seen = set()
+    sizes = []
+    for name, obj in resources:
+        if obj is None:
+            continue
+        sizes.append((name, sum(_own_bytes(item, seen) for item in _walk(obj, seen))))
+    return sizes
+
+
+# ----------------------------------------
+# Latest memory measurement of every session on this server. Sessions
+# report at the end of each run; one that has not reported for
+# SESSION_IDLE_SECONDS is treated as gone.
+
+class SessionRegistry:
+
+    def __init__(self, idle_seconds=SESSION_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self._sessions = {}                    # session id -> kullanım
+        self._lock = threading.Lock()          # Oturumlar aynı kaydı paylaşır
+
+    # parts: {name: bytes}
+    def update(self, session_id, parts, rows=None):
+        with self._lock:
+            self._sessions[session_id] = dict(parts=dict(parts), bytes=sum(parts.values()),
+                                              rows=rows, updated=time.time())
+
+    def sessions(self):
+        now = time.time()
+        with self._lock:
+            for session_id in [s for s, u in self._sessions.items() if now - u["updated"] > self.idle_seconds]:
+                del self._sessions[session_id]
+            return {s: dict(u, idle=now - u["updated"]) for s, u in self._sessions.items()}
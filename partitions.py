@@ -0,0 +1,160 @@
+# ----------------------------------------
+# Partitioned datasets: a directory or glob of many files instead of one.
+#
+#   DASHBOARD_DATA=data/                       every CSV / Parquet / Arrow file below
+#   DASHBOARD_DATA="exports/2024-*.csv"        a glob of daily or regional files
+#
+# Hive-style directory names (season=Winter/, state=KY/, category=Footwear/)
+# are parsed into partition values. A partition whose value the current
+# filters exclude is never read, and the remaining files are read and cleaned
+# in parallel on a thread pool (pyarrow and the pandas CSV parser release the
+# GIL while parsing). A column that only exists as a directory name is added
+# to the rows of that file.
+
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import unquote
+
+from data_loader import (
+    LOADERS,
+    STATE_NAME_TO_ABBR,
+    categorical_cols,
+    clean_data,
+    concat_prepared,
+    file_extension,
+    file_fingerprint,
+    load_data,
+)
+from sketches import SKETCH_MIN_ROWS, SketchIndex
+
+
+PARTITION_WORKERS = int(os.environ.get("DASHBOARD_PARTITION_WORKERS", 0)) or None   # 0 = CPU sayısı kadar
+
+PARTITION_ALIASES = {"state": "Location"}   # Dizin anahtarı -> sütun (büyük/küçük harf duyarsız)
+
+STATE_ABBR_TO_NAME = {abbr: name for name, abbr in STATE_NAME_TO_ABBR.items()}
+
+
+@dataclass(frozen=True)
+class Partition:
+    path: str
+    values: tuple = ()                 # ((sütun, değer), ...) dizin adlarından
+
+    def value(self, col):
+        return dict(self.values).get(col)
+
+
+def is_partitioned(source):
+    return os.path.isdir(source) or glob.has_magic(str(source))
+
+def partition_column(key):
+    key = unquote(key).strip().lower()
+    if key in PARTITION_ALIASES:
+        return PARTITION_ALIASES[key]
+    for col in categorical_cols:
+        if col.lower() == key.replace("_", " "):
+            return col
+    return None                        # Bilinmeyen anahtar: filtrelenmez, sütun eklenmez
+
+def partition_values(path, root):
+    values = []
+    for part in os.path.relpath(os.path.dirname(path), root).split(os.sep):
+        key, sep, value = part.partition("=")
+        col = partition_column(key) if sep else None
+        if col is None:
+            continue
+        value = unquote(value)
+        if col == "Location":
+            value = STATE_ABBR_TO_NAME.get(value, value)   # state=KY -> Kentucky
+        values.append((col, value))
+    return tuple(values)
+
+
+# ----------------------------------------
+# Discovery. Hidden and bookkeeping files (.crc, _SUCCESS) are skipped.
+
+def discover(source):
+    if os.path.isdir(source):
+        root = source
+        paths = glob.glob(os.path.join(glob.escape(source), "**", "*"), recursive=True)
+    else:
+        root = _glob_root(source)
+        paths = glob.glob(source, recursive=True)
+    partitions = []
+    for path in sorted(paths):
+        name = os.path.basename(path)
+        if name.startswith((".", "_")) or file_extension(path) not in LOADERS or not os.path.isfile(path):
+            continue
+        partitions.append(Partition(path, partition_values(path, root)))
+    return partitions
+
+def _glob_root(pattern):
+    parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    root = os.sep.join(parts) or "."
+    return root if os.path.isdir(root) else os.path.dirname(root) or "."
+
+# Identifies this exact set of files (added, removed or changed files give a
+# new key)
+def listing_fingerprint(partitions):
+    return tuple(file_fingerprint(p.path) for p in partitions)
+
+# Distinct values of each partition column (sidebar choices)
+def partition_options(partitions):
+    options = {}
+    for partition in partitions:
+        for col, value in partition.values:
+            options.setdefault(col, set()).add(value)
+    return {col: sorted(values) for col, values in options.items()}
+
+
+# ----------------------------------------
+# Pruning. constraints is {column: allowed values or None}, e.g.
+# FilterState.categorical(); a partition is skipped when one of its values
+# is not allowed.
+
+def prune(partitions, constraints):
+    kept = []
+    for partition in partitions:
+        if all(
+            constraints.get(col) is None or value in constraints[col]
+            for col, value in partition.values
+        ):
+            kept.append(partition)
+    return kept
+
+
+# ----------------------------------------
+# Parallel read + clean. Returns the prepared frame and its sketches, or
+# (None, None) when nothing could be read. When the files read hold
+# sketch_min_rows rows or more, each file is sketched on its own (on the
+# same pool) and the indexes are merged, so the sketches cover exactly the
+# partitions that survived prune().
+
+def read_partition(partition):
+    df = load_data(partition.path)
+    if df is None:
+        return None
+    for col, value in partition.values:
+        if col not in [c.strip() for c in df.columns]:
+            df[col] = value            # Yalnızca dizin adında bulunan sütun
+    return clean_data(df)
+
+def load_partitions(partitions, max_workers=PARTITION_WORKERS, sketch_min_rows=SKETCH_MIN_ROWS):
+    if not partitions:
+        return None, None
+    workers = min(max_workers or os.cpu_count() or 1, len(partitions))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="partition") as pool:
+        run = map if workers == 1 else pool.map
+        frames = [f for f in run(read_partition, partitions) if f is not None]
+        if not frames:
+            return None, None
+        sketches = None
+        if sum(len(f) for f in frames) >= sketch_min_rows:
+            sketches = SketchIndex.merged(run(SketchIndex.from_frame, frames))   # Dosya başına bir taslak
+    return concat_prepared(frames), sketches
@@ -0,0 +1,130 @@
+# ----------------------------------------
+# Headless dashboard pipeline.
+# The stages behind app.py as plain functions, so the dashboard can be run,
+# profiled and benchmarked without Streamlit:
+#
+#   load -> clean -> index (filter engine + aggregate cube)
+#        -> filter -> aggregate -> build figures
+#
+# app.py wraps the expensive stages in st.cache_resource and renders the
+# figures; benchmarks/run.py times each stage on synthetic data.
+
+import time
+
+from aggregation import AggregationEngine
+from cube import AggregateCube
+from data_loader import clean_data, concat_prepared, iter_bytes_chunks, load_data
+from filter_engine import FilterEngine, FilterState
+from instrumentation import NULL_RECORDER
+from partitions import PARTITION_WORKERS, load_partitions
+from sections import CHART_AGGREGATES, CHART_CUBOIDS, SECTIONS, ChartContext
+from sketches import SKETCH_MIN_ROWS, SketchIndex
+
+
+def load_prepared(filepath, recorder=NULL_RECORDER):
+    with recorder.timer("load_data", source=str(filepath)) as info:
+        df = load_data(filepath)
+        info["rows_out"] = 0 if df is None else len(df)
+    if df is None:
+        return None
+    with recorder.timer("clean", rows_in=len(df)) as info:
+        df = clean_data(df)
+        info["rows_out"] = len(df)
+    return df
+
+# Uploaded file: read and cleaned chunk by chunk. progress(fraction, rows)
+# is called after every chunk. Returns None when the file has no rows.
+def load_prepared_bytes(raw_bytes, filename, recorder=NULL_RECORDER, progress=None):
+    frames, rows_in, clean_seconds = [], 0, 0.0
+    with recorder.timer("load_data", source=filename) as info:
+        for chunk, done in iter_bytes_chunks(raw_bytes, filename):
+            rows_in += len(chunk)
+            start = time.perf_counter()
+            frames.append(clean_data(chunk))
+            clean_seconds += time.perf_counter() - start
+            if progress is not None:
+                progress(done, rows_in)
+        info["rows_out"] = rows_in
+    recorder.record("clean", seconds=clean_seconds, rows_in=rows_in, rows_out=sum(len(f) for f in frames))
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return None
+    return concat_prepared(frames)
+
+# Partitioned source (partitions.py): the given files are read, cleaned
+# and sketched in parallel. Returns (frame, sketches of the files).
+def load_partitioned(partitions, recorder=NULL_RECORDER, max_workers=PARTITION_WORKERS):
+    with recorder.timer("load_partitions", source=f"{len(partitions)} files") as info:
+        df, sketches = load_partitions(partitions, max_workers)
+        info["rows_out"] = 0 if df is None else len(df)
+    return df, sketches
+
+def build_filter_engine(df):
+    return FilterEngine(df)
+
+# sketches: already built for these rows (partition files), else built here
+def build_aggregation_engine(df, filter_engine, sketches=None):
+    cube = AggregateCube(df, materialize=CHART_CUBOIDS, sorted_index=filter_engine.sorted)
+    return AggregationEngine(df, cube, sketches if sketches is not None else build_sketches(df))
+
+# Approximate summaries (sketches.py), only for large datasets
+def build_sketches(df, min_rows=SKETCH_MIN_ROWS):
+    return SketchIndex.from_frame(df) if len(df) >= min_rows else None
+
+
+# Choices and bounds of the sidebar filters
+def filter_options(df):
+    return dict(
+        seasons=sorted(df["Season"].dropna().unique().tolist()) if "Season" in df.columns else [],
+        categories=sorted(df["Category"].dropna().unique().tolist()) if "Category" in df.columns else [],
+        genders=sorted(df["Gender"].unique().tolist()) if "Gender" in df.columns else [],
+        age=(int(df["Age"].min()), int(df["Age"].max())) if "Age" in df.columns else (18, 90),
+        price=(
+            (int(df["Purchase Amount (USD)"].min()), int(df["Purchase Amount (USD)"].max()))
+            if "Purchase Amount (USD)" in df.columns else (0, 1000)
+        ),
+    )
+
+# Filter state of the untouched sidebar (every season, category and gender,
+# full age and purchase amount ranges)
+def default_filter_state(options):
+    return FilterState.from_sidebar(
+        "All Seasons", options["categories"], options["age"], options["genders"], options["price"]
+    )
+
+
+# Aggregation requests of the given sections, in one batch
+def section_requests(sections, columns):
+    return {
+        name: list(CHART_AGGREGATES[name])
+        for section in sections
+        if section.available(columns)
+        for name in section.aggregates
+    }
+
+def aggregate(engine, state, selection, sections=SECTIONS):
+    requests = section_requests(sections, engine.df.columns)
+    return engine.run(requests, state, selection) if requests else {}
+
+
+# Builds every available section with its default options (or the given
+# ones, section key -> keyword options), within the chart payload budget.
+# Returns key -> (figure, caption).
+def build_figures(ctx, sections=SECTIONS, options=None):
+    options = options or {}
+    return {
+        section.key: section.render(ctx, options.get(section.key))
+        for section in sections
+        if section.available(ctx.columns)
+    }
+
+
+# Whole pipeline for one filter state on an already prepared frame
+def render(df, state=None, filter_engine=None, engine=None, sections=SECTIONS):
+    filter_engine = filter_engine or build_filter_engine(df)
+    engine = engine or build_aggregation_engine(df, filter_engine)
+    state = state or default_filter_state(filter_options(df))
+    selection = filter_engine.select(state)
+    aggregates = aggregate(engine, state, selection, sections)
+    ctx = ChartContext(df, selection, state, engine, aggregates, take=filter_engine.take)
+    return build_figures(ctx, sections)
@@ -0,0 +1,119 @@
+# ----------------------------------------
+# Progressive rendering for large datasets (DASHBOARD_PROGRESSIVE=1).
+# A section without an exact figure in the cache is first drawn from a
+# uniform sample of the prepared frame (drawn once per dataset), with totals
+# scaled up to the full row count and a caption saying it is approximate.
+# The exact figure is built on a shared thread pool meanwhile and replaces
+# the sample chart as soon as it is done.
+#
+# A session only waits for the jobs of its latest run: a new filter change
+# cancels the jobs of the previous run that have not started yet. Jobs that
+# already started still finish and land in the figure cache.
+#
+# Threads rather than processes: the prepared frame and its indexes are in
+# memory already and the heavy numpy / pandas work releases the GIL.
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from pipeline import build_aggregation_engine, build_filter_engine
+from sections import ChartContext
+
+
+PROGRESSIVE = os.environ.get("DASHBOARD_PROGRESSIVE", "").lower() in ("1", "true", "yes", "on")
+PROGRESSIVE_MIN_ROWS = int(os.environ.get("DASHBOARD_PROGRESSIVE_MIN_ROWS", 500_000))     # Daha küçük veride doğrudan hesapla
+PROGRESSIVE_SAMPLE_ROWS = int(os.environ.get("DASHBOARD_PROGRESSIVE_SAMPLE_ROWS", 50_000))
+PROGRESSIVE_WORKERS = int(os.environ.get("DASHBOARD_PROGRESSIVE_WORKERS", 0)) or None       # 0 = CPU sayısı kadar
+
+SCALED_MEASURES = ("sum", "count", "sum_sq")
+
+
+# ----------------------------------------
+# Sample of the prepared frame with its own indexes. factor is
+# full rows / sample rows.
+
+@dataclass(frozen=True)
+class DatasetSample:
+    df: object
+    filter_engine: object
+    engine: object
+    factor: float
+
+
+def build_sample(df, rows=PROGRESSIVE_SAMPLE_ROWS, seed=0):
+    rows = min(rows, len(df))
+    rng = np.random.default_rng(seed)     # Sabit tohum: aynı veri = aynı örnek
+    positions = np.sort(rng.choice(len(df), size=rows, replace=False))
+    sample = df.take(positions).reset_index(drop=True)
+    filter_engine = build_filter_engine(sample)
+    engine = build_aggregation_engine(sample, filter_engine)
+    factor = len(df) / rows if rows else 1.0
+    return DatasetSample(sample, filter_engine, SampleEngine(engine, factor), factor)
+
+
+# Aggregations of the sample, scaled to the full dataset
+class SampleEngine:
+
+    def __init__(self, engine, factor):
+        self.engine = engine
+        self.factor = factor
+        self.df = engine.df
+        self.sketches = None
+
+    def dimension(self, name):
+        return self.engine.dimension(name)
+
+    def run(self, requests, state, selection=None):
+        results = self.engine.run(requests, state, selection)
+        for frame in results.values():
+            for col in SCALED_MEASURES:
+                frame[col] = frame[col] * self.factor
+            frame["count"] = frame["count"].round().astype("int64")
+        return results
+
+
+# Chart context of the sample: counts are scaled like the aggregations
+class SampleContext(ChartContext):
+
+    def __init__(self, sample, state):
+        super().__init__(sample.df, sample.filter_engine.select(state), state, sample.engine,
+                         take=sample.filter_engine.take)
+        self.factor = sample.factor
+        self.sample_rows = len(self.selection)
+
+    @property
+    def count(self):
+        return int(round(len(self.selection) * self.factor))
+
+    def histogram(self, col, nbins=20):
+        summary = super().histogram(col, nbins)
+        if summary is None:
+            return None
+        return dict(summary, n=self.count,
+                    counts=np.round(summary["counts"] * self.factor).astype(np.int64))
+
+
+# ----------------------------------------
+# Background jobs of one server. submit() runs build() on the pool and
+# returns a future whose result is (value, seconds).
+
+class ProgressiveRunner:
+
+    def __init__(self, max_workers=PROGRESSIVE_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="progressive")
+
+    def submit(self, build):
+        def job():
+            start = time.perf_counter()
+            value = build()
+            return value, time.perf_counter() - start
+        return self.pool.submit(job)
+
+    # Cancels the jobs that have not started yet; returns how many
+    @staticmethod
+    def cancel(futures):
+        return sum(1 for future in futures if future.cancel())
@@ -0,0 +1,382 @@
+# ----------------------------------------
+# Dashboard sections as independent units.
+# Every visualization is a Section that declares the filter inputs, the
+# columns and the aggregations it depends on, plus a build function from a
+# ChartContext to (figure or None, caption or None). The app runs each
+# section in its own Streamlit fragment, so
+#
+#   - a section's own widgets (Sankey stages, scatter zoom, ...) rerun only
+#     that section,
+#   - a collapsed section computes nothing until it is opened,
+#   - a section whose declared inputs did not change reuses its last figure.
+#
+# No Streamlit calls here; widgets stay in app.py.
+
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+from charts import (
+    HISTOGRAM_OUTLIER_CAP,
+    PARCOORDS_ROW_BUDGET,
+    SCATTER_COLUMNS,
+    histogram_figure,
+    histogram_summary,
+    item_sales_figure,
+    location_category_heatmap,
+    parallel_coordinates_figure,
+    sankey_figure,
+    scatter_figure,
+    state_map_figure,
+    sunburst_figure,
+    treemap_figure,
+)
+from export import export_bytes
+from figure_cache import figure_size
+from flow_graph import build_flow_graph
+from sketches import CUSTOMER_COLUMN, SKETCH_TOP_ITEMS
+
+
+FILTER_INPUTS = ("season", "categories", "genders", "age_range", "price_range")   # FilterState alanları
+
+CHART_AGGREGATES = {                     # Grafiklerin ihtiyaç duyduğu boyutlar
+    "treemap": ("Category",),
+    "sunburst": ("Season", "Category"),
+    "items": ("Item Purchased",),
+    "states": ("Location_Abbr",),
+    "heatmap": ("Location_Abbr", "Category"),
+}
+
+SANKEY_DEFAULT_STAGES = ["Category", "Payment Method", "Shipping Type"]
+SANKEY_STAGE_OPTIONS = [                 # Sankey aşaması olarak seçilebilecek sütunlar
+    "Gender", "Season", "Category", "Item Purchased", "Size", "Color",
+    "Payment Method", "Shipping Type", "Location_Abbr"
+]
+
+# Keyword options of each section with its widgets untouched. app.py
+# draws the widgets with these defaults and batch_render.py pre-builds the
+# figures with them, so both produce the same figure cache keys.
+def default_options(columns):
+    return {
+        "sankey": {"stages": tuple(c for c in SANKEY_DEFAULT_STAGES if c in SANKEY_STAGE_OPTIONS and c in columns)},
+        "scatter": {"mode": "Auto", "x_window": None, "y_window": None},
+        "parcoords": {"budget": PARCOORDS_ROW_BUDGET},
+    }
+
+# Per-chart payload budget (serialized figure JSON sent to the browser).
+# A section that declares a degrade step is rebuilt with coarser options
+# (density bins instead of points, fewer sampled lines) while its figure is
+# over budget. 0 turns the check off.
+FIGURE_BUDGET_KB = int(os.environ.get("DASHBOARD_FIGURE_BUDGET_KB", 1024))
+PARCOORDS_MIN_BUDGET = 500               # Paralel koordinatlarda en az bu kadar çizgi
+
+CHART_CUBOIDS = (                        # Küpten önceden türetilecek alt küpler
+    list(dict.fromkeys(CHART_AGGREGATES.values())) + [tuple(SANKEY_DEFAULT_STAGES)]
+)
+
+
+# ----------------------------------------
+# Everything a section may read during one rerun. Aggregations requested in
+# the main batch are handed in; a section opened later (inside its own
+# fragment rerun) asks the engine for the missing ones on demand.
+#
+# Build functions only go through these methods, so another data backend
+# (duckdb_backend.QueryContext) can stand in for the in-memory frame.
+
+class ChartContext:
+
+    def __init__(self, df, selection, state, engine, aggregates=None, take=None):
+        self.df = df
+        self.selection = selection
+        self.state = state
+        self.engine = engine
+        self.aggregates = dict(aggregates or {})
+        self._take = take
+        self._sketch = None
+
+    @property
+    def columns(self):
+        return self.df.columns
+
+    @property
+    def count(self):
+        return len(self.selection)
+
+    # Selected rows of the given columns as a DataFrame, materialized only
+    # for sections that need rows and not kept: section fragments hold on to
+    # their context between runs, so it should carry row positions only
+    def rows(self, columns):
+        frame = self.df[[c for c in columns if c in self.df.columns]]
+        return self._take(frame, self.selection) if self._take else frame.take(self.selection)
+
+    def aggregate(self, name):
+        if name not in self.aggregates:
+            request = {name: list(CHART_AGGREGATES[name])}
+            self.aggregates.update(self.engine.run(request, self.state, self.selection))
+        return self.aggregates[name]
+
+    def flow(self, stages):
+        return build_flow_graph(self.engine, stages, self.state, self.selection)
+
+    # Sketches of the selection (large datasets only; None when the state
+    # cannot be answered from them)
+    @property
+    def sketch(self):
+        if self._sketch is None and getattr(self.engine, "sketches", None) is not None:
+            self._sketch = self.engine.sketches.select(self.state) or False
+        return self._sketch or None
+
+    def histogram(self, col, nbins=20):
+        sketch = self.sketch
+        box = sketch.quantiles[col].box(HISTOGRAM_OUTLIER_CAP) if sketch and col in sketch.quantiles else None
+        return histogram_summary(self.df[col].to_numpy()[self.selection], nbins=nbins, box=box)
+
+    # Top items by total amount from the heavy-hitter sketch:
+    # (frame of Item Purchased / sum, largest possible shortfall), or None
+    # when the exact aggregation is used
+    def top_items(self, n=SKETCH_TOP_ITEMS):
+        sketch = self.sketch
+        if sketch is None or sketch.items is None:
+            return None
+        top = sketch.items.top(n)
+        frame = pd.DataFrame({"Item Purchased": [label for label, _ in top],
+                              "sum": [total for _, total in top]})
+        return frame, sketch.items.error
+
+    # (distinct Customer IDs among the selected rows, approximate?) or None
+    def unique_customers(self):
+        if CUSTOMER_COLUMN not in self.columns:
+            return None
+        sketch = self.sketch
+        if sketch is not None and sketch.customers is not None:
+            return int(round(sketch.customers.estimate())), True
+        return len(pd.unique(self.df[CUSTOMER_COLUMN].to_numpy()[self.selection])), False
+
+    def scatter(self, mode="Auto", x_window=None, y_window=None):
+        return scatter_figure(self.rows(SCATTER_COLUMNS), mode=mode, x_window=x_window, y_window=y_window)
+
+    def parallel_coordinates(self, budget=PARCOORDS_ROW_BUDGET):
+        return parallel_coordinates_figure(self.df, self.selection, self.engine.dimension, budget)
+
+    def preview(self, n_rows=20):
+        return self.df.take(self.selection[:n_rows])
+
+    def export(self, fmt):
+        return export_bytes(self.df, self.selection, fmt)
+
+
+@dataclass(frozen=True)
+class Section:
+    key: str
+    title: str
+    description: str
+    build: object                        # (ChartContext, **options) -> (figure or None, caption or None)
+    columns: tuple = ()
+    inputs: tuple = FILTER_INPUTS
+    aggregates: tuple = ()               # CHART_AGGREGATES names, requested in the main batch
+    empty_message: str = "No data available for the selected filters."
+    empty_level: str = "warning"         # "warning" or "info"
+    default_open: bool = True
+    degrade: object = None               # options -> coarser options, or None when nothing is left to drop
+
+    def available(self, columns):
+        return all(c in columns for c in self.columns)
+
+    # build() under the chart payload budget: (figure or None, caption or None)
+    def render(self, ctx, options=None, budget_kb=FIGURE_BUDGET_KB):
+        options = dict(options or {})
+        fig, caption = self.build(ctx, **options)
+        if fig is None or not budget_kb or self.degrade is None:
+            return fig, caption
+        simplified = False
+        while figure_size(fig) > budget_kb * 1024:
+            coarser = self.degrade(options)
+            if coarser is None:
+                break
+            options = coarser
+            fig, caption = self.build(ctx, **options)
+            simplified = True
+            if fig is None:
+                return fig, caption
+        if simplified:
+            note = f"Simplified to stay within the {budget_kb:,} KB chart budget ({figure_size(fig) / 1024:,.0f} KB sent)."
+            caption = " ".join(filter(None, [caption, note]))
+        return fig, caption
+
+    # Cache key of the section's figure under a filter state and its own options
+    def dependency_key(self, fingerprint, state, options=None):
+        return (
+            fingerprint,
+            self.key,
+            tuple(getattr(state, name) for name in self.inputs),
+            tuple(sorted((options or {}).items())),
+        )
+
+
+# ----------------------------------------
+# Build functions
+
+def build_treemap(ctx):
+    # Drawn even for an empty selection (empty treemap), as before
+    return treemap_figure(ctx.aggregate("treemap")), None
+
+def build_sankey(ctx, stages=tuple(SANKEY_DEFAULT_STAGES)):
+    flow = ctx.flow(stages)
+    if flow.empty:                       # Bağlantı yoksa grafik gösterme
+        return None, None
+    return sankey_figure(flow), None
+
+def build_histogram(ctx):
+    # Bins and box statistics are computed on the server (charts.py); the
+    # figure only receives the counts and the quartiles / fences.
+    summary = ctx.histogram("Age", nbins=20)
+    if summary is None:
+        return None, None
+    return histogram_figure(summary, x_label="Age", title="Customer Age Distribution"), None
+
+def build_sunburst(ctx):
+    if ctx.count == 0:
+        return None, None
+    return sunburst_figure(ctx.aggregate("sunburst")), None
+
+def build_bar(ctx):
+    if ctx.count == 0:
+        return None, None
+    top = ctx.top_items()
+    if top is None:
+        return item_sales_figure(ctx.aggregate("items")), None
+    items, error = top                   # Büyük veri: en çok satanlar taslaktan
+    caption = f"Top {len(items)} items from a streaming summary"
+    if error:
+        caption += f"; totals may be up to ${error:,.0f} low"
+    return item_sales_figure(items), caption + "."
+
+def build_geo(ctx):
+    if ctx.count == 0:
+        return None, None
+    return state_map_figure(ctx.aggregate("states")), None
+
+def build_heatmap(ctx):
+    if ctx.count == 0:
+        return None, None
+    return location_category_heatmap(ctx.aggregate("heatmap")), None
+
+def build_scatter(ctx, mode="Auto", x_window=None, y_window=None):
+    fig, used, rows = ctx.scatter(mode=mode, x_window=x_window, y_window=y_window)
+    return fig, f"{rows:,} rows shown as {used.lower()}."
+
+def build_parallel_coordinates(ctx, budget=PARCOORDS_ROW_BUDGET):
+    fig, drawn = ctx.parallel_coordinates(budget)
+    caption = None
+    if fig is not None and drawn < ctx.count:
+        caption = f"Showing a stratified sample of {drawn:,} out of {ctx.count:,} customers."
+    return fig, caption
+
+
+# ----------------------------------------
+# Degrade steps: the next coarser options of an over-budget figure
+
+def degrade_scatter(options):
+    mode = options.get("mode", "Auto")
+    if mode == "Density":
+        return None
+    return dict(options, mode="WebGL" if mode == "Points" else "Density")   # Auto doğrudan yoğunluğa
+
+def degrade_parallel_coordinates(options):
+    budget = options.get("budget", PARCOORDS_ROW_BUDGET)
+    if budget <= PARCOORDS_MIN_BUDGET:
+        return None
+    return dict(options, budget=max(budget // 2, PARCOORDS_MIN_BUDGET))
+
+
+# ----------------------------------------
+# Sections in page order
+
+SECTIONS = [
+    Section(
+        key="treemap",
+        title="Treemap",
+        description="This treemap shows the total purchase amount aggregated by product category, \
+             giving a clear view of which categories contribute most to revenue.",
+        build=build_treemap,
+        columns=("Category",),
+        aggregates=("treemap",),
+    ),
+    Section(
+        key="sankey",
+        title="Sankey Diagram",
+        description="This Sankey diagram visualizes how customers move from product categories \
+     to their preferred payment methods and shipping types, giving insight into purchasing behavior patterns.",
+        build=build_sankey,
+        empty_message="Not enough data to generate the Sankey diagram.",
+        empty_level="info",
+    ),
+    Section(
+        key="histogram",
+        title="Age Distribution Histogram",
+        description="This histogram displays the distribution of customer ages."
+                    "which age groups are more active shoppers. ",
+        build=build_histogram,
+        columns=("Age",),
+    ),
+    Section(
+        key="sunburst",
+        title="Sunburst Chart",
+        description="This sunburst chart visualizes how total purchase amounts are distributed "
+                    "across different seasons and product categories.",
+        build=build_sunburst,
+        columns=("Season", "Category"),
+        aggregates=("sunburst",),
+        empty_message="No data available for selected filters.",
+    ),
+    Section(
+        key="bar",
+        title="Bar Chart",
+        description="This bar chart displays the total purchase amount for each item, "
+                    "highlighting the top-selling products.",
+        build=build_bar,
+        columns=("Item Purchased",),
+        aggregates=("items",),
+    ),
+    Section(
+        key="geo",
+        title="Geographical Distribution of Total Spending",
+        description="This choropleth map shows total purchase amounts across U.S. states. ",
+        build=build_geo,
+        columns=("Location_Abbr",),
+        aggregates=("states",),
+        empty_message="Not enough geographical data to generate the map.",
+    ),
+    Section(
+        key="scatter",
+        title="Scatter Plot: Age vs Purchase Amount",
+        description="This scatter plot visualizes the relationship between customer age and how much they spend.",
+        build=build_scatter,
+        columns=("Age", "Purchase Amount (USD)", "Gender"),
+        degrade=degrade_scatter,
+    ),
+    Section(
+        key="heatmap",
+        title="6. Heatmap: Location vs Category",
+        description="",
+        build=build_heatmap,
+        columns=("Location_Abbr", "Category"),
+        aggregates=("heatmap",),
+        empty_message="No data available to display with these filters.",
+    ),
+    Section(
+        key="parcoords",
+        title="Advanced Multi-Dimensional Analysis",
+        description="""
+**This chart reveals complex relationships within the dataset.** By following the lines from left to right, you can visualize a complete customer journey:
+starting from their gender, moving through the season, product category, purchase amount,
+and finally their chosen payment method.
+""",
+        build=build_parallel_coordinates,
+        columns=("Purchase Amount (USD)",),
+        empty_message="Not enough data available to generate this chart.",
+        degrade=degrade_parallel_coordinates,
+        default_open=False,              # En pahalı grafik: açılınca hesaplanır
+    ),
+]
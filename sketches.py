@@ -0,0 +1,343 @@
+# ----------------------------------------
+# Mergeable summary sketches for large datasets.
+# Fixed-size summaries that answer approximately, with a known error bound,
+# and that can be merged: the sketches of two row blocks (partition files,
+# rows appended to a growing CSV) combine into the sketch of all their rows.
+#
+#   QuantileSketch    quantiles of Age / Purchase Amount. Values go into
+#                     log-spaced buckets (DDSketch), so every quantile is
+#                     within SKETCH_RELATIVE_ERROR of a true order statistic.
+#   HeavyHitters      top labels by total amount (weighted Misra-Gries). An
+#                     estimate is never above the true total and at most
+#                     .error below it; exact while there are fewer labels
+#                     than counters.
+#   DistinctCounter   distinct Customer IDs (HyperLogLog, 2^p registers,
+#                     about 1.04 / sqrt(2^p) relative standard error).
+#
+# SketchIndex keeps one set of sketches per Season x Category x Gender group
+# and answers a filter state by merging the sketches of the allowed groups.
+# Group sketches cannot apply the Age / Amount sliders, so a state that
+# narrows them is answered exactly from the selected rows instead.
+#
+# Built only for datasets of DASHBOARD_SKETCH_MIN_ROWS rows or more (0 =
+# always); smaller datasets keep the exact path everywhere. A partitioned
+# dataset (partitions.py) gets one index per file it reads, merged.
+
+import copy
+import functools
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+
+SKETCH_MIN_ROWS = int(os.environ.get("DASHBOARD_SKETCH_MIN_ROWS", 1_000_000))
+SKETCH_RELATIVE_ERROR = 0.01
+SKETCH_TOP_ITEMS = 25                  # Çubuk grafikte gösterilen en çok satan ürün sayısı
+HEAVY_HITTER_COUNTERS = 4 * SKETCH_TOP_ITEMS
+HLL_PRECISION = 14                     # 16384 kayıt, ~%0.8 standart hata
+
+SKETCH_GROUPS = ("Season", "Category", "Gender")
+QUANTILE_COLUMNS = ("Age", "Purchase Amount (USD)")
+ITEM_COLUMN = "Item Purchased"
+CUSTOMER_COLUMN = "Customer ID"
+WEIGHT_COLUMN = "Purchase Amount (USD)"
+
+
+# ----------------------------------------
+# Quantiles. Bucket k holds the values in (gamma^(k-1), gamma^k]; negative
+# values are kept mirrored in their own buckets, zeros are only counted.
+
+class QuantileSketch:
+
+    def __init__(self, relative_error=SKETCH_RELATIVE_ERROR):
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma = math.log(self.gamma)
+        self.stores = {1: (0, np.zeros(0, dtype=np.int64)), -1: (0, np.zeros(0, dtype=np.int64))}
+        self.zeros = 0
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def of(cls, values, relative_error=SKETCH_RELATIVE_ERROR):
+        sketch = cls(relative_error)
+        sketch.add(values)
+        return sketch
+
+    def add(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.zeros += int(np.count_nonzero(values == 0))
+        for sign in (1, -1):
+            part = np.abs(values[values * sign > 0])
+            if len(part):
+                keys = np.ceil(np.log(part) / self.log_gamma).astype(np.int64)
+                offset = int(keys.min())
+                counts = np.bincount(keys - offset)
+                self.stores[sign] = _add_store(self.stores[sign], (offset, counts))
+
+    def merge(self, other):
+        merged = copy.copy(self)
+        merged.stores = {sign: _add_store(self.stores[sign], other.stores[sign]) for sign in self.stores}
+        merged.zeros = self.zeros + other.zeros
+        merged.n = self.n + other.n
+        merged.min = min(self.min, other.min)
+        merged.max = max(self.max, other.max)
+        return merged
+
+    # Ascending (representative value, count) of every non-empty bucket
+    def buckets(self):
+        neg_offset, neg_counts = self.stores[-1]
+        pos_offset, pos_counts = self.stores[1]
+        neg_keys = np.flatnonzero(neg_counts)[::-1]
+        pos_keys = np.flatnonzero(pos_counts)
+        values = np.concatenate([
+            -self._value(neg_keys + neg_offset),
+            np.zeros(1 if self.zeros else 0),
+            self._value(pos_keys + pos_offset),
+        ])
+        counts = np.concatenate([
+            neg_counts[neg_keys],
+            np.full(1 if self.zeros else 0, self.zeros, dtype=np.int64),
+            pos_counts[pos_keys],
+        ])
+        return np.clip(values, self.min, self.max), counts
+
+    def _value(self, keys):
+        return 2 * self.gamma ** keys.astype("float64") / (self.gamma + 1)
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        if self.n == 0:
+            return [math.nan for _ in qs]
+        values, counts = self.buckets()
+        ends = np.cumsum(counts)
+        ranks = np.floor(np.asarray(qs, dtype="float64") * (self.n - 1)).astype(np.int64)
+        return values[np.searchsorted(ends, ranks, side="right")].tolist()
+
+    # Box-plot statistics in the form charts.histogram_summary returns them
+    def box(self, outlier_cap):
+        values, counts = self.buckets()
+        q1, median, q3 = self.quantiles([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        lowerfence = inside.min() if len(inside) else q1
+        upperfence = inside.max() if len(inside) else q3
+        low_out = values[values < lowerfence][:outlier_cap]
+        high_out = values[values > upperfence][-outlier_cap:] if outlier_cap else np.empty(0)
+        return dict(
+            q1=q1, median=median, q3=q3,
+            lowerfence=lowerfence, upperfence=upperfence,
+            outliers=np.concatenate([low_out, high_out])
+        )
+
+def _add_store(a, b):
+    (a_offset, a_counts), (b_offset, b_counts) = a, b
+    if len(a_counts) == 0:
+        return b
+    if len(b_counts) == 0:
+        return a
+    offset = min(a_offset, b_offset)
+    counts = np.zeros(max(a_offset + len(a_counts), b_offset + len(b_counts)) - offset, dtype=np.int64)
+    counts[a_offset - offset:a_offset - offset + len(a_counts)] += a_counts
+    counts[b_offset - offset:b_offset - offset + len(b_counts)] += b_counts
+    return offset, counts
+
+
+# ----------------------------------------
+# Heavy hitters. At most `capacity` labels are kept; when there are more,
+# the (capacity + 1)-th largest total is subtracted from every counter and
+# the counters that drop to zero are removed. Weights must not be negative.
+
+class HeavyHitters:
+
+    def __init__(self, capacity=HEAVY_HITTER_COUNTERS):
+        self.capacity = capacity
+        self.counters = {}             # etiket -> tahmini toplam
+        self.error = 0.0               # Bir tahminin en fazla bu kadar eksik olabileceği miktar
+
+    @classmethod
+    def of(cls, labels, weights, capacity=HEAVY_HITTER_COUNTERS):
+        sketch = cls(capacity)
+        codes, uniques = pd.factorize(np.asarray(labels), sort=True)
+        keep = codes >= 0
+        totals = np.bincount(codes[keep], weights=np.asarray(weights, dtype="float64")[keep],
+                             minlength=len(uniques))
+        sketch.counters = dict(zip(uniques.tolist(), totals.tolist()))
+        sketch._prune()
+        return sketch
+
+    def merge(self, other):
+        merged = HeavyHitters(self.capacity)
+        merged.counters = dict(self.counters)
+        for label, total in other.counters.items():
+            merged.counters[label] = merged.counters.get(label, 0.0) + total
+        merged.error = self.error + other.error
+        merged._prune()
+        return merged
+
+    def _prune(self):
+        if len(self.counters) <= self.capacity:
+            return
+        cut = sorted(self.counters.values(), reverse=True)[self.capacity]
+        self.counters = {label: total - cut for label, total in self.counters.items() if total > cut}
+        self.error += cut
+
+    # The n largest estimated totals, largest first
+    def top(self, n):
+        return sorted(self.counters.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+# ----------------------------------------
+# Distinct counts. The first p bits of a 64-bit hash pick a register, which
+# keeps the largest position of the first set bit in the remaining bits.
+
+class DistinctCounter:
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def of(cls, values, precision=HLL_PRECISION):
+        sketch = cls(precision)
+        values = np.asarray(values)
+        if len(values) == 0:
+            return sketch
+        hashes = pd.util.hash_array(values)
+        rest_bits = 64 - precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        rank = (rest_bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(sketch.registers, index, rank)
+        return sketch
+
+    def merge(self, other):
+        merged = DistinctCounter(self.precision)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return m * math.log(m / empty)         # Küçük sayılar: doğrusal sayım
+        return float(raw)
+
+def _bit_length(x):
+    x = x.copy()
+    length = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= np.uint64(1 << shift)
+        length[big] += shift
+        x[big] >>= np.uint64(shift)
+    return length + (x > 0)
+
+
+# ----------------------------------------
+# Sketches of one group of rows
+
+class GroupSketch:
+
+    def __init__(self, rows, quantiles, items, customers):
+        self.rows = rows
+        self.quantiles = quantiles     # sütun -> QuantileSketch
+        self.items = items             # HeavyHitters veya None
+        self.customers = customers     # DistinctCounter veya None
+
+    @classmethod
+    def of(cls, df):
+        return cls(
+            len(df),
+            {col: QuantileSketch.of(df[col].to_numpy()) for col in QUANTILE_COLUMNS if col in df.columns},
+            HeavyHitters.of(df[ITEM_COLUMN].to_numpy(), df[WEIGHT_COLUMN].to_numpy())
+            if ITEM_COLUMN in df.columns and WEIGHT_COLUMN in df.columns else None,
+            DistinctCounter.of(df[CUSTOMER_COLUMN].to_numpy()) if CUSTOMER_COLUMN in df.columns else None,
+        )
+
+    def merge(self, other):
+        return GroupSketch(
+            self.rows + other.rows,
+            {col: sketch.merge(other.quantiles[col]) for col, sketch in self.quantiles.items()},
+            self.items.merge(other.items) if self.items is not None else None,
+            self.customers.merge(other.customers) if self.customers is not None else None,
+        )
+
+
+class SketchIndex:
+
+    def __init__(self, dims, groups, bounds):
+        self.dims = dims               # Grup sütunları (SKETCH_GROUPS içinden)
+        self.groups = groups           # Grup etiketleri -> GroupSketch
+        self.bounds = bounds           # Aralık filtresi sütunu -> (en küçük, en büyük)
+
+    @classmethod
+    def from_frame(cls, df):
+        dims = tuple(c for c in SKETCH_GROUPS if c in df.columns)
+        groups = {}
+        if len(df) and dims:
+            for key, rows in df.groupby(list(dims), sort=True, observed=True).indices.items():
+                key = key if isinstance(key, tuple) else (key,)
+                groups[tuple(str(k) for k in key)] = GroupSketch.of(df.iloc[rows])
+        elif len(df):
+            groups[()] = GroupSketch.of(df)
+        bounds = {
+            col: (float(df[col].min()), float(df[col].max())) if len(df) else (math.inf, -math.inf)
+            for col in QUANTILE_COLUMNS if col in df.columns
+        }
+        return cls(dims, groups, bounds)
+
+    def merge(self, other):
+        groups = dict(self.groups)
+        for key, sketch in other.groups.items():
+            groups[key] = groups[key].merge(sketch) if key in groups else sketch
+        bounds = {
+            col: (min(lo, other.bounds[col][0]), max(hi, other.bounds[col][1]))
+            for col, (lo, hi) in self.bounds.items()
+        }
+        return SketchIndex(self.dims, groups, bounds)
+
+    # One index over the rows of several (one per partition file), or None
+    @classmethod
+    def merged(cls, indexes):
+        indexes = [index for index in indexes if index is not None]
+        return functools.reduce(cls.merge, indexes) if indexes else None
+
+    # Index of the same rows plus `tail` (appended rows)
+    def appended(self, tail):
+        return self.merge(SketchIndex.from_frame(tail))
+
+    # ----------------------------------------
+    # Queries. Each returns None when the sliders of the state exclude rows
+    # (the sketches cannot tell which), so the caller answers exactly.
+
+    def covers(self, state):
+        for col, bounds in state.ranges().items():
+            if bounds is None or col not in self.bounds:
+                continue
+            lo, hi = self.bounds[col]
+            if bounds[0] > lo or bounds[1] < hi:
+                return False
+        return True
+
+    def select(self, state):
+        if not self.covers(state):
+            return None
+        wanted = state.categorical()
+        merged = None
+        for key, sketch in self.groups.items():
+            if all(wanted.get(col) is None or label in wanted[col] for col, label in zip(self.dims, key)):
+                merged = sketch if merged is None else merged.merge(sketch)
+        return merged